@@ -1,52 +1,115 @@
 """
-This is the init file thatsets up Flask and the database.
+This is the init file that sets up Flask and the database.
+
+The extensions are created here without an app and bound to one in create_app(),
+so gunicorn can build the app once in the master with --preload and fork the
+workers from it. Nothing here connects to the database: the schema is managed
+with migrations (flask --app app db upgrade).
 """
 
+import os
+import weakref
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
 from flask_mail import Mail
+from flask_migrate import Migrate
+from jinja2 import FileSystemBytecodeCache
 
 from app.config import Config
+from app.database import RoutingSession, configure_engines
+from utils.rating_registry import rating_label
 
-app = Flask(__name__, static_url_path="/static", static_folder="../static")
-import os
-app.secret_key = os.environ.get('SECRET_KEY', 'fallback_key')
-app.config.from_object(Config)
-mail = Mail(app)
-db = SQLAlchemy(app)
-bcrypt = Bcrypt(app)
-login_manager = LoginManager(app)
-login_manager.login_view = "login"
+mail = Mail()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+bcrypt = Bcrypt()
+migrate = Migrate()
+login_manager = LoginManager()
+login_manager.login_view = "main.login"
 login_manager.login_message_category = "info"
 
+
 @login_manager.user_loader
 def load_user(user_id):
-    """Loading the user to get the user id."""
-    return User.query.get(int(user_id))
+    """Loading the user to get the user id, from the identity cache when it is fresh."""
+    from app.user_cache import user_cache
+
+    return user_cache.load(int(user_id))
+
+
+# Engines of every app built in this process. Forked workers must not share pooled
+# connections with the master or each other, so the child drops them; the hook is
+# registered once here, not per create_app() call.
+_fork_engines = weakref.WeakSet()
+
+
+def _dispose_engines_after_fork():
+    for engine in list(_fork_engines):
+        engine.dispose(close=False)
 
-from app import routes
-from app.models import User
-from flask_migrate import Migrate
-from app import app, db
 
-migrate = Migrate(app, db)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_engines_after_fork)
+
 
-# Define the custom getattr filter
-@app.template_filter("getattr")
 def getattr_filter(obj, attr):
     """
     Defining the custom getattr filter.
     """
     return getattr(obj, attr, None)
 
-from app.errors.handlers import errors
-app.register_blueprint(errors)
 
-from app.models import User
+def rating_label_filter(name):
+    """
+    Display label of an attribute or badge from the rating registry.
+    """
+    return rating_label(name)
+
+
+def create_app(config_class=Config):
+    """
+    Build the Flask app: extensions, blueprints, template filters and CLI commands.
+    """
+    app = Flask(__name__, static_url_path="/static", static_folder="../static")
+    app.config.from_object(config_class)
+    app.secret_key = app.config["SECRET_KEY"]
+    configure_engines(app.config)
+
+    # Compiled templates survive restarts, so new workers skip the Jinja compiler.
+    cache_dir = app.config["TEMPLATE_CACHE_DIR"]
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, "bytecode_cache": FileSystemBytecodeCache(cache_dir)}
+
+    mail.init_app(app)
+    db.init_app(app)
+    bcrypt.init_app(app)
+    login_manager.init_app(app)
+    migrate.init_app(app, db)
+
+    from app.routes import main
+    from app.errors.handlers import errors
+    app.register_blueprint(main)
+    app.register_blueprint(errors)
+
+    app.add_template_filter(getattr_filter, "getattr")
+    app.add_template_filter(rating_label_filter, "rating_label")
+
+    from app.credentials import gmail_store_token, init_credential_store
+    from app.milestones import send_milestone_digests
+    from app.outbox import outbox_worker
+    from app.progression import rebuild_progression
+    app.cli.add_command(gmail_store_token)
+    app.cli.add_command(send_milestone_digests)
+    app.cli.add_command(outbox_worker)
+    app.cli.add_command(rebuild_progression)
 
-with app.app_context():
-    from app.models import db 
-    db.create_all()
+    from app.user_cache import user_cache
+    user_cache.init_app(app)
+    init_credential_store(app)
 
+    with app.app_context():
+        _fork_engines.update(db.engines.values())
+    return app
@@ -4,6 +4,7 @@ This is the config file containing all necessary information.
 
 from datetime import timedelta
 import os
+import tempfile
 from dotenv import load_dotenv
 
 
@@ -21,6 +22,12 @@ class Config:
     SECURITY_PASSWORD_SALT = os.environ.get('SECURITY_PASSWORD_SALT')
     SQLALCHEMY_DATABASE_URI = os.environ['DATABASE_URL']
 
+    # Engine profile of this process (see app.database): "web", "worker" or "batch"
+    DB_ENGINE_PROFILE = os.environ.get("DB_ENGINE_PROFILE", "web")
+    # Optional read replica for read-only views, and how long a browser stays on the primary after a write
+    DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL")
+    REPLICA_STICKY_SECONDS = float(os.environ.get("REPLICA_STICKY_SECONDS", 10))
+
     # Login (Project B) environment variables
     LOGIN_CLIENT_ID = os.environ.get('LOGIN_CLIENT_ID')
     LOGIN_CLIENT_SECRET = os.environ.get('LOGIN_CLIENT_SECRET')
@@ -39,3 +46,32 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')  # Email for sending messages
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')  # Password for the email account
     MAIL_DEFAULT_RECIPIENT = os.environ.get("MAIL_DEFAULT_RECIPIENT")
+
+    # Where the Gmail sending token lives: "file" (token.json) or "database" (shared by all nodes)
+    GMAIL_CREDENTIAL_STORE = os.environ.get("GMAIL_CREDENTIAL_STORE", "file")
+
+    # Email outbox delivery: "gmail", "file" (writes to EMAIL_SINK_PATH) or "smtp"
+    EMAIL_TRANSPORT = os.environ.get("EMAIL_TRANSPORT", "gmail")
+    EMAIL_SINK_PATH = os.environ.get("EMAIL_SINK_PATH", "outbox_sink.jsonl")
+    EMAIL_SMTP_HOST = os.environ.get("EMAIL_SMTP_HOST", "localhost")
+    EMAIL_SMTP_PORT = int(os.environ.get("EMAIL_SMTP_PORT", 1025))
+
+    # Processes used by the Monte Carlo projection; 1 (the default) runs it in the web process.
+    # Every web worker starts its own pool, so more than 1 only pays off with a single web worker
+    # and very large simulation counts.
+    PROJECTION_WORKERS = int(os.environ.get("PROJECTION_WORKERS", 1))
+
+    # Identity cache for the login user loader: seconds an entry lives and how many users are kept
+    USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 30))
+    USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 1024))
+    # Serve process internals such as /metrics/user_cache; off in production unless set to "true"
+    EXPOSE_METRICS = os.environ.get("EXPOSE_METRICS", "false").lower() == "true"
+
+    # Background 2Kratings lookups per process: how many run at once, how many may wait,
+    # and after how many seconds an unfinished one is reported as failed
+    SCRAPE_JOB_WORKERS = int(os.environ.get("SCRAPE_JOB_WORKERS", 2))
+    SCRAPE_JOB_QUEUE = int(os.environ.get("SCRAPE_JOB_QUEUE", 8))
+    SCRAPE_JOB_TIMEOUT = int(os.environ.get("SCRAPE_JOB_TIMEOUT", 120))
+
+    # Compiled Jinja templates, kept across restarts; empty disables the cache
+    TEMPLATE_CACHE_DIR = os.environ.get("TEMPLATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "nba2k-tracker-templates"))
@@ -0,0 +1,84 @@
+"""
+This is the database-backed credential store for the Gmail service.
+"""
+
+import zlib
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, text
+
+from app import db
+from app.models import OAuthCredential
+from utils.gmail_service import set_credential_store
+
+GMAIL_CREDENTIAL_NAME = "gmail"
+
+
+class DatabaseCredentialStore:
+    """
+    Keeps the authorized-user JSON in an OAuthCredential row so every node sees the same token.
+    Refreshes run in their own transaction under a row lock (plus an advisory lock on
+    Postgres, which also covers the very first insert), so only one worker refreshes at a time.
+    """
+
+    def __init__(self, name=GMAIL_CREDENTIAL_NAME):
+        self.name = name
+        self.table = OAuthCredential.__table__
+
+    def load(self):
+        with db.engine.connect() as connection:
+            return connection.execute(
+                select(self.table.c.token_json).where(self.table.c.name == self.name)
+            ).scalar()
+
+    def locked_update(self, update):
+        """
+        Run update(current_json) under the lock and store its result if it returns one.
+        Returns the JSON that is stored afterwards.
+        """
+        with db.engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(
+                    text("SELECT pg_advisory_xact_lock(:key)"),
+                    {"key": zlib.crc32(f"oauth:{self.name}".encode())},
+                )
+            current = connection.execute(
+                select(self.table.c.token_json)
+                .where(self.table.c.name == self.name)
+                .with_for_update()
+            ).scalar()
+            new = update(current)
+            if new is None:
+                return current
+            if current is None:
+                connection.execute(
+                    self.table.insert().values(name=self.name, token_json=new, updated_at=datetime.utcnow())
+                )
+            else:
+                connection.execute(
+                    self.table.update()
+                    .where(self.table.c.name == self.name)
+                    .values(token_json=new, updated_at=datetime.utcnow())
+                )
+            return new
+
+
+def init_credential_store(app):
+    """
+    Point the Gmail service at the store chosen by GMAIL_CREDENTIAL_STORE.
+    """
+    if app.config["GMAIL_CREDENTIAL_STORE"] == "database":
+        set_credential_store(DatabaseCredentialStore())
+
+
+@click.command("gmail-store-token")
+@with_appcontext
+@click.argument("path", default="token.json")
+def gmail_store_token(path):
+    """Copy a token.json into the shared database credential store."""
+    with open(path) as token_file:
+        token_json = token_file.read()
+    DatabaseCredentialStore().locked_update(lambda current: token_json)
+    click.echo(f"Stored {path} as the '{GMAIL_CREDENTIAL_NAME}' credential.")
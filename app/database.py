@@ -0,0 +1,160 @@
+"""
+This is the database engine setup: pool profiles per process type and read-replica routing.
+
+Every process picks an engine profile with DB_ENGINE_PROFILE:
+- "web" for gunicorn: a small pool that fails fast and short statement timeouts.
+- "worker" for the outbox worker: few connections and longer statements.
+- "batch" for one-off CLI jobs: a single connection and no statement timeout.
+
+When DATABASE_REPLICA_URL is set, the reads of read-only views go to that
+database instead of the primary. A second Postgres or a copy of the SQLite file
+works as a stand-in. Flushes and INSERT/UPDATE/DELETE statements always go to the
+primary, and a browser that has just written keeps reading from the primary
+for REPLICA_STICKY_SECONDS so users see their own changes despite replica lag.
+"""
+
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import flask
+from flask import current_app, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = "replica"
+
+ENGINE_PROFILES = {
+    "web": {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 5,
+        "pool_recycle": 1800,
+        "statement_timeout_ms": 5000,
+    },
+    "worker": {
+        "pool_size": 2,
+        "max_overflow": 2,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "statement_timeout_ms": 30000,
+    },
+    "batch": {
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": 60,
+        "pool_recycle": 3600,
+        "statement_timeout_ms": None,
+    },
+}
+
+_USE_REPLICA = "use_replica"
+_WROTE = "wrote"
+_PRIMARY_UNTIL = "db_primary_until"
+
+
+def engine_options(url, profile_name, read_only=False):
+    """
+    create_engine() arguments for a database URL under the named profile.
+    Statement timeouts are set per connection on Postgres and MySQL; replica
+    connections on Postgres are also made read-only.
+    """
+    if profile_name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_ENGINE_PROFILE {profile_name!r}; use one of: {', '.join(ENGINE_PROFILES)}.")
+    profile = ENGINE_PROFILES[profile_name]
+    url = make_url(url)
+    backend = url.get_backend_name()
+
+    options = {"pool_pre_ping": True, "pool_recycle": profile["pool_recycle"]}
+    # In-memory SQLite runs on a single static connection, which takes no pool sizing.
+    if not (backend == "sqlite" and url.database in (None, "", ":memory:")):
+        options.update(
+            pool_size=profile["pool_size"],
+            max_overflow=profile["max_overflow"],
+            pool_timeout=profile["pool_timeout"],
+        )
+
+    timeout = profile["statement_timeout_ms"]
+    if backend == "postgresql":
+        settings = []
+        if timeout:
+            settings.append(f"-c statement_timeout={timeout}")
+        if read_only:
+            settings.append("-c default_transaction_read_only=on")
+        if settings:
+            options["connect_args"] = {"options": " ".join(settings)}
+    elif backend == "mysql" and timeout:
+        options["connect_args"] = {"init_command": f"SET SESSION max_execution_time={timeout}"}
+    return options
+
+
+def configure_engines(config):
+    """
+    Fill in SQLALCHEMY_ENGINE_OPTIONS and the replica bind from the profile, before the extension is created.
+    """
+    profile = config["DB_ENGINE_PROFILE"]
+    config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(config["SQLALCHEMY_DATABASE_URI"], profile)
+    replica_url = config.get("DATABASE_REPLICA_URL")
+    if replica_url:
+        config.setdefault("SQLALCHEMY_BINDS", {})[REPLICA_BIND] = {
+            "url": replica_url,
+            **engine_options(replica_url, profile, read_only=True),
+        }
+
+
+class RoutingSession(Session):
+    """
+    db.session, sending the reads of read-only views to the replica when one is configured.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(_USE_REPLICA) and not self._flushing and not isinstance(clause, UpdateBase):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Run the queries inside the block on the replica, unless this browser wrote recently.
+    """
+    db_session = current_app.extensions["sqlalchemy"].session()
+    use_replica = not (has_request_context() and flask.session.get(_PRIMARY_UNTIL, 0) > time.time())
+    previous = db_session.info.get(_USE_REPLICA, False)
+    db_session.info[_USE_REPLICA] = use_replica
+    try:
+        yield
+    finally:
+        db_session.info[_USE_REPLICA] = previous
+
+
+def read_only_view(view):
+    """
+    Decorator for views that only read: all of their queries go through replica_reads.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def remember_write(session, flush_context):
+    session.info[_WROTE] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def stick_to_primary(session):
+    # Keep this browser on the primary until the replica has caught up with the write.
+    if session.info.pop(_WROTE, False) and has_request_context() and REPLICA_BIND in session._db.engines:
+        flask.session[_PRIMARY_UNTIL] = time.time() + current_app.config["REPLICA_STICKY_SECONDS"]
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def forget_write(session):
+    session.info.pop(_WROTE, None)
@@ -1,4 +1,7 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
+
+from app import db
+from utils.rating_registry import RatingValidationError
 
 errors = Blueprint("errors", __name__)
 
@@ -14,3 +17,16 @@ def error_403(error):
 @errors.app_errorhandler(500)
 def error_500(error):
     return render_template("errors/500.html"), 500
+
+@errors.app_errorhandler(RatingValidationError)
+def invalid_ratings(error):
+    """
+    A changed rating failed validation on flush: undo the request's changes and say which values are wrong.
+    """
+    db.session.rollback()
+    messages = [item["message"] for item in error.errors]
+    if request.is_json:
+        return jsonify({"success": False, "error": " ".join(messages), "errors": error.errors}), 400
+    for message in messages:
+        flash(message, "danger")
+    return redirect(request.referrer or url_for("main.dashboard"))
@@ -0,0 +1,263 @@
+"""
+This is the upgrade ledger: an append-only history of every point spend, with undo.
+
+Upgrades still change the player's columns in place, but each one is also
+appended to UpgradeLedger with the values before and after it and the points
+it took. Ledger entries are never updated or deleted. An undo is a new entry
+that applies the reverse change and gives the points back.
+
+Undo works on a stack kept as a linked list in the entries themselves. An
+upgrade remembers the upgrade below it, and every entry records which upgrade
+is on top afterwards. Undoing one step reads the newest entry and the upgrade
+it names: two index lookups, however long the history is.
+
+Every CHECKPOINT_INTERVAL entries, a PlayerCheckpoint stores the packed rating
+vectors (see app.packing) and the running point totals. There is also one for
+the state before the first entry. A player as of any moment is rebuilt from
+the checkpoint before it plus at most CHECKPOINT_INTERVAL - 1 entries.
+"""
+
+import json
+from datetime import datetime
+
+from sqlalchemy import func
+
+from app import db
+from app.models import PlayerCheckpoint, ProgressionRollup, UpgradeLedger
+from app.packing import PackedRatings, pack_rating_matrices
+from app.upgrades import UpgradeError
+from utils.rating_registry import RATING_NAMES, rating_label, rating_matrices
+
+CHECKPOINT_INTERVAL = 32
+MAX_UNDO_STEPS = 50
+
+
+def latest_entry(player_id):
+    """
+    The player's newest ledger entry, or None before the first upgrade.
+    """
+    return (
+        UpgradeLedger.query
+        .filter_by(player_id=player_id)
+        .order_by(UpgradeLedger.seq.desc())
+        .first()
+    )
+
+
+def _checkpoint(player_id, seq, values, devpoints_spent, badgepoints_spent):
+    attributes, badges, _ = rating_matrices([values])
+    (attributes_packed,), (badges_packed,) = pack_rating_matrices(attributes, badges)
+    checkpoint = PlayerCheckpoint(
+        player_id=player_id,
+        seq=seq,
+        attributes_packed=attributes_packed,
+        badges_packed=badges_packed,
+        devpoints_spent=devpoints_spent,
+        badgepoints_spent=badgepoints_spent,
+    )
+    db.session.add(checkpoint)
+    return checkpoint
+
+
+def _checkpoint_at_or_before(player_id, seq):
+    return (
+        PlayerCheckpoint.query
+        .filter(PlayerCheckpoint.player_id == player_id, PlayerCheckpoint.seq <= seq)
+        .order_by(PlayerCheckpoint.seq.desc())
+        .first()
+    )
+
+
+def _append(player, latest, kind, changes, devpoints_spent, badgepoints_spent, **links):
+    """
+    Add the next entry after `latest`, and a checkpoint when one is due, and roll it
+    into the player's progression. The player's columns must already hold the values after the entry.
+    """
+    seq = (latest.seq if latest is not None else 0) + 1
+    now = datetime.utcnow()
+    if latest is None:
+        # The state before the first entry, so earlier moments can be rebuilt too.
+        before = dict(player.rating_values(), **{name: old for name, _, old, _ in changes})
+        _checkpoint(player.id, 0, before, 0, 0)
+
+    entry = UpgradeLedger(
+        player_id=player.id,
+        seq=seq,
+        kind=kind,
+        changes=json.dumps([list(change) for change in changes]),
+        devpoints_spent=devpoints_spent,
+        badgepoints_spent=badgepoints_spent,
+        created_at=now,
+        **links
+    )
+    db.session.add(entry)
+    ProgressionRollup.record(
+        player,
+        now,
+        ratings_changed=True,
+        devpoints_spent=devpoints_spent,
+        badgepoints_spent=badgepoints_spent,
+    )
+
+    if seq % CHECKPOINT_INTERVAL == 0:
+        db.session.flush()
+        previous = _checkpoint_at_or_before(player.id, seq - 1)
+        devpoints, badgepoints = db.session.query(
+            func.coalesce(func.sum(UpgradeLedger.devpoints_spent), 0),
+            func.coalesce(func.sum(UpgradeLedger.badgepoints_spent), 0),
+        ).filter(
+            UpgradeLedger.player_id == player.id,
+            UpgradeLedger.seq > previous.seq,
+            UpgradeLedger.seq <= seq,
+        ).one()
+        _checkpoint(
+            player.id,
+            seq,
+            player.rating_values(),
+            previous.devpoints_spent + devpoints,
+            previous.badgepoints_spent + badgepoints,
+        )
+    return entry
+
+
+def record_upgrade(player, changes, devpoints_spent=0, badgepoints_spent=0):
+    """
+    Append an upgrade that has just been applied to the player.
+    `changes` is a list of (name, kind, before, after), as for record_milestones.
+    The caller must have loaded the player with_for_update, before reading its points,
+    and is responsible for committing the session.
+    """
+    latest = latest_entry(player.id)
+    seq = (latest.seq if latest is not None else 0) + 1
+    return _append(
+        player,
+        latest,
+        "upgrade",
+        changes,
+        devpoints_spent,
+        badgepoints_spent,
+        parent_seq=latest.top_seq if latest is not None else None,
+        top_seq=seq,
+    )
+
+
+def undo_upgrades(player, steps=1):
+    """
+    Revert the player's last `steps` upgrades that are not undone yet, newest first,
+    giving their points back. Returns the undone entries.
+    Raises UpgradeError when there is nothing to undo or a rating has changed since.
+    The caller must have loaded the player with_for_update and is responsible for committing the session.
+    """
+    undone = []
+    latest = latest_entry(player.id)
+    for _ in range(steps):
+        top_seq = latest.top_seq if latest is not None else None
+        if top_seq is None:
+            break
+        upgrade = UpgradeLedger.query.filter_by(player_id=player.id, seq=top_seq).one()
+        changes = json.loads(upgrade.changes)
+        for name, _, _, after in changes:
+            current = getattr(player, name)
+            if current != after:
+                raise UpgradeError(
+                    f"{rating_label(name)} is {current} now instead of {after}, so the upgrade cannot be undone."
+                )
+
+        for name, _, before, _ in changes:
+            setattr(player, name, before)
+        player.devpoints = (player.devpoints or 0) + upgrade.devpoints_spent
+        player.badgepoints = (player.badgepoints or 0) + upgrade.badgepoints_spent
+        latest = _append(
+            player,
+            latest,
+            "undo",
+            [(name, kind, after, before) for name, kind, before, after in changes],
+            -upgrade.devpoints_spent,
+            -upgrade.badgepoints_spent,
+            undoes_seq=upgrade.seq,
+            top_seq=upgrade.parent_seq,
+        )
+        undone.append(upgrade)
+
+    if not undone:
+        raise UpgradeError("There is nothing to undo.")
+    return undone
+
+
+def ratings_as_of(player, moment):
+    """
+    The player's ratings and the points spent on them as of a past moment, rebuilt
+    from the nearest checkpoint. Before the first entry this is the state the ledger
+    started from; without any entries it is the current ratings.
+    """
+    entry = (
+        UpgradeLedger.query
+        .filter(UpgradeLedger.player_id == player.id, UpgradeLedger.created_at <= moment)
+        .order_by(UpgradeLedger.seq.desc())
+        .first()
+    )
+    seq = entry.seq if entry is not None else 0
+    checkpoint = _checkpoint_at_or_before(player.id, seq)
+    if checkpoint is None:
+        return {
+            "seq": 0,
+            "ratings": player.rating_values(),
+            "devpoints_spent": 0,
+            "badgepoints_spent": 0,
+            "replayed": 0,
+        }
+
+    packed = PackedRatings.from_blobs(checkpoint.attributes_packed, checkpoint.badges_packed)
+    ratings = {name: getattr(packed, name) for name in RATING_NAMES}
+    devpoints_spent = checkpoint.devpoints_spent
+    badgepoints_spent = checkpoint.badgepoints_spent
+    tail = (
+        UpgradeLedger.query
+        .filter(
+            UpgradeLedger.player_id == player.id,
+            UpgradeLedger.seq > checkpoint.seq,
+            UpgradeLedger.seq <= seq,
+        )
+        .order_by(UpgradeLedger.seq)
+        .all()
+    )
+    for later in tail:
+        for name, _, _, after in json.loads(later.changes):
+            ratings[name] = after
+        devpoints_spent += later.devpoints_spent
+        badgepoints_spent += later.badgepoints_spent
+    return {
+        "seq": seq,
+        "ratings": ratings,
+        "devpoints_spent": devpoints_spent,
+        "badgepoints_spent": badgepoints_spent,
+        "replayed": len(tail),
+    }
+
+
+def recent_entries(player_id, limit=50):
+    """
+    The player's newest ledger entries, newest first, ready for JSON.
+    """
+    entries = (
+        UpgradeLedger.query
+        .filter_by(player_id=player_id)
+        .order_by(UpgradeLedger.seq.desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        {
+            "seq": entry.seq,
+            "kind": entry.kind,
+            "created_at": entry.created_at.isoformat(),
+            "changes": [
+                {"name": name, "label": rating_label(name), "kind": kind, "from": before, "to": after}
+                for name, kind, before, after in json.loads(entry.changes)
+            ],
+            "devpoints_spent": entry.devpoints_spent,
+            "badgepoints_spent": entry.badgepoints_spent,
+            "undoes": entry.undoes_seq,
+        }
+        for entry in entries
+    ]
@@ -0,0 +1,141 @@
+"""
+This is the logic for target milestones and the digest emails that announce them.
+"""
+
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import update
+
+from app import db
+from app.models import MilestoneEvent, User
+from app.outbox import queue_email
+from utils.rating_registry import BADGE_LEVELS, rating_label
+
+
+def reached_target(kind, before, after, target):
+    """
+    True when an upgrade from before to after crosses the target value.
+    """
+    if target is None:
+        return False
+    if kind == "badge":
+        if target not in BADGE_LEVELS or target == "None":
+            return False
+        before, after, target = (BADGE_LEVELS.index(level) for level in (before, after, target))
+    return before < target <= after
+
+
+def record_milestones(player, changes, targets=None):
+    """
+    Record a milestone for every change that reached the player's target.
+    `changes` is a list of (name, kind, before, after); only the already loaded targets row is read.
+    The caller is responsible for committing the session.
+    """
+    targets = targets if targets is not None else player.targets
+    if targets is None:
+        return []
+
+    events = []
+    for name, kind, before, after in changes:
+        target = getattr(targets, name, None)
+        if reached_target(kind, before, after, target):
+            event = MilestoneEvent(
+                user_id=player.user_id,
+                player_id=player.id,
+                name=name,
+                kind=kind,
+                value=str(after),
+            )
+            db.session.add(event)
+            events.append(event)
+    return events
+
+
+def format_digest(username, events):
+    """
+    One email body for all of a user's pending milestones, grouped per player.
+    """
+    by_player = defaultdict(list)
+    for event in events:
+        by_player[event.player.name].append(event)
+
+    lines = [f"Hi {username},", "", f"Your players reached {len(events)} target(s):", ""]
+    for player_name in sorted(by_player):
+        lines.append(f"{player_name}:")
+        for event in sorted(by_player[player_name], key=lambda event: event.created_at):
+            lines.append(f"  - {rating_label(event.name)} reached {event.value}")
+        lines.append("")
+    lines.append("Keep it up!")
+    return "\n".join(lines)
+
+
+def send_digests(batch_size=100):
+    """
+    Queue one digest email per user with pending milestones and mark those milestones as sent.
+    Users are handled batch_size at a time, each with all of their milestones from before the
+    run started, so nobody gets more than one digest per run. Milestones are claimed with a
+    conditional UPDATE in the same transaction as the emails, so two runs at once never
+    announce the same one. Returns the number of digests queued.
+    """
+    started = datetime.utcnow()
+    pending = (MilestoneEvent.digested_at.is_(None), MilestoneEvent.created_at <= started)
+    queued = 0
+    last_user_id = 0
+    while True:
+        user_ids = [
+            user_id for (user_id,) in
+            db.session.query(MilestoneEvent.user_id)
+            .filter(*pending, MilestoneEvent.user_id > last_user_id)
+            .distinct()
+            .order_by(MilestoneEvent.user_id)
+            .limit(batch_size)
+        ]
+        if not user_ids:
+            return queued
+        last_user_id = user_ids[-1]
+
+        claim = uuid.uuid4().hex
+        now = datetime.utcnow()
+        db.session.execute(
+            update(MilestoneEvent)
+            .where(MilestoneEvent.user_id.in_(user_ids), *pending)
+            .values(digested_at=now, digest_claim=claim)
+            .execution_options(synchronize_session=False)
+        )
+        events = (
+            MilestoneEvent.query
+            .filter(
+                MilestoneEvent.digested_at == now,
+                MilestoneEvent.user_id.in_(user_ids),
+                MilestoneEvent.digest_claim == claim,
+            )
+            .order_by(MilestoneEvent.user_id, MilestoneEvent.id)
+            .all()
+        )
+
+        by_user = defaultdict(list)
+        for event in events:
+            by_user[event.user_id].append(event)
+
+        users = {user.id: user for user in User.query.filter(User.id.in_(by_user)).all()}
+        for user_id, user_events in by_user.items():
+            user = users.get(user_id)
+            if user is not None:
+                queue_email(
+                    user.email,
+                    f"{len(user_events)} player target(s) reached",
+                    format_digest(user.username, user_events),
+                )
+                queued += 1
+        db.session.commit()
+
+
+@click.command("send-milestone-digests")
+@with_appcontext
+def send_milestone_digests():
+    """Queue digest emails for all pending milestones."""
+    click.echo(f"Queued {send_digests()} digest emails.")
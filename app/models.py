@@ -2,10 +2,31 @@
 We will define the User and Player models here.
 """
 
+from datetime import datetime, timedelta
+from functools import partial
+
 from flask_login import UserMixin
-from sqlalchemy.orm import validates
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, declared_attr, deferred, undefer_group
 
 from app import db
+from app.overall import compute_overalls
+from app.packing import (
+    PACKED_ATTRIBUTES,
+    PACKED_BADGES,
+    PackedRatings,
+    pack_rating_matrices,
+    unpack_attributes,
+    unpack_badges,
+)
+from utils.rating_registry import (
+    ATTRIBUTE_NAMES,
+    BADGE_NAMES,
+    RATING_DEFAULTS,
+    RATING_NAMES,
+    RatingValidationError,
+    rating_matrices,
+)
 
 
 class User(db.Model, UserMixin):
@@ -17,6 +38,8 @@ class User(db.Model, UserMixin):
     email = db.Column(db.String(150), unique=True, nullable=False)
     password = db.Column(db.String(150), nullable=True)
     is_active = db.Column(db.Boolean, default=False)
+    # Bumped whenever the point settings are saved; compiled scoring rules are cached per version.
+    settings_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     players = db.relationship("Player", back_populates="user", cascade="all, delete-orphan")
     settings = db.relationship(
         "UserSettings", 
@@ -26,111 +49,222 @@ class User(db.Model, UserMixin):
         )
 
 
-class Player(db.Model):
+class RatingColumnsMixin:
+    """
+    One column per attribute (25 to 99) and per badge ("None" by default), generated from the rating registry.
+    Values are validated as whole vectors when the session flushes.
+
+    Classes that set defer_ratings get the attribute and badge columns as the
+    deferred "attributes" and "badges" groups, loaded on first access or with
+    the RATINGS_LOADED options.
+    """
+    defer_ratings = False
+
+    def rating_values(self):
+        """
+        Every attribute and badge value, read once per row. Rows that are not inserted yet
+        get the column defaults now, since otherwise only the INSERT would fill them in.
+        """
+        loaded = self.__dict__
+        values = {name: loaded[name] if name in loaded else getattr(self, name) for name in RATING_NAMES}
+        if self.id is None:
+            for name, default in RATING_DEFAULTS.items():
+                if values[name] is None:
+                    setattr(self, name, default)
+                    values[name] = default
+        return values
+
+
+def _rating_column(name, group, make_column):
+    """
+    A mixin column that is part of a deferred group on classes with defer_ratings.
+    """
+    def column(cls):
+        return deferred(make_column(), group=group) if cls.defer_ratings else make_column()
+    column.__name__ = name
+    return declared_attr(column)
+
+
+for _name in ATTRIBUTE_NAMES:
+    setattr(RatingColumnsMixin, _name, _rating_column(
+        _name, "attributes", partial(db.Column, db.Integer, default=RATING_DEFAULTS[_name])
+    ))
+for _name in BADGE_NAMES:
+    setattr(RatingColumnsMixin, _name, _rating_column(
+        _name, "badges", partial(db.Column, db.String(20), default=RATING_DEFAULTS[_name])
+    ))
+
+
+class PackedRatingsMixin(RatingColumnsMixin):
+    """
+    Packed copies of the attribute and badge columns (see app.packing), refreshed on every flush.
+    On classes with defer_ratings they are a deferred group of their own, "packed", so loading
+    the individual columns (RATINGS_LOADED) does not load them too and packed_roster reads them alone.
+    """
+    attributes_packed = _rating_column(
+        "attributes_packed", "packed", partial(db.Column, db.LargeBinary(len(PACKED_ATTRIBUTES)), nullable=True)
+    )
+    badges_packed = _rating_column(
+        "badges_packed", "packed", partial(db.Column, db.LargeBinary(len(PACKED_BADGES)), nullable=True)
+    )
+
+    def packed_values(self):
+        """
+        The packed columns for the current individual ones, without storing them.
+        """
+        attributes, badges, _ = rating_matrices([self.rating_values()])
+        (attributes_packed,), (badges_packed,) = pack_rating_matrices(attributes, badges)
+        return attributes_packed, badges_packed
+
+    def pack_ratings(self):
+        """
+        Refresh the packed columns from the individual ones.
+        """
+        self.attributes_packed, self.badges_packed = self.packed_values()
+
+    @property
+    def packed(self):
+        """
+        The ratings decoded from the packed columns.
+        """
+        attributes_packed, badges_packed = self.attributes_packed, self.badges_packed
+        if attributes_packed is None or badges_packed is None:
+            attributes_packed, badges_packed = self.packed_values()
+        return PackedRatings.from_blobs(attributes_packed, badges_packed, id=self.id)
+
+
+class Player(PackedRatingsMixin, db.Model):
     """
     This is the player model that we will use.
+    Only the core columns load by default; see RATINGS_LOADED and roster_summary.
     """
+    defer_ratings = True
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE", name="fk_user_player"), nullable=False)
 
     user = db.relationship("User", back_populates="players")
     targets = db.relationship("PlayerTargets", back_populates="player", uselist=False, cascade="all, delete-orphan")
+    stats = db.relationship("PlayerStats", back_populates="player", uselist=False, cascade="all, delete-orphan")
+    game_logs = db.relationship(
+        "GameLog",
+        back_populates="player",
+        cascade="all, delete-orphan",
+        lazy="dynamic",
+        order_by="GameLog.played_at.desc()",
+        )
+    ledger = db.relationship("UpgradeLedger", cascade="all, delete-orphan", lazy="dynamic")
+    checkpoints = db.relationship("PlayerCheckpoint", cascade="all, delete-orphan", lazy="dynamic")
+    rollups = db.relationship("ProgressionRollup", cascade="all, delete-orphan", lazy="dynamic")
 
     # Development and badge points
     devpoints = db.Column(db.Integer, default=0)
     badgepoints = db.Column(db.Integer, default=0)
     money = db.Column(db.Integer, default=0)
 
-    
-    # Attributes (25 to 99)
-    agility = db.Column(db.Integer, default=25)
-    ball_handle = db.Column(db.Integer, default=25)
-    block = db.Column(db.Integer, default=25)
-    close_shot = db.Column(db.Integer, default=25)
-    defensive_consistency = db.Column(db.Integer, default=25)
-    defensive_rebound = db.Column(db.Integer, default=25)
-    draw_foul = db.Column(db.Integer, default=25)
-    driving_dunk = db.Column(db.Integer, default=25)
-    free_throw = db.Column(db.Integer, default=25)
-    hands = db.Column(db.Integer, default=25)
-    help_defense_iq = db.Column(db.Integer, default=25)
-    hustle = db.Column(db.Integer, default=25)
-    intangibles = db.Column(db.Integer, default=25)
-    interior_defense = db.Column(db.Integer, default=25)
-    layup = db.Column(db.Integer, default=25)
-    mid_range_shot = db.Column(db.Integer, default=25)
-    offensive_consistency = db.Column(db.Integer, default=25)
-    offensive_rebound = db.Column(db.Integer, default=25)
-    overall_durability = db.Column(db.Integer, default=25)
-    pass_accuracy = db.Column(db.Integer, default=25)
-    pass_iq = db.Column(db.Integer, default=25)
-    pass_perception = db.Column(db.Integer, default=25)
-    pass_vision = db.Column(db.Integer, default=25)
-    perimeter_defense = db.Column(db.Integer, default=25)
-    post_control = db.Column(db.Integer, default=25)
-    post_fade = db.Column(db.Integer, default=25)
-    post_hook = db.Column(db.Integer, default=25)
-    shot_iq = db.Column(db.Integer, default=25)
-    standing_dunk = db.Column(db.Integer, default=25)
-    speed = db.Column(db.Integer, default=25)
-    speed_with_ball = db.Column(db.Integer, default=25)
-    stamina = db.Column(db.Integer, default=25)
-    steal = db.Column(db.Integer, default=25)
-    strength = db.Column(db.Integer, default=25)
-    three_point_shot = db.Column(db.Integer, default=25)
-    vertical = db.Column(db.Integer, default=25)
-
-    # Badges (None by default)
-    aerial_wizard = db.Column(db.String(20), default="None")
-    ankle_assassin = db.Column(db.String(20), default="None")
-    bail_out = db.Column(db.String(20), default="None")
-    boxout_beast = db.Column(db.String(20), default="None")
-    break_starter = db.Column(db.String(20), default="None")
-    brick_wall = db.Column(db.String(20), default="None")
-    challenger = db.Column(db.String(20), default="None")
-    deadeye = db.Column(db.String(20), default="None")
-    dimer = db.Column(db.String(20), default="None")
-    float_game = db.Column(db.String(20), default="None")
-    glove = db.Column(db.String(20), default="None")
-    handles_for_days = db.Column(db.String(20), default="None")
-    high_flying_denier = db.Column(db.String(20), default="None")
-    hook_specialist = db.Column(db.String(20), default="None")
-    immovable_enforcer = db.Column(db.String(20), default="None")
-    interceptor = db.Column(db.String(20), default="None")
-    layup_mixmaster = db.Column(db.String(20), default="None")
-    lightning_launch = db.Column(db.String(20), default="None")
-    limitless_range = db.Column(db.String(20), default="None")
-    mini_marksman = db.Column(db.String(20), default="None")
-    off_ball_pest = db.Column(db.String(20), default="None")
-    on_ball_menace = db.Column(db.String(20), default="None")
-    paint_patroller = db.Column(db.String(20), default="None")
-    paint_prodigy = db.Column(db.String(20), default="None")
-    pick_dodger = db.Column(db.String(20), default="None")
-    pogo_stick = db.Column(db.String(20), default="None")
-    posterizer = db.Column(db.String(20), default="None")
-    post_fade_phenom = db.Column(db.String(20), default="None")
-    post_lockdown = db.Column(db.String(20), default="None")
-    post_powerhouse = db.Column(db.String(20), default="None")
-    post_up_poet = db.Column(db.String(20), default="None")
-    physical_finisher = db.Column(db.String(20), default="None")
-    rebound_chaser = db.Column(db.String(20), default="None")
-    rise_up = db.Column(db.String(20), default="None")
-    set_shot_specialist = db.Column(db.String(20), default="None")
-    shifty_shooter = db.Column(db.String(20), default="None")
-    slippery_off_ball = db.Column(db.String(20), default="None")
-    strong_handle = db.Column(db.String(20), default="None")
-    unpluckable = db.Column(db.String(20), default="None")
-    versatile_visionary = db.Column(db.String(20), default="None")
-
-    @validates("agility", "ball_handle", "block", "defensive_consistency", "defensive_rebound", "draw_foul", "driving_dunk", "free_throw", "hands", "help_defense_iq", "hustle", "intangibles", "interior_defense", "layup", "mid_range_shot", "offensive_consistency", "offensive_rebound", "overall_durability", "pass_accuracy", "pass_iq", "pass_perception", "pass_vision", "perimeter_defense", "post_control", "post_fade", "post_hook", "shot_iq", "standing_dunk", "speed", "speed_with_ball", "stamina", "steal", "strength", "three_point_shot", "vertical")
-    def validate_attributes(self, key, value):
+    # One of app.overall.POSITIONS, or None for the average weights.
+    position = db.Column(db.String(2), nullable=True)
+    # Cached overall rating, refreshed on flush when the attributes or position change.
+    ovr = db.Column(db.SmallInteger, nullable=True)
+
+    # The attribute and badge columns come from RatingColumnsMixin.
+
+    @classmethod
+    def roster_summary(cls, user_id):
+        """
+        A user's players for lists and dropdowns, ordered by name: rows of id, name,
+        position, ovr, devpoints and badgepoints, without any rating columns.
+        """
+        return (
+            db.session.query(cls.id, cls.name, cls.position, cls.ovr, cls.devpoints, cls.badgepoints)
+            .filter(cls.user_id == user_id)
+            .order_by(cls.name, cls.id)
+            .all()
+        )
+
+    @classmethod
+    def packed_roster(cls, user_id, player_id=None):
+        """
+        A user's players with their targets, read from the packed columns only and ordered by name,
+        or just the one with `player_id`. Returns (player, targets) pairs of PackedRatings that
+        also carry id, name, ovr and the points; targets is None when none were set.
+        """
+        query = (
+            db.session.query(
+                cls.id, cls.name, cls.ovr, cls.devpoints, cls.badgepoints,
+                cls.attributes_packed, cls.badges_packed,
+                PlayerTargets.id, PlayerTargets.attributes_packed, PlayerTargets.badges_packed,
+            )
+            .outerjoin(PlayerTargets, PlayerTargets.player_id == cls.id)
+            .filter(cls.user_id == user_id)
+        )
+        if player_id is not None:
+            query = query.filter(cls.id == player_id)
+        rows = query.order_by(cls.name).all()
+
+        # Rows written before the packed columns existed are packed on the way through.
+        rows = [
+            row if row[5] is not None and (row[7] is None or row[8] is not None) else cls._repacked_row(row[0])
+            for row in rows
+        ]
+        if not rows:
+            return []
+
+        attributes = unpack_attributes([row[5] for row in rows])
+        badges = unpack_badges([row[6] for row in rows])
+        roster = []
+        for index, row in enumerate(rows):
+            player = PackedRatings(
+                attributes[index], badges[index],
+                id=row[0], name=row[1], ovr=row[2], devpoints=row[3], badgepoints=row[4],
+            )
+            targets = PackedRatings.from_blobs(row[8], row[9]) if row[7] is not None else None
+            roster.append((player, targets))
+        return roster
+
+    @classmethod
+    def _repacked_row(cls, player_id):
+        """
+        A packed_roster row packed from the individual columns. Nothing is stored,
+        since rosters are read in read-only views.
+        """
+        player = cls.query.options(*RATINGS_LOADED).get(player_id)
+        targets = player.targets
+        return (
+            player.id, player.name, player.ovr, player.devpoints, player.badgepoints,
+            *player.packed_values(),
+            targets.id if targets else None,
+            *(targets.packed_values() if targets else (None, None)),
+        )
+
+    def record_game(self, devpoints_earned, badgepoints_earned, **stat_line):
         """
-        Validating attributes to see if values are between 25 and 99.
+        Store a game in the log and fold it into the running aggregates.
+        The aggregates are updated in Python, so the caller must have loaded the player
+        with_for_update, and is responsible for committing the session.
         """
-        if value < 25 or value > 99:
-            raise ValueError(f"{key} must be between 25 and 99.")
-        return value
+        game = GameLog(
+            player=self,
+            devpoints_earned=devpoints_earned,
+            badgepoints_earned=badgepoints_earned,
+            **stat_line
+        )
+        db.session.add(game)
+        if self.stats is None:
+            self.stats = PlayerStats.empty()
+        self.stats.add_game(game)
+        ProgressionRollup.record(
+            self,
+            game.played_at,
+            games=1,
+            devpoints_earned=devpoints_earned,
+            badgepoints_earned=badgepoints_earned,
+        )
+        return game
+
+# Query options that load a Player's attribute and badge groups with the row, for pages that show or change them.
+RATINGS_LOADED = (undefer_group("attributes"), undefer_group("badges"))
 
 class UserSettings(db.Model):
     """
@@ -188,90 +322,340 @@ class UserSettings(db.Model):
 
     user = db.relationship("User", back_populates="settings")
 
-class PlayerTargets(db.Model):
+class PlayerTargets(PackedRatingsMixin, db.Model):
     """
     This is a model for setting target values for players when it comes to attributes and badges.
     """
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey("player.id", ondelete="CASCADE"), nullable=False)
 
-    agility = db.Column(db.Integer, default=25)
-    ball_handle = db.Column(db.Integer, default=25)
-    block = db.Column(db.Integer, default=25)
-    close_shot = db.Column(db.Integer, default=25)
-    defensive_consistency = db.Column(db.Integer, default=25)
-    defensive_rebound = db.Column(db.Integer, default=25)
-    draw_foul = db.Column(db.Integer, default=25)
-    driving_dunk = db.Column(db.Integer, default=25)
-    free_throw = db.Column(db.Integer, default=25)
-    hands = db.Column(db.Integer, default=25)
-    help_defense_iq = db.Column(db.Integer, default=25)
-    hustle = db.Column(db.Integer, default=25)
-    intangibles = db.Column(db.Integer, default=25)
-    interior_defense = db.Column(db.Integer, default=25)
-    layup = db.Column(db.Integer, default=25)
-    mid_range_shot = db.Column(db.Integer, default=25)
-    offensive_consistency = db.Column(db.Integer, default=25)
-    offensive_rebound = db.Column(db.Integer, default=25)
-    overall_durability = db.Column(db.Integer, default=25)
-    pass_accuracy = db.Column(db.Integer, default=25)
-    pass_iq = db.Column(db.Integer, default=25)
-    pass_perception = db.Column(db.Integer, default=25)
-    pass_vision = db.Column(db.Integer, default=25)
-    perimeter_defense = db.Column(db.Integer, default=25)
-    post_control = db.Column(db.Integer, default=25)
-    post_fade = db.Column(db.Integer, default=25)
-    post_hook = db.Column(db.Integer, default=25)
-    shot_iq = db.Column(db.Integer, default=25)
-    standing_dunk = db.Column(db.Integer, default=25)
-    speed = db.Column(db.Integer, default=25)
-    speed_with_ball = db.Column(db.Integer, default=25)
-    stamina = db.Column(db.Integer, default=25)
-    steal = db.Column(db.Integer, default=25)
-    strength = db.Column(db.Integer, default=25)
-    three_point_shot = db.Column(db.Integer, default=25)
-    vertical = db.Column(db.Integer, default=25)
-
-    # Badges (None by default)
-    aerial_wizard = db.Column(db.String(20), default="None")
-    ankle_assassin = db.Column(db.String(20), default="None")
-    bail_out = db.Column(db.String(20), default="None")
-    boxout_beast = db.Column(db.String(20), default="None")
-    break_starter = db.Column(db.String(20), default="None")
-    brick_wall = db.Column(db.String(20), default="None")
-    challenger = db.Column(db.String(20), default="None")
-    deadeye = db.Column(db.String(20), default="None")
-    dimer = db.Column(db.String(20), default="None")
-    float_game = db.Column(db.String(20), default="None")
-    glove = db.Column(db.String(20), default="None")
-    handles_for_days = db.Column(db.String(20), default="None")
-    high_flying_denier = db.Column(db.String(20), default="None")
-    hook_specialist = db.Column(db.String(20), default="None")
-    immovable_enforcer = db.Column(db.String(20), default="None")
-    interceptor = db.Column(db.String(20), default="None")
-    layup_mixmaster = db.Column(db.String(20), default="None")
-    lightning_launch = db.Column(db.String(20), default="None")
-    limitless_range = db.Column(db.String(20), default="None")
-    mini_marksman = db.Column(db.String(20), default="None")
-    off_ball_pest = db.Column(db.String(20), default="None")
-    on_ball_menace = db.Column(db.String(20), default="None")
-    paint_patroller = db.Column(db.String(20), default="None")
-    paint_prodigy = db.Column(db.String(20), default="None")
-    pick_dodger = db.Column(db.String(20), default="None")
-    pogo_stick = db.Column(db.String(20), default="None")
-    posterizer = db.Column(db.String(20), default="None")
-    post_fade_phenom = db.Column(db.String(20), default="None")
-    post_lockdown = db.Column(db.String(20), default="None")
-    post_powerhouse = db.Column(db.String(20), default="None")
-    post_up_poet = db.Column(db.String(20), default="None")
-    physical_finisher = db.Column(db.String(20), default="None")
-    rebound_chaser = db.Column(db.String(20), default="None")
-    rise_up = db.Column(db.String(20), default="None")
-    set_shot_specialist = db.Column(db.String(20), default="None")
-    shifty_shooter = db.Column(db.String(20), default="None")
-    slippery_off_ball = db.Column(db.String(20), default="None")
-    strong_handle = db.Column(db.String(20), default="None")
-    unpluckable = db.Column(db.String(20), default="None")
-    versatile_visionary = db.Column(db.String(20), default="None")
-
     player = db.relationship("Player", back_populates="targets")
+
+class GameLog(db.Model):
+    """
+    Every submitted stat line, kept so that history can be computed later.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(
+        db.Integer,
+        db.ForeignKey("player.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        )
+    played_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    points = db.Column(db.Integer, default=0, nullable=False)
+    rebounds = db.Column(db.Integer, default=0, nullable=False)
+    assists = db.Column(db.Integer, default=0, nullable=False)
+    steals = db.Column(db.Integer, default=0, nullable=False)
+    blocks = db.Column(db.Integer, default=0, nullable=False)
+
+    player_of_the_game = db.Column(db.Boolean, default=False, nullable=False)
+    player_of_the_week = db.Column(db.Boolean, default=False, nullable=False)
+    player_of_the_month = db.Column(db.Boolean, default=False, nullable=False)
+    roty = db.Column(db.Boolean, default=False, nullable=False)
+    dpoy = db.Column(db.Boolean, default=False, nullable=False)
+    mvp = db.Column(db.Boolean, default=False, nullable=False)
+    champion = db.Column(db.Boolean, default=False, nullable=False)
+
+    manual_devpoints = db.Column(db.Integer, default=0, nullable=False)
+    money = db.Column(db.Integer, nullable=True)
+    devpoints_earned = db.Column(db.Integer, default=0, nullable=False)
+    badgepoints_earned = db.Column(db.Integer, default=0, nullable=False)
+
+    player = db.relationship("Player", back_populates="game_logs")
+
+class PlayerStats(db.Model):
+    """
+    Running per-player aggregates, updated in the same transaction as each GameLog insert.
+    """
+    STAT_NAMES = ("points", "rebounds", "assists", "steals", "blocks")
+
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(
+        db.Integer,
+        db.ForeignKey("player.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+        )
+
+    games_played = db.Column(db.Integer, default=0, nullable=False)
+
+    total_points = db.Column(db.Integer, default=0, nullable=False)
+    total_rebounds = db.Column(db.Integer, default=0, nullable=False)
+    total_assists = db.Column(db.Integer, default=0, nullable=False)
+    total_steals = db.Column(db.Integer, default=0, nullable=False)
+    total_blocks = db.Column(db.Integer, default=0, nullable=False)
+
+    high_points = db.Column(db.Integer, default=0, nullable=False)
+    high_rebounds = db.Column(db.Integer, default=0, nullable=False)
+    high_assists = db.Column(db.Integer, default=0, nullable=False)
+    high_steals = db.Column(db.Integer, default=0, nullable=False)
+    high_blocks = db.Column(db.Integer, default=0, nullable=False)
+
+    devpoints_earned = db.Column(db.Integer, default=0, nullable=False)
+    badgepoints_earned = db.Column(db.Integer, default=0, nullable=False)
+
+    player = db.relationship("Player", back_populates="stats")
+
+    @classmethod
+    def empty(cls):
+        """
+        A zeroed aggregate row; column defaults only apply on flush.
+        """
+        counters = {column.name: 0 for column in cls.__table__.columns if column.name not in ("id", "player_id")}
+        return cls(**counters)
+
+    def add_game(self, game):
+        """
+        Fold one GameLog into the totals and career highs.
+        """
+        self.games_played += 1
+        for stat in self.STAT_NAMES:
+            value = getattr(game, stat) or 0
+            setattr(self, f"total_{stat}", getattr(self, f"total_{stat}") + value)
+            if value > getattr(self, f"high_{stat}"):
+                setattr(self, f"high_{stat}", value)
+        self.devpoints_earned += game.devpoints_earned or 0
+        self.badgepoints_earned += game.badgepoints_earned or 0
+
+    def average(self, stat):
+        """
+        Per-game average for a stat, rounded to one decimal.
+        """
+        if not self.games_played:
+            return 0.0
+        return round(getattr(self, f"total_{stat}") / self.games_played, 1)
+
+class EmailOutbox(db.Model):
+    """
+    Emails waiting to be delivered by the outbox worker.
+    Rows are written in the request's own transaction, so an email is only sent if the request commits.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    sender = db.Column(db.String(150), nullable=False, default="me")
+    recipient = db.Column(db.String(150), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+
+    # pending -> sending (claimed by one worker) -> sent, back to pending for a retry, or failed once
+    # every attempt is used up
+    status = db.Column(db.String(20), nullable=False, default="pending", index=True)
+    claimed_by = db.Column(db.String(32), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+class OAuthCredential(db.Model):
+    """
+    Authorized-user credentials shared by every worker and node, e.g. the Gmail sending token.
+    """
+    __tablename__ = "oauth_credential"
+
+    name = db.Column(db.String(50), primary_key=True)
+    token_json = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class MilestoneEvent(db.Model):
+    """
+    An attribute or badge that reached its PlayerTargets value, waiting to go out in the owner's digest.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    player_id = db.Column(db.Integer, db.ForeignKey("player.id", ondelete="CASCADE"), nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # "attribute" or "badge"
+    value = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    digested_at = db.Column(db.DateTime, nullable=True)
+    # The digest run that claimed the event (see app.milestones.send_digests).
+    digest_claim = db.Column(db.String(32), nullable=True)
+
+    player = db.relationship("Player")
+
+    __table_args__ = (
+        db.Index("ix_milestone_event_pending", "digested_at", "user_id"),
+    )
+
+class UpgradeLedger(db.Model):
+    """
+    One upgrade or undo of a player's ratings. Entries are only ever appended (see app.ledger).
+    """
+    __tablename__ = "upgrade_ledger"
+
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey("player.id", ondelete="CASCADE"), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)  # 1, 2, 3, ... per player
+    kind = db.Column(db.String(10), nullable=False)  # "upgrade" or "undo"
+    changes = db.Column(db.Text, nullable=False)  # JSON list of [name, kind, before, after]
+    # Points taken by the entry; an undo gives them back as negative amounts.
+    devpoints_spent = db.Column(db.Integer, nullable=False, default=0)
+    badgepoints_spent = db.Column(db.Integer, nullable=False, default=0)
+    # The undo stack as a linked list: an upgrade points at the upgrade below it, an undo at
+    # the upgrade it reverted, and every entry knows which upgrade is on top after it.
+    parent_seq = db.Column(db.Integer, nullable=True)
+    undoes_seq = db.Column(db.Integer, nullable=True)
+    top_seq = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("player_id", "seq", name="uq_upgrade_ledger_player_seq"),
+    )
+
+class PlayerCheckpoint(db.Model):
+    """
+    A player's packed ratings and points spent so far, as of one ledger entry.
+    Taken every few entries so past states are rebuilt by replaying a short tail.
+    """
+    __tablename__ = "player_checkpoint"
+
+    player_id = db.Column(db.Integer, db.ForeignKey("player.id", ondelete="CASCADE"), primary_key=True)
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 0 is the state before the first entry
+    attributes_packed = db.Column(db.LargeBinary(len(PACKED_ATTRIBUTES)), nullable=False)
+    badges_packed = db.Column(db.LargeBinary(len(PACKED_BADGES)), nullable=False)
+    devpoints_spent = db.Column(db.Integer, nullable=False, default=0)
+    badgepoints_spent = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ProgressionRollup(db.Model):
+    """
+    A player's progression over one day or week, kept up to date as games and upgrades are saved.
+    Games and points earned or spent are summed over the period; the point balances and the
+    packed ratings are the state at its end. Ratings are only stored for periods with an
+    upgrade or undo, since nothing else changes them (see app.progression).
+    """
+    __tablename__ = "progression_rollup"
+
+    PERIODS = ("day", "week")
+    FLOWS = ("games", "devpoints_earned", "badgepoints_earned", "devpoints_spent", "badgepoints_spent")
+
+    player_id = db.Column(db.Integer, db.ForeignKey("player.id", ondelete="CASCADE"), primary_key=True)
+    period = db.Column(db.String(4), primary_key=True)  # "day" or "week"
+    period_start = db.Column(db.Date, primary_key=True)  # weeks start on Monday (UTC)
+
+    games = db.Column(db.Integer, nullable=False, default=0)
+    devpoints_earned = db.Column(db.Integer, nullable=False, default=0)
+    badgepoints_earned = db.Column(db.Integer, nullable=False, default=0)
+    # Net of undos, which give points back.
+    devpoints_spent = db.Column(db.Integer, nullable=False, default=0)
+    badgepoints_spent = db.Column(db.Integer, nullable=False, default=0)
+
+    devpoints = db.Column(db.Integer, nullable=True)
+    badgepoints = db.Column(db.Integer, nullable=True)
+    attributes_packed = db.Column(db.LargeBinary(len(PACKED_ATTRIBUTES)), nullable=True)
+    badges_packed = db.Column(db.LargeBinary(len(PACKED_BADGES)), nullable=True)
+
+    @staticmethod
+    def start_of(period, day):
+        """
+        The first day of the period that contains `day`.
+        """
+        return day - timedelta(days=day.weekday()) if period == "week" else day
+
+    @classmethod
+    def record(cls, player, moment=None, ratings_changed=False, **flows):
+        """
+        Add games or points to the player's day and week rollups and store the state after them.
+        The player's columns must already hold the values after the change; pass
+        ratings_changed when an upgrade or undo changed them. Rows touched earlier in the
+        transaction are kept in session.info, so importing a season costs two lookups, not two per game.
+        A new period's row is only looked up and created safely while the player's row is
+        locked (with_for_update), which the game and upgrade routes do when they load it.
+        The caller is responsible for committing the session.
+        """
+        day = (moment or datetime.utcnow()).date()
+        if ratings_changed:
+            player.pack_ratings()
+        touched = db.session.info.setdefault(_ROLLUPS_KEY, {})
+        for period in cls.PERIODS:
+            key = (player.id, period, cls.start_of(period, day))
+            rollup = touched.get(key) or db.session.get(cls, key)
+            if rollup is None:
+                rollup = cls(player_id=key[0], period=period, period_start=key[2], **dict.fromkeys(cls.FLOWS, 0))
+                db.session.add(rollup)
+            touched[key] = rollup
+            for name, amount in flows.items():
+                setattr(rollup, name, getattr(rollup, name) + (amount or 0))
+            rollup.devpoints = player.devpoints
+            rollup.badgepoints = player.badgepoints
+            if ratings_changed:
+                rollup.attributes_packed = player.attributes_packed
+                rollup.badges_packed = player.badges_packed
+
+class ScrapeJob(db.Model):
+    """
+    A 2Kratings lookup run in the background (see app.scrape_jobs), polled by the browser by id.
+    """
+    __tablename__ = "scrape_job"
+
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=True)
+    player_url_part = db.Column(db.String(200), nullable=False)
+
+    # queued -> running -> done or failed
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    result = db.Column(db.Text, nullable=True)  # the player data as JSON once done
+    error = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+
+# Rollup rows touched in the current transaction, by primary key.
+_ROLLUPS_KEY = "progression_rollups"
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def forget_rollups(session):
+    """
+    Rows are only reused within one transaction; after a rollback the new ones are gone.
+    """
+    session.info.pop(_ROLLUPS_KEY, None)
+
+
+# Changes to any other column (points, money, name) leave the packed columns and the overall alone.
+RATING_KEYS = frozenset(RATING_NAMES) | {"position"}
+
+
+@event.listens_for(Session, "before_flush")
+def check_and_pack_ratings(session, flush_context, instances):
+    """
+    Validate the changed ratings in one batch, then refresh the packed columns
+    and the overall of every player whose attributes or position changed.
+    Only new rows and the columns that changed are checked, so a value saved before
+    validation existed does not block later upgrades of other ratings.
+    """
+    changed = [obj for obj in session.new if isinstance(obj, PackedRatingsMixin)]
+    checked = [RATING_NAMES] * len(changed)
+    for obj in session.dirty:
+        if isinstance(obj, PackedRatingsMixin):
+            modified = RATING_KEYS.intersection(inspect(obj).committed_state)
+            if modified:
+                changed.append(obj)
+                checked.append(modified)
+    if not changed:
+        return
+    attributes, badges, errors = rating_matrices([obj.rating_values() for obj in changed])
+    errors = [error for error in errors if error["field"] in checked[error["row"]]]
+    if errors:
+        raise RatingValidationError(errors)
+    stale_overalls = []
+    for row, (obj, attributes_packed, badges_packed) in enumerate(
+        zip(changed, *pack_rating_matrices(attributes, badges))
+    ):
+        if isinstance(obj, Player) and (
+            obj.ovr is None
+            or not checked[row].isdisjoint(ATTRIBUTE_NAMES)
+            or inspect(obj).attrs.position.history.has_changes()
+        ):
+            stale_overalls.append(row)
+        obj.attributes_packed = attributes_packed
+        obj.badges_packed = badges_packed
+    if stale_overalls:
+        overalls = compute_overalls(attributes[stale_overalls], [changed[row].position for row in stale_overalls])
+        for row, ovr in zip(stale_overalls, overalls):
+            changed[row].ovr = ovr
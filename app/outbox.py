@@ -0,0 +1,244 @@
+"""
+This is the email outbox: requests queue emails and a background worker delivers them.
+"""
+
+import json
+import smtplib
+import time
+import uuid
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, or_, update
+
+from app import db
+from app.models import EmailOutbox
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+# A claim older than this is from a worker that died mid-send; the email is sent again.
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def queue_email(recipient, subject, body, sender="me"):
+    """
+    Add an email to the outbox. It is delivered once the current transaction commits.
+    """
+    email = EmailOutbox(sender=sender, recipient=recipient, subject=subject, body=body)
+    db.session.add(email)
+    return email
+
+
+class GmailTransport:
+    """
+    Sends a whole batch through one Gmail API batch request.
+    """
+
+    def send_batch(self, emails):
+        from utils.gmail_service import create_message, get_gmail_service
+
+        service = get_gmail_service()
+        if not service:
+            raise RuntimeError("Gmail service not available. Check the stored credentials.")
+
+        errors = {}
+
+        def callback(request_id, response, exception):
+            errors[int(request_id)] = str(exception) if exception else None
+
+        batch = service.new_batch_http_request(callback=callback)
+        for email in emails:
+            message = create_message(email.sender, email.recipient, email.subject, email.body)
+            batch.add(
+                service.users().messages().send(userId=email.sender, body=message),
+                request_id=str(email.id),
+            )
+        batch.execute()
+        return errors
+
+
+class FileTransport:
+    """
+    Appends emails to a JSON-lines file instead of sending them; for local testing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def send_batch(self, emails):
+        with open(self.path, "a", encoding="utf-8") as sink:
+            for email in emails:
+                sink.write(json.dumps({
+                    "id": email.id,
+                    "from": email.sender,
+                    "to": email.recipient,
+                    "subject": email.subject,
+                    "body": email.body,
+                    "sent_at": datetime.utcnow().isoformat(),
+                }) + "\n")
+        return {}
+
+
+class SMTPTransport:
+    """
+    Sends a batch over one SMTP connection, e.g. to a local debugging sink.
+    """
+
+    def __init__(self, host, port, sender):
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def send_batch(self, emails):
+        errors = {}
+        with smtplib.SMTP(self.host, self.port, timeout=30) as connection:
+            for email in emails:
+                message = MIMEText(email.body)
+                message["to"] = email.recipient
+                message["from"] = self.sender
+                message["subject"] = email.subject
+                try:
+                    connection.send_message(message)
+                except smtplib.SMTPException as err:
+                    errors[email.id] = str(err)
+        return errors
+
+
+def get_transport():
+    """
+    The transport selected by EMAIL_TRANSPORT: gmail (default), file or smtp.
+    """
+    config = current_app.config
+    name = config["EMAIL_TRANSPORT"]
+    if name == "file":
+        return FileTransport(config["EMAIL_SINK_PATH"])
+    if name == "smtp":
+        return SMTPTransport(
+            config["EMAIL_SMTP_HOST"],
+            config["EMAIL_SMTP_PORT"],
+            config["MAIL_USERNAME"] or "noreply@localhost",
+        )
+    return GmailTransport()
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff: 30s, 1m, 2m, 4m, ...
+    """
+    return timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def claim_pending(batch_size=50, now=None):
+    """
+    Claim up to batch_size due emails for this run and return them.
+    Each email is claimed by a conditional UPDATE that only one worker can win, so
+    workers can run side by side on any database without sending an email twice.
+    """
+    now = now or datetime.utcnow()
+    claimable = or_(
+        EmailOutbox.status == "pending",
+        and_(EmailOutbox.status == "sending", EmailOutbox.claimed_at < now - CLAIM_TIMEOUT),
+    )
+    ids = [
+        email_id for (email_id,) in
+        db.session.query(EmailOutbox.id)
+        .filter(claimable, EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.id)
+        .limit(batch_size)
+    ]
+    if not ids:
+        db.session.rollback()
+        return []
+
+    claim = uuid.uuid4().hex
+    db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(ids), claimable)
+        .values(status="sending", claimed_by=claim, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return EmailOutbox.query.filter_by(claimed_by=claim, status="sending").order_by(EmailOutbox.id).all()
+
+
+def deliver_pending(batch_size=50, transport=None):
+    """
+    Deliver one batch of due emails. Returns the number of emails attempted.
+    """
+    now = datetime.utcnow()
+    emails = claim_pending(batch_size, now)
+    if not emails:
+        return 0
+
+    try:
+        errors = (transport or get_transport()).send_batch(emails)
+    except Exception as err:
+        errors = {email.id: str(err) for email in emails}
+
+    for email in emails:
+        email.attempts += 1
+        email.claimed_by = None
+        email.claimed_at = None
+        error = errors.get(email.id)
+        if error is None:
+            email.status = "sent"
+            email.sent_at = now
+            email.last_error = None
+        else:
+            email.last_error = error
+            if email.attempts >= MAX_ATTEMPTS:
+                email.status = "failed"
+            else:
+                email.status = "pending"
+                email.next_attempt_at = now + retry_delay(email.attempts)
+    db.session.commit()
+    return len(emails)
+
+
+def purge_sent(older_than=timedelta(days=7)):
+    """
+    Delete delivered emails after a while; they can contain password reset links.
+    """
+    cutoff = datetime.utcnow() - older_than
+    deleted = EmailOutbox.query.filter(
+        EmailOutbox.status == "sent", EmailOutbox.sent_at < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+@click.command("outbox-worker")
+@with_appcontext
+@click.option("--once", is_flag=True, help="Deliver what is due and exit.")
+@click.option("--batch-size", default=50, show_default=True)
+@click.option("--interval", default=5.0, show_default=True, help="Seconds to wait when the outbox is empty.")
+@click.option("--digest-interval", default=3600.0, show_default=True, help="Seconds between milestone digests.")
+def outbox_worker(once, batch_size, interval, digest_interval):
+    """Deliver queued emails in the background."""
+    from app.milestones import send_digests
+    from app.scrape_jobs import purge_jobs
+
+    transport = get_transport()
+    last_purge = 0.0
+    last_digest = 0.0
+    while True:
+        if time.monotonic() - last_digest > digest_interval:
+            # Digests are queued first so they go out in the same batch.
+            digests = send_digests()
+            if digests:
+                click.echo(f"Queued {digests} milestone digests.")
+            last_digest = time.monotonic()
+        delivered = deliver_pending(batch_size, transport)
+        if delivered:
+            click.echo(f"Attempted {delivered} emails.")
+        if time.monotonic() - last_purge > 3600:
+            purge_sent()
+            purge_jobs()
+            last_purge = time.monotonic()
+        if once and delivered < batch_size:
+            break
+        if not delivered:
+            time.sleep(interval)
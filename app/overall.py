@@ -0,0 +1,96 @@
+"""
+This is the Overall (OVR) rating calculator.
+
+Each position has a weight for every attribute. The weights are kept as one
+(positions, attributes) matrix, so the overalls of a whole roster come from a
+matrix-vector product per position over the attribute columns instead of a
+Python loop per player. Players without a position use the average weights.
+
+The result is stored on Player.ovr and only recomputed when a player's
+attributes or position change (see check_and_pack_ratings in app.models), so
+pages that list players never recompute it.
+"""
+
+import numpy as np
+
+from utils.rating_registry import ATTRIBUTE_INDEX, ATTRIBUTE_NAMES, MIN_ATTRIBUTE, MAX_ATTRIBUTE
+
+POSITIONS = ("PG", "SG", "SF", "PF", "C")
+POSITION_LABELS = {
+    "PG": "Point Guard",
+    "SG": "Shooting Guard",
+    "SF": "Small Forward",
+    "PF": "Power Forward",
+    "C": "Center",
+}
+
+# Every attribute counts once; the ones a position relies on count more.
+_BASE_WEIGHT = 1.0
+_EMPHASIS = {
+    "PG": {
+        "ball_handle": 4, "pass_accuracy": 4, "pass_vision": 3, "pass_iq": 3, "speed_with_ball": 3,
+        "three_point_shot": 3, "speed": 2, "agility": 2, "mid_range_shot": 2, "layup": 2,
+        "perimeter_defense": 2, "steal": 2, "shot_iq": 2,
+    },
+    "SG": {
+        "three_point_shot": 4, "mid_range_shot": 3, "shot_iq": 3, "offensive_consistency": 2,
+        "free_throw": 2, "ball_handle": 2, "speed_with_ball": 2, "layup": 2, "driving_dunk": 2,
+        "perimeter_defense": 3, "steal": 2, "agility": 2, "speed": 2,
+    },
+    "SF": {
+        "three_point_shot": 3, "mid_range_shot": 2, "layup": 2, "driving_dunk": 3, "close_shot": 2,
+        "perimeter_defense": 3, "help_defense_iq": 2, "steal": 2, "vertical": 2, "strength": 2,
+        "agility": 2, "speed": 2, "ball_handle": 2,
+    },
+    "PF": {
+        "close_shot": 3, "standing_dunk": 3, "post_control": 3, "post_hook": 2, "post_fade": 2,
+        "mid_range_shot": 2, "interior_defense": 3, "help_defense_iq": 2, "block": 2,
+        "defensive_rebound": 3, "offensive_rebound": 2, "strength": 3, "vertical": 2,
+    },
+    "C": {
+        "close_shot": 3, "standing_dunk": 4, "post_control": 3, "post_hook": 3,
+        "interior_defense": 4, "block": 4, "help_defense_iq": 2, "defensive_rebound": 4,
+        "offensive_rebound": 3, "strength": 4, "hands": 2, "vertical": 2,
+    },
+}
+
+
+def _weight_matrix():
+    weights = np.full((len(POSITIONS), len(ATTRIBUTE_NAMES)), _BASE_WEIGHT)
+    for row, position in enumerate(POSITIONS):
+        for name, weight in _EMPHASIS[position].items():
+            weights[row, ATTRIBUTE_INDEX[name]] = weight
+    # The last row, for players without a position, is the average of the others.
+    weights = np.vstack([weights, weights.mean(axis=0)])
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+# (positions + 1, attributes); each row sums to 1.
+WEIGHTS = _weight_matrix()
+WEIGHTS.flags.writeable = False
+_POSITION_ROWS = {position: row for row, position in enumerate(POSITIONS)}
+_NO_POSITION_ROW = len(POSITIONS)
+
+
+def position_row(position):
+    """
+    Row of WEIGHTS used for a position; unknown or missing positions get the average weights.
+    """
+    return _POSITION_ROWS.get(position, _NO_POSITION_ROW)
+
+
+def compute_overalls(attributes, positions):
+    """
+    Overall rating for every row of an (players, attributes) matrix, in registry order.
+    Missing values (anything below MIN_ATTRIBUTE, e.g. the MISSING placeholder or an
+    unset packed byte) count as MIN_ATTRIBUTE. Returns a list of ints.
+    """
+    attributes = np.asarray(attributes, dtype=np.float64).reshape(-1, len(ATTRIBUTE_NAMES))
+    attributes = np.clip(attributes, MIN_ATTRIBUTE, MAX_ATTRIBUTE)
+    rows = np.fromiter((position_row(position) for position in positions), dtype=np.intp, count=len(attributes))
+    overalls = np.empty(len(attributes))
+    # One matrix-vector product per position present in the roster.
+    for row in np.unique(rows):
+        mask = rows == row
+        overalls[mask] = attributes[mask] @ WEIGHTS[row]
+    return np.clip(np.rint(overalls), MIN_ATTRIBUTE, MAX_ATTRIBUTE).astype(int).tolist()
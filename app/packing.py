@@ -0,0 +1,96 @@
+"""
+This is the packed storage for player ratings.
+
+Next to the individual columns, Player and PlayerTargets keep every attribute
+in one byte and every badge as a one-byte index into BADGE_LEVELS. A roster
+read that only needs ratings selects two short binary columns per row instead
+of 76 columns with strings like "Hall of Fame", and decodes them all at once
+with NumPy.
+
+The packed columns are a second copy, not a replacement. Forms, upgrades,
+validation, the ledger and any SQL on a single rating still use the individual
+columns, which remain the source of truth, and a flush that changes a rating
+rewrites both blobs (see check_and_pack_ratings). Pages that only show ratings
+(the upgrade page, /plan and the projections) read them through
+Player.packed_roster, which selects the blobs and a few core columns and never
+the individual ones. Player defers the two sets as separate groups, so a row
+load carries neither unless asked. PlayerTargets rows load both, 76 bytes more
+than before.
+
+The order of PACKED_ATTRIBUTES and PACKED_BADGES is part of the stored format:
+new names may only be appended.
+"""
+
+import numpy as np
+
+from utils.rating_registry import (
+    ATTRIBUTE_INDEX,
+    ATTRIBUTE_NAMES,
+    BADGE_INDEX,
+    BADGE_NAMES,
+    BADGE_LEVELS,
+)
+
+PACKED_ATTRIBUTES = ATTRIBUTE_NAMES
+PACKED_BADGES = BADGE_NAMES
+
+# Stored for a badge with no value, e.g. a target that was never set.
+UNSET_BADGE = 255
+
+
+def pack_rating_matrices(attributes, badges):
+    """
+    Pack validated rating matrices, as returned by rating_matrices, into one pair of column values per row.
+    Missing or invalid attributes are stored as 0 and badges as UNSET_BADGE.
+    """
+    attributes = np.where(attributes < 0, 0, attributes).astype(np.uint8)
+    badges = np.where(badges < 0, UNSET_BADGE, badges).astype(np.uint8)
+    return [row.tobytes() for row in attributes], [row.tobytes() for row in badges]
+
+
+def unpack_attributes(blobs):
+    """
+    Decode a list of packed attribute columns into one (rows, attributes) uint8 array.
+    """
+    return np.frombuffer(b"".join(blobs), dtype=np.uint8).reshape(len(blobs), len(PACKED_ATTRIBUTES))
+
+
+def unpack_badges(blobs):
+    """
+    Decode a list of packed badge columns into one (rows, badges) uint8 array.
+    """
+    return np.frombuffer(b"".join(blobs), dtype=np.uint8).reshape(len(blobs), len(PACKED_BADGES))
+
+
+class PackedRatings:
+    """
+    Read-only stand-in for a Player or PlayerTargets built from the packed columns.
+    Ratings are read by name like on the model, so templates and the planner accept either.
+    """
+
+    def __init__(self, attributes, badges, **fields):
+        self._attributes = attributes
+        self._badges = badges
+        self.__dict__.update(fields)
+
+    @classmethod
+    def from_blobs(cls, attributes_packed, badges_packed, **fields):
+        return cls(
+            np.frombuffer(attributes_packed, dtype=np.uint8),
+            np.frombuffer(badges_packed, dtype=np.uint8),
+            **fields
+        )
+
+    def __getattr__(self, name):
+        if name in ATTRIBUTE_INDEX:
+            return int(self._attributes[ATTRIBUTE_INDEX[name]]) or None
+        if name in BADGE_INDEX:
+            level = self._badges[BADGE_INDEX[name]]
+            return None if level == UNSET_BADGE else BADGE_LEVELS[level]
+        raise AttributeError(name)
+
+    def attributes(self):
+        return {name: getattr(self, name) for name in PACKED_ATTRIBUTES}
+
+    def badges(self):
+        return {name: getattr(self, name) for name in PACKED_BADGES}
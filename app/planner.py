@@ -0,0 +1,142 @@
+"""
+This is the planner that works out the cheapest way to reach a player's targets.
+"""
+
+from app.upgrades import BADGEPOINT_COST, CUMULATIVE_ATTRIBUTE_COST, CUMULATIVE_BADGE_COST
+from utils.rating_registry import (
+    ATTRIBUTE_NAMES,
+    BADGE_NAMES,
+    BADGE_LEVELS,
+    DEFAULT_ATTRIBUTE_TARGET,
+    DEFAULT_BADGE_TARGET,
+    MAX_ATTRIBUTE,
+)
+
+# Every single +1 / +1 tier step with its devpoint cost, read straight from the cumulative tables.
+ATTRIBUTE_STEP_COSTS = tuple(
+    CUMULATIVE_ATTRIBUTE_COST[value + 1] - CUMULATIVE_ATTRIBUTE_COST[value]
+    for value in range(MAX_ATTRIBUTE)
+)
+BADGE_STEP_COSTS = tuple(
+    CUMULATIVE_BADGE_COST[level + 1] - CUMULATIVE_BADGE_COST[level]
+    for level in range(len(BADGE_LEVELS) - 1)
+)
+
+
+def _gap_steps(player, targets):
+    """
+    List every missing step between the player's values and the targets.
+    Each step is (devpoint cost, kind, name, level before the step).
+    """
+    steps = []
+    for name in ATTRIBUTE_NAMES:
+        current = getattr(player, name) or 0
+        target = getattr(targets, name, None) if targets else None
+        target = min(target or DEFAULT_ATTRIBUTE_TARGET, MAX_ATTRIBUTE)
+        for value in range(current, target):
+            steps.append((ATTRIBUTE_STEP_COSTS[value], "attribute", name, value))
+
+    for name in BADGE_NAMES:
+        current = BADGE_LEVELS.index(getattr(player, name) or "None")
+        target = getattr(targets, name, None) if targets else None
+        target = BADGE_LEVELS.index(target if target in BADGE_LEVELS else DEFAULT_BADGE_TARGET)
+        for level in range(current, target):
+            steps.append((BADGE_STEP_COSTS[level], "badge", name, level))
+    return steps
+
+
+def plan_upgrades(player, targets, devpoints=None, badgepoints=None):
+    """
+    Rank every step needed to close the gap to the targets, cheapest first,
+    and mark how far the given budget reaches.
+
+    Per-step costs never fall as a value rises, so taking the cheapest steps
+    first keeps each rating's steps in order. Badge points pay for the dearest
+    badge steps that are reached, which is where they save the most devpoints.
+    """
+    devpoints = (player.devpoints or 0) if devpoints is None else devpoints
+    badgepoints = (player.badgepoints or 0) if badgepoints is None else badgepoints
+    badge_budget = badgepoints // BADGEPOINT_COST
+
+    steps = _gap_steps(player, targets)
+    order = sorted(steps, key=lambda step: (step[0], step[2], step[3]))
+
+    # Walk the ranking once. A rating whose next step does not fit is blocked, so
+    # only whole prefixes from the current value are reached. Badge steps are
+    # reached in rising cost, so the newest one always gets a badge point; once
+    # they run out, the cheapest badge step holding one goes back to devpoints.
+    affordable = set()
+    reached_badges = []
+    blocked = set()
+    spent_devpoints = 0
+    for step in order:
+        if step[2] in blocked:
+            continue
+        if step[1] != "badge":
+            extra = step[0]
+        elif len(reached_badges) < badge_budget:
+            extra = 0
+        else:
+            extra = reached_badges[-badge_budget][0] if badge_budget else step[0]
+        if spent_devpoints + extra > devpoints:
+            blocked.add(step[2])
+            continue
+        spent_devpoints += extra
+        affordable.add(step)
+        if step[1] == "badge":
+            reached_badges.append(step)
+    covered = set(reached_badges[-badge_budget:]) if badge_budget else set()
+
+    # Closing the whole gap reaches every step, so badge points go to the dearest badge steps overall.
+    badge_costs = sorted((step[0] for step in steps if step[1] == "badge"), reverse=True)
+    devpoints_to_close_gap = sum(step[0] for step in steps) - sum(badge_costs[:badge_budget])
+
+    prerequisite_cost = {}
+    for step in affordable - covered:
+        if step[1] == "badge":
+            prerequisite_cost[step[2]] = max(prerequisite_cost.get(step[2], 0), step[0])
+
+    def rank(step):
+        # Badge-point steps slot in right after the dearest devpoint step of the same badge.
+        cost = prerequisite_cost.get(step[2], 0) if step in covered else step[0]
+        return (step not in affordable, cost, step[2], step[3])
+
+    ranked = sorted(steps, key=rank)
+
+    plan = []
+    reachable = {}
+    for step in ranked:
+        cost, kind, name, level = step
+        currency = "badgepoints" if step in covered else "devpoints"
+        if kind == "attribute":
+            start, end = level, level + 1
+        else:
+            start, end = BADGE_LEVELS[level], BADGE_LEVELS[level + 1]
+        plan.append({
+            "name": name,
+            "kind": kind,
+            "from": start,
+            "to": end,
+            "cost": BADGEPOINT_COST if currency == "badgepoints" else cost,
+            "currency": currency,
+            "affordable": step in affordable,
+        })
+        if step in affordable:
+            entry = reachable.setdefault(name, {"name": name, "kind": kind, "from": start, "devpoints": 0, "badgepoints": 0})
+            entry["to"] = end
+            entry[currency] += plan[-1]["cost"]
+
+    return {
+        "player_id": player.id,
+        "player": player.name,
+        "devpoints_available": devpoints,
+        "badgepoints_available": badgepoints,
+        "total_steps": len(plan),
+        "affordable_steps": len(affordable),
+        "devpoints_to_close_gap": devpoints_to_close_gap,
+        "devpoints_spent": spent_devpoints,
+        "badgepoints_spent": len(covered) * BADGEPOINT_COST,
+        "devpoints_still_needed": max(devpoints_to_close_gap - spent_devpoints, 0),
+        "reachable": list(reachable.values()),
+        "steps": plan,
+    }
@@ -0,0 +1,264 @@
+"""
+This is the progression history: points earned and spent, balances, overall,
+attributes and badge tiers over time, for charts.
+
+Reading it never touches the game log or the ledger. Every game and every
+upgrade or undo adds itself to the player's ProgressionRollup rows for its day
+and its week as it is saved (see ProgressionRollup.record), so a chart reads
+one row per active period, however many games the save has.
+
+A series is cut down to at most `max_points` points by merging neighbouring
+periods into buckets: the flows (games, points earned and spent) are summed
+and the state (balances, ratings, overall) is the one at the end of the
+bucket, so totals stay exact and the last point is always the current player.
+Ratings are only stored for periods with an upgrade; the others carry the
+previous ratings forward.
+
+Rollups are maintained from the moment they exist. `flask --app app
+rebuild-progression` fills them in from the game log and the ledger for
+players that were tracked before, and repairs them if they ever drift.
+"""
+
+import json
+from datetime import timedelta
+
+import click
+import numpy as np
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import (
+    GameLog, Player, PlayerCheckpoint, ProgressionRollup, UpgradeLedger, RATINGS_LOADED, forget_rollups,
+)
+from app.overall import compute_overalls
+from app.packing import (
+    UNSET_BADGE,
+    PackedRatings,
+    pack_rating_matrices,
+    unpack_attributes,
+    unpack_badges,
+)
+from utils.rating_registry import ATTRIBUTE_INDEX, BADGE_INDEX, BADGE_LEVELS, RATING_NAMES, rating_matrices
+
+DEFAULT_POINTS = 200
+MAX_POINTS = 1000
+PERIOD_LENGTHS = {"day": timedelta(days=1), "week": timedelta(days=7)}
+
+_FLOWS = ProgressionRollup.FLOWS
+
+
+class ProgressionError(ValueError):
+    """
+    Raised for a series request that cannot be answered, e.g. an unknown period or rating.
+    """
+
+
+def choose_period(player_id, max_points, start=None, end=None):
+    """
+    Days when the window has few enough active days to chart them one by one, weeks otherwise.
+    """
+    query = ProgressionRollup.query.filter_by(player_id=player_id, period="day")
+    if start is not None:
+        query = query.filter(ProgressionRollup.period_start >= start)
+    if end is not None:
+        query = query.filter(ProgressionRollup.period_start <= end)
+    return "day" if query.count() <= max_points else "week"
+
+
+def bucket_bounds(count, max_points):
+    """
+    First and last row of every bucket when `count` rows are merged into at most `max_points`.
+    """
+    size = max(-(-count // max_points), 1)
+    firsts = np.arange(0, count, size)
+    lasts = np.minimum(firsts + size, count) - 1
+    return firsts, lasts, size
+
+
+def _starting_ratings(player, period, before):
+    """
+    The packed ratings in force before the window: the last stored in an earlier period,
+    else the state the ledger started from, else the player's current ratings.
+    """
+    if before is not None:
+        earlier = (
+            db.session.query(ProgressionRollup.attributes_packed, ProgressionRollup.badges_packed)
+            .filter(
+                ProgressionRollup.player_id == player.id,
+                ProgressionRollup.period == period,
+                ProgressionRollup.period_start < before,
+                ProgressionRollup.attributes_packed.isnot(None),
+            )
+            .order_by(ProgressionRollup.period_start.desc())
+            .first()
+        )
+        if earlier is not None:
+            return tuple(earlier)
+    first = db.session.get(PlayerCheckpoint, (player.id, 0))
+    if first is not None:
+        return first.attributes_packed, first.badges_packed
+    if player.attributes_packed is None or player.badges_packed is None:
+        return player.packed_values()
+    return player.attributes_packed, player.badges_packed
+
+
+def progression_series(player, period="auto", max_points=DEFAULT_POINTS, start=None, end=None, ratings=None):
+    """
+    The player's progression from start to end (dates, both optional) as one list per
+    series, ready for JSON, with at most max_points points. `ratings` names the
+    attributes and badges to include; None includes all of them.
+    Raises ProgressionError for an unknown period or rating name.
+    """
+    names = RATING_NAMES if ratings is None else tuple(ratings)
+    unknown = [name for name in names if name not in RATING_NAMES]
+    if unknown:
+        raise ProgressionError(f"Unknown ratings: {', '.join(unknown)}.")
+    if period == "auto":
+        period = choose_period(player.id, max_points, start, end)
+    if period not in PERIOD_LENGTHS:
+        raise ProgressionError(f"period must be one of auto, {', '.join(PERIOD_LENGTHS)}.")
+
+    window_start = ProgressionRollup.start_of(period, start) if start is not None else None
+    query = db.session.query(
+        ProgressionRollup.period_start,
+        *(getattr(ProgressionRollup, name) for name in _FLOWS),
+        ProgressionRollup.devpoints,
+        ProgressionRollup.badgepoints,
+        ProgressionRollup.attributes_packed,
+        ProgressionRollup.badges_packed,
+    ).filter(ProgressionRollup.player_id == player.id, ProgressionRollup.period == period)
+    if window_start is not None:
+        query = query.filter(ProgressionRollup.period_start >= window_start)
+    if end is not None:
+        query = query.filter(ProgressionRollup.period_start <= end)
+    rows = query.order_by(ProgressionRollup.period_start).all()
+
+    series = {"period": period, "periods": len(rows), "bucket_size": 1, "points": 0, "start": [], "end": []}
+    for name in _FLOWS + ("devpoints", "badgepoints", "ovr"):
+        series[name] = []
+    series["ratings"] = {name: [] for name in names}
+    if not rows:
+        return series
+
+    firsts, lasts, size = bucket_bounds(len(rows), max_points)
+    flows = np.array([[getattr(row, name) for name in _FLOWS] for row in rows], dtype=np.int64)
+    sums = np.add.reduceat(flows, firsts, axis=0)
+
+    # The row whose ratings are in force at the end of each bucket, or -1 before the first one stored.
+    stored = np.array([row.attributes_packed is not None for row in rows])
+    in_force = np.maximum.accumulate(np.where(stored, np.arange(len(rows)), -1))[lasts]
+    starting = _starting_ratings(player, period, window_start) if (in_force < 0).any() else None
+    packed = [starting if row < 0 else (rows[row].attributes_packed, rows[row].badges_packed) for row in in_force]
+    attributes = unpack_attributes([blobs[0] for blobs in packed])
+    badges = unpack_badges([blobs[1] for blobs in packed])
+
+    length = PERIOD_LENGTHS[period]
+    series.update(
+        bucket_size=int(size),
+        points=len(firsts),
+        start=[rows[first].period_start.isoformat() for first in firsts],
+        end=[(rows[last].period_start + length - timedelta(days=1)).isoformat() for last in lasts],
+        devpoints=[rows[last].devpoints for last in lasts],
+        badgepoints=[rows[last].badgepoints for last in lasts],
+        ovr=compute_overalls(attributes, [player.position] * len(firsts)),
+    )
+    for column, name in enumerate(_FLOWS):
+        series[name] = sums[:, column].tolist()
+    for name in names:
+        if name in ATTRIBUTE_INDEX:
+            values = attributes[:, ATTRIBUTE_INDEX[name]].tolist()
+            series["ratings"][name] = [value or None for value in values]
+        else:
+            values = badges[:, BADGE_INDEX[name]].tolist()
+            series["ratings"][name] = [None if value == UNSET_BADGE else BADGE_LEVELS[value] for value in values]
+    return series
+
+
+def rebuild_rollups(player):
+    """
+    Recompute all of a player's rollups from the game log and the ledger.
+    The player must be loaded with_for_update.
+    Balances are worked back from the current ones, so points changed by hand show up
+    in the period they were changed in on later writes, not here.
+    The caller is responsible for committing the session.
+    """
+    ProgressionRollup.query.filter_by(player_id=player.id).delete(synchronize_session=False)
+    forget_rollups(db.session)
+
+    first = db.session.get(PlayerCheckpoint, (player.id, 0))
+    if first is not None:
+        ratings = PackedRatings.from_blobs(first.attributes_packed, first.badges_packed)
+        state = {name: getattr(ratings, name) for name in RATING_NAMES}
+    else:
+        state = player.rating_values()
+
+    events = [
+        (game.played_at, 0, game, None)
+        for game in db.session.query(
+            GameLog.played_at, GameLog.devpoints_earned, GameLog.badgepoints_earned
+        ).filter(GameLog.player_id == player.id)
+    ]
+    events += [
+        (entry.created_at, 1, entry, json.loads(entry.changes))
+        for entry in UpgradeLedger.query.filter_by(player_id=player.id).order_by(UpgradeLedger.seq)
+    ]
+    events.sort(key=lambda event: event[:2])
+
+    rollups = {}
+    ending_state = {}
+    for moment, is_upgrade, event, changes in events:
+        for period in ProgressionRollup.PERIODS:
+            key = (period, ProgressionRollup.start_of(period, moment.date()))
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = ProgressionRollup(
+                    player_id=player.id, period=period, period_start=key[1], **dict.fromkeys(_FLOWS, 0)
+                )
+            if is_upgrade:
+                rollup.devpoints_spent += event.devpoints_spent
+                rollup.badgepoints_spent += event.badgepoints_spent
+            else:
+                rollup.games += 1
+                rollup.devpoints_earned += event.devpoints_earned
+                rollup.badgepoints_earned += event.badgepoints_earned
+        if is_upgrade:
+            for name, _, _, after in changes:
+                state[name] = after
+            for period in ProgressionRollup.PERIODS:
+                ending_state[(period, ProgressionRollup.start_of(period, moment.date()))] = dict(state)
+
+    if ending_state:
+        keys = list(ending_state)
+        attributes, badges, _ = rating_matrices([ending_state[key] for key in keys])
+        for key, attributes_packed, badges_packed in zip(keys, *pack_rating_matrices(attributes, badges)):
+            rollups[key].attributes_packed = attributes_packed
+            rollups[key].badges_packed = badges_packed
+
+    for period in ProgressionRollup.PERIODS:
+        devpoints, badgepoints = player.devpoints or 0, player.badgepoints or 0
+        for key in sorted((key for key in rollups if key[0] == period), reverse=True):
+            rollup = rollups[key]
+            rollup.devpoints, rollup.badgepoints = devpoints, badgepoints
+            devpoints -= rollup.devpoints_earned - rollup.devpoints_spent
+            badgepoints -= rollup.badgepoints_earned - rollup.badgepoints_spent
+
+    db.session.add_all(rollups.values())
+    return len(rollups)
+
+
+@click.command("rebuild-progression")
+@click.option("--player-id", type=int, default=None, help="Only rebuild this player.")
+@with_appcontext
+def rebuild_progression(player_id):
+    """Recompute the progression rollups from the game log and the upgrade ledger."""
+    query = db.session.query(Player.id).order_by(Player.id)
+    if player_id is not None:
+        query = query.filter(Player.id == player_id)
+    players = rows = 0
+    for (current_id,) in query.all():
+        # Locked like a game or upgrade, so none is recorded halfway through the rebuild.
+        player = Player.query.options(*RATINGS_LOADED).with_for_update().filter_by(id=current_id).one()
+        rows += rebuild_rollups(player)
+        db.session.commit()
+        players += 1
+    click.echo(f"Rebuilt {rows} rollups for {players} players.")
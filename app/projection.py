@@ -0,0 +1,111 @@
+"""
+This is the progression projection: when will a player reach each of their targets?
+
+The player's recent games are scored with the user's current point table, and
+utils.projection simulates future seasons by resampling them. Upgrades are
+assumed to be bought in the planner's order, cheapest step first, as soon as
+the devpoints are there. Badge points earned along the way are reported but not
+spent, so badge goals come out on the safe side.
+"""
+
+import numpy as np
+from flask import current_app
+
+from app import db
+from app.models import GameLog
+from app.planner import plan_upgrades
+from app.scoring import AWARD_COLUMNS, STAT_COLUMNS, score_games
+from utils.projection import run_projection
+from utils.rating_registry import rating_label
+
+HISTORY_COLUMNS = STAT_COLUMNS + AWARD_COLUMNS + ("manual_devpoints",)
+
+
+class ProjectionError(ValueError):
+    """
+    Raised when a projection cannot be made, e.g. for a player without games.
+    """
+
+
+def scored_history(player, settings, limit):
+    """
+    Devpoints and badgepoints of the player's last `limit` games under the given
+    settings (ScoringRules or a UserSettings row).
+    """
+    rows = (
+        db.session.query(*(getattr(GameLog, name) for name in HISTORY_COLUMNS))
+        .filter(GameLog.player_id == player.id)
+        .order_by(GameLog.played_at.desc(), GameLog.id.desc())
+        .limit(limit)
+        .all()
+    )
+    if not rows:
+        raise ProjectionError("Record at least one game before projecting this player.")
+    columns = {name: np.array(values) for name, values in zip(HISTORY_COLUMNS, zip(*rows))}
+    devpoints, badgepoints = score_games(settings, columns)
+    # A manual deduction can leave a game negative; the simulation needs totals that never go down.
+    return np.maximum(devpoints, 0), np.maximum(badgepoints, 0)
+
+
+def goal_thresholds(player, targets):
+    """
+    One goal per attribute or badge below its target, with the devpoints still
+    needed before it is reached when spending follows the planner.
+    """
+    plan = plan_upgrades(player, targets)
+    leftover = plan["devpoints_available"] - plan["devpoints_spent"]
+    goals = {}
+    running = 0
+    # plan["steps"] lists the affordable steps first, then the rest cheapest first.
+    for step in plan["steps"]:
+        goal = goals.setdefault(step["name"], {
+            "name": step["name"],
+            "label": rating_label(step["name"]),
+            "kind": step["kind"],
+            "from": step["from"],
+            "devpoints_needed": 0,
+        })
+        goal["to"] = step["to"]
+        if not step["affordable"] and step["currency"] == "devpoints":
+            running += step["cost"]
+            goal["devpoints_needed"] = running - leftover
+    return list(goals.values())
+
+
+def project_player(
+    player, targets, settings, simulations=10000, seasons=3, games_per_season=82, seed=0, history_games=82
+):
+    """
+    Project when each of the player's targets is reached. The player and targets may be
+    models or PackedRatings (see Player.packed_roster).
+    Percentiles are in games from now and in seasons (1 = the coming season).
+    """
+    devpoints, badgepoints = scored_history(player, settings, history_games)
+    goals = goal_thresholds(player, targets)
+    result = run_projection(
+        devpoints,
+        badgepoints,
+        [goal["devpoints_needed"] for goal in goals],
+        simulations=simulations,
+        seasons=seasons,
+        season_length=games_per_season,
+        seed=seed,
+        workers=current_app.config["PROJECTION_WORKERS"],
+    )
+    for goal, outcome in zip(goals, result["goals"]):
+        goal.update(outcome)
+        goal["seasons"] = {
+            band: None if games is None else -(-games // games_per_season)
+            for band, games in outcome["games"].items()
+        }
+    return {
+        "player_id": player.id,
+        "player": player.name,
+        "simulations": simulations,
+        "seasons": seasons,
+        "games_per_season": games_per_season,
+        "seed": seed,
+        "history_games": len(devpoints),
+        "goals": goals,
+        "points": result["seasons"],
+    }
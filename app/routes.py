@@ -5,57 +5,117 @@ We define the routes for registration and login.
 import random
 import json
 import string
-import requests
+from datetime import date, datetime, timezone
 
-from flask import render_template, url_for, flash, redirect, request, session, jsonify
+from flask import Blueprint, current_app, render_template, url_for, flash, redirect, request, session, jsonify
 from flask_login import login_user, current_user, logout_user, login_required
-from authlib.integrations.flask_client import OAuth
 from werkzeug.security import generate_password_hash
 from itsdangerous import URLSafeTimedSerializer
-from google.oauth2.credentials import Credentials
-
-from app import app, db, bcrypt, mail
-from app.models import User, Player, UserSettings, PlayerTargets
-from utils.gmail_service import send_email
-from utils.scrape_2kratings import scrape_player_data
-
-# Initialize OAuth
-oauth = OAuth(app)
-
-# Register Google OAuth
-google = oauth.register(
-    name="google",
-    client_id=app.config["LOGIN_CLIENT_ID"],
-    client_secret=app.config["LOGIN_CLIENT_SECRET"],
-    authorize_url="https://accounts.google.com/o/oauth2/auth",
-    access_token_url="https://accounts.google.com/o/oauth2/token",
-    jwks_uri="https://www.googleapis.com/oauth2/v3/certs",
-    client_kwargs={"scope": "openid email profile"}
+
+from app import db, bcrypt, mail
+from app.models import User, Player, UserSettings, PlayerTargets, PlayerStats, RATINGS_LOADED
+from app.database import read_only_view, replica_reads
+from app.outbox import queue_email
+from app.user_cache import user_cache
+from app.milestones import record_milestones
+from app.ledger import MAX_UNDO_STEPS, ratings_as_of, recent_entries, record_upgrade, undo_upgrades
+from app.scoring import (
+    cached_scoring_rules, score_game, score_games, parse_box_scores, rows_to_columns, BoxScoreError,
+    STAT_COLUMNS, AWARD_COLUMNS,
+)
+from app.planner import plan_upgrades
+from app.projection import ProjectionError, project_player
+from app.progression import DEFAULT_POINTS, MAX_POINTS, ProgressionError, progression_series
+from app.overall import POSITION_LABELS
+from app.upgrades import (
+    BADGEPOINT_COST, UpgradeError, attribute_step_cost, badge_upgrade_cost, next_badge_step, parse_upgrade,
+    apply_upgrades,
+)
+from app.scrape_jobs import (
+    PENDING_STATUSES, ScrapeQueueFull, get_job, job_payload, submit_job,
 )
+from utils.rating_registry import (
+    ATTRIBUTE_NAMES, BADGE_NAMES, BADGE_LEVELS, DEFAULT_ATTRIBUTE_TARGET, DEFAULT_BADGE_TARGET,
+    MIN_ATTRIBUTE, MAX_ATTRIBUTE,
+    parse_rating_form, rating_label,
+)
+from utils.ratings_snapshot import get_snapshot
+
+main = Blueprint("main", __name__)
+
+GAME_LOG_FIELDS = STAT_COLUMNS + AWARD_COLUMNS + ("manual_devpoints",)
+SCRAPE_BUSY_MESSAGE = "Too many player lookups are running right now. Please try again in a few seconds."
+
+
+def rating_template_context():
+    """
+    The registry tables the player forms are rendered from.
+    """
+    return {
+        "attribute_list": ATTRIBUTE_NAMES,
+        "badge_list": BADGE_NAMES,
+        "badge_levels": BADGE_LEVELS,
+        "min_attribute": MIN_ATTRIBUTE,
+        "max_attribute": MAX_ATTRIBUTE,
+        "positions": POSITION_LABELS,
+    }
+
+def scoring_rules_for(user):
+    """
+    The user's compiled point table. Settings are only loaded when their version is not cached yet.
+    The version is read from the database every time, since another process may have saved new settings.
+    """
+    settings_version = db.session.query(User.settings_version).filter_by(id=user.id).scalar()
+    return cached_scoring_rules(
+        user.id,
+        settings_version,
+        lambda: user.settings or create_default_settings(user),
+    )
+
+def google_oauth():
+    """
+    The Google OAuth client, registered on first use so authlib is only imported by Google logins.
+    """
+    client = current_app.extensions.get("google_oauth")
+    if client is None:
+        from authlib.integrations.flask_client import OAuth
+
+        oauth = OAuth(current_app._get_current_object())
+        client = oauth.register(
+            name="google",
+            client_id=current_app.config["LOGIN_CLIENT_ID"],
+            client_secret=current_app.config["LOGIN_CLIENT_SECRET"],
+            authorize_url="https://accounts.google.com/o/oauth2/auth",
+            access_token_url="https://accounts.google.com/o/oauth2/token",
+            jwks_uri="https://www.googleapis.com/oauth2/v3/certs",
+            client_kwargs={"scope": "openid email profile"}
+        )
+        current_app.extensions["google_oauth"] = client
+    return client
 
 def generate_confirmation_token(email):
     """
     Generating a confirmation token.
     """
-    serializer = URLSafeTimedSerializer(app.config["SECRET_KEY"])
-    return serializer.dumps(email, salt=app.config["SECURITY_PASSWORD_SALT"])
+    serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"])
+    return serializer.dumps(email, salt=current_app.config["SECURITY_PASSWORD_SALT"])
 
 def confirm_token(token, expiration=3600):
     """
     Confirming the token.
     """
-    serializer = URLSafeTimedSerializer(app.config["SECRET_KEY"])
+    serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"])
     try:
         email = serializer.loads(
             token,
-            salt=app.config["SECURITY_PASSWORD_SALT"],
+            salt=current_app.config["SECURITY_PASSWORD_SALT"],
             max_age=expiration
         )
     except:
         return False
     return email
 
-@app.route("/register", methods=["GET", "POST"])
+@main.route("/register", methods=["GET", "POST"])
 def register():
     """
     This is the logic for users registering themselves.
@@ -79,7 +139,7 @@ def register():
                 flash("This e-mail is already registered. Please use another e-mail", "danger")
             if existing_user.username == username:
                 flash("This username is already taken. Please choose another.", "danger")
-            return redirect(url_for("register"))
+            return redirect(url_for("main.register"))
 
         # Hash the password
         hashed_password = bcrypt.generate_password_hash(password).decode("utf-8")
@@ -91,7 +151,7 @@ def register():
 
         # # Generate the confirmation token
         # token = generate_confirmation_token(email)
-        # confirm_url = url_for("confirm_email", token=token, _external=True)
+        # confirm_url = url_for("main.confirm_email", token=token, _external=True)
 
         # # Email content with the confirmation link
         # email_body = f"Please click the link to confirm your email: {confirm_url}"
@@ -100,11 +160,11 @@ def register():
         # send_email("me", email, "Confirm your e-mail", email_body)
 
         flash("Registration successful! You can now log in.", "success")
-        return redirect(url_for("login"))
+        return redirect(url_for("main.login"))
     return render_template("register.html")
 
 
-@app.route("/login", methods=["GET", "POST"])
+@main.route("/login", methods=["GET", "POST"])
 def login():
     """
     This is the logic for customers logging in.
@@ -119,22 +179,31 @@ def login():
             session.permanent = True
             login_user(user)
             flash("Login successful!", "success")
-            return redirect(url_for("dashboard"))
+            return redirect(url_for("main.dashboard"))
         else:
             flash("Login Unsuccessful. Please check email and password.", "danger")
 
     return render_template("login.html")
 
 
-@app.route("/dashboard", methods=["GET", "POST"])
+@main.route("/dashboard", methods=["GET", "POST"])
+@read_only_view
 def dashboard():
     """
     This is the main hub where users can navigate to different features.
     """
-    return render_template("dashboard.html")
+    # The cached overalls are read as stored; nothing is recomputed per render.
+    roster = []
+    if current_user.is_authenticated:
+        roster = sorted(
+            Player.roster_summary(current_user.id),
+            key=lambda player: player.ovr if player.ovr is not None else -1,
+            reverse=True,
+        )
+    return render_template("dashboard.html", roster=roster, positions=POSITION_LABELS)
 
 
-@app.route("/add_player", methods=["GET", "POST"])
+@main.route("/add_player", methods=["GET", "POST"])
 @login_required
 def add_player():
     """
@@ -147,176 +216,42 @@ def add_player():
         devpoints = int(request.form.get("devpoints", 0))
         badgepoints = int(request.form.get("badgepoints", 0))
 
-        agility = int(request.form.get("agility", 25))
-        ball_handle = int(request.form.get("ball_handle", 25))
-        block = int(request.form.get("block", 25))
-        close_shot = int(request.form.get("close_shot", 25))
-        defensive_consistency = int(request.form.get("defensive_consistency", 25))
-        defensive_rebound = int(request.form.get("defensive_rebound", 25))
-        draw_foul = int(request.form.get("draw_foul", 25))
-        driving_dunk = int(request.form.get("driving_dunk", 25))
-        free_throw = int(request.form.get("free_throw", 25))
-        hands = int(request.form.get("hands", 25))
-        help_defense_iq = int(request.form.get("help_defense_iq", 25))
-        hustle = int(request.form.get("hustle", 25))
-        intangibles = int(request.form.get("intangibles", 25))
-        interior_defense = int(request.form.get("interior_defense", 25))
-        layup = int(request.form.get("layup", 25))
-        mid_range_shot = int(request.form.get("mid_range_shot", 25))
-        offensive_consistency = int(request.form.get("offensive_consistency", 25))
-        offensive_rebound = int(request.form.get("offensive_rebound", 25))
-        overall_durability = int(request.form.get("overall_durability", 25))
-        pass_accuracy = int(request.form.get("pass_accuracy", 25))
-        pass_iq = int(request.form.get("pass_iq", 25))
-        pass_perception = int(request.form.get("pass_perception", 25))
-        pass_vision = int(request.form.get("pass_vision", 25))
-        perimeter_defense = int(request.form.get("perimeter_defense", 25))
-        post_control = int(request.form.get("post_control", 25))
-        post_fade = int(request.form.get("post_fade", 25))
-        post_hook = int(request.form.get("post_hook", 25))
-        shot_iq = int(request.form.get("shot_iq", 25))
-        standing_dunk = int(request.form.get("standing_dunk", 25))
-        speed = int(request.form.get("speed", 25))
-        speed_with_ball = int(request.form.get("speed_with_ball", 25))
-        stamina = int(request.form.get("stamina", 25))
-        steal = int(request.form.get("steal", 25))
-        strength = int(request.form.get("strength", 25))
-        three_point_shot = int(request.form.get("three_point_shot", 25))
-        vertical = int(request.form.get("vertical", 25))
-
-        aerial_wizard = request.form.get("aerial_wizard", "None")
-        ankle_assassin = request.form.get("ankle_assassin", "None")
-        bail_out = request.form.get("bail_out", "None")
-        boxout_beast = request.form.get("boxout_beast", "None")
-        break_starter = request.form.get("break_starter", "None")
-        brick_wall = request.form.get("brick_wall", "None")
-        challenger = request.form.get("challenger", "None")
-        deadeye = request.form.get("deadeye", "None")
-        dimer = request.form.get("dimer", "None")
-        float_game = request.form.get("float_game", "None")
-        glove = request.form.get("glove", "None")
-        handles_for_days = request.form.get("handles_for_days", "None")
-        high_flying_denier = request.form.get("high_flying_denier", "None")
-        hook_specialist = request.form.get("hook_specialist", "None")
-        immovable_enforcer = request.form.get("immovable_enforcer", "None")
-        interceptor = request.form.get("interceptor", "None")
-        layup_mixmaster = request.form.get("layup_mixmaster", "None")
-        lightning_launch = request.form.get("lightning_launch", "None")
-        limitless_range = request.form.get("limitless_range", "None")
-        mini_marksman = request.form.get("mini_marksman", "None")
-        off_ball_pest = request.form.get("off_ball_pest", "None")
-        on_ball_menace = request.form.get("on_ball_menace", "None")
-        paint_patroller = request.form.get("paint_patroller", "None")
-        paint_prodigy = request.form.get("paint_prodigy", "None")
-        pick_dodger = request.form.get("pick_dodger", "None")
-        pogo_stick = request.form.get("pogo_stick", "None")
-        posterizer = request.form.get("posterizer", "None")
-        post_fade_phenom = request.form.get("post_fade_phenom", "None")
-        post_lockdown = request.form.get("post_lockdown", "None")
-        post_powerhouse = request.form.get("post_powerhouse", "None")
-        post_up_poet = request.form.get("post_up_poet", "None")
-        physical_finisher = request.form.get("physical_finisher", "None")
-        rebound_chaser = request.form.get("rebound_chaser", "None")
-        rise_up = request.form.get("rise_up", "None")
-        set_shot_specialist = request.form.get("set_shot_specialist", "None")
-        shifty_shooter = request.form.get("shifty_shooter", "None")
-        slippery_off_ball = request.form.get("slippery_off_ball", "None")
-        strong_handle = request.form.get("strong_handle", "None")
-        unpluckable = request.form.get("unpluckable", "None")
-        versatile_visionary = request.form.get("versatile_visionary", "None")
+        # Players without a known position are rated with the average weights.
+        position = request.form.get("position") or None
+        if position not in POSITION_LABELS:
+            position = None
+
+        ratings, errors = parse_rating_form(request.form)
+        if errors:
+            for error in errors:
+                flash(error["message"], "danger")
+            # Show the form again with what was submitted.
+            player_data = {
+                "player_name": name,
+                "position": position,
+                "attributes": {attr: request.form.get(attr) for attr in ATTRIBUTE_NAMES},
+                "badges": {badge: request.form.get(badge) for badge in BADGE_NAMES},
+            }
+            return render_template("add_player.html", player_data=player_data, **rating_template_context())
 
         new_player = Player(
             name=name,
             user_id=user_id,
             devpoints=devpoints,
             badgepoints=badgepoints,
-            agility=agility,
-            ball_handle=ball_handle,
-            block=block,
-            close_shot=close_shot,
-            defensive_consistency=defensive_consistency,
-            defensive_rebound=defensive_rebound,
-            draw_foul=draw_foul,
-            driving_dunk=driving_dunk,
-            free_throw=free_throw,
-            hands=hands,
-            help_defense_iq=help_defense_iq,
-            hustle=hustle,
-            intangibles=intangibles,
-            interior_defense=interior_defense,
-            layup=layup,
-            mid_range_shot=mid_range_shot,
-            offensive_consistency=offensive_consistency,
-            offensive_rebound=offensive_rebound,
-            overall_durability=overall_durability,
-            pass_accuracy=pass_accuracy,
-            pass_iq=pass_iq,
-            pass_perception=pass_perception,
-            pass_vision=pass_vision,
-            perimeter_defense=perimeter_defense,
-            post_control=post_control,
-            post_fade=post_fade,
-            post_hook=post_hook,
-            shot_iq=shot_iq,
-            standing_dunk=standing_dunk,
-            speed=speed,
-            speed_with_ball=speed_with_ball,
-            stamina=stamina,
-            steal=steal,
-            strength=strength,
-            three_point_shot=three_point_shot,
-            vertical=vertical,
-            aerial_wizard=aerial_wizard,
-            ankle_assassin=ankle_assassin,
-            bail_out=bail_out,
-            boxout_beast=boxout_beast,
-            break_starter=break_starter,
-            brick_wall=brick_wall,
-            challenger=challenger,
-            deadeye=deadeye,
-            dimer=dimer,
-            float_game=float_game,
-            glove=glove,
-            handles_for_days=handles_for_days,
-            high_flying_denier=high_flying_denier,
-            hook_specialist=hook_specialist,
-            immovable_enforcer=immovable_enforcer,
-            interceptor=interceptor,
-            layup_mixmaster=layup_mixmaster,
-            lightning_launch=lightning_launch,
-            limitless_range=limitless_range,
-            mini_marksman=mini_marksman,
-            off_ball_pest=off_ball_pest,
-            on_ball_menace=on_ball_menace,
-            paint_patroller=paint_patroller,
-            paint_prodigy=paint_prodigy,
-            pick_dodger=pick_dodger,
-            pogo_stick=pogo_stick,
-            posterizer=posterizer,
-            post_fade_phenom=post_fade_phenom,
-            post_lockdown=post_lockdown,
-            post_powerhouse=post_powerhouse,
-            post_up_poet=post_up_poet,
-            physical_finisher=physical_finisher,
-            rebound_chaser=rebound_chaser,
-            rise_up=rise_up,
-            set_shot_specialist=set_shot_specialist,
-            shifty_shooter=shifty_shooter,
-            slippery_off_ball=slippery_off_ball,
-            strong_handle=strong_handle,
-            unpluckable=unpluckable,
-            versatile_visionary=versatile_visionary
+            position=position,
+            **ratings
         )
 
         db.session.add(new_player)
         db.session.commit()
 
         flash("Player added successfully!", "success")
-        return redirect(url_for("add_player"))
+        return redirect(url_for("main.add_player"))
     # Render the form when accessed via GET request
-    return render_template("add_player.html")
+    return render_template("add_player.html", player_data=None, **rating_template_context())
 
-@app.route("/input_stats", methods=["GET", "POST"])
+@main.route("/input_stats", methods=["GET", "POST"])
 @login_required
 def input_stats():
     """
@@ -325,10 +260,11 @@ def input_stats():
     if request.method == "POST":
         # Fetch the player
         player_id = request.form.get("player_id")
-        player = Player.query.get(player_id)
+        # Locked until commit, so two games saved at once do not overwrite each other's totals.
+        player = Player.query.with_for_update().filter_by(id=player_id).first()
 
-        # Fetch user-specific settings
-        settings = current_user.settings or create_default_settings(current_user)
+        # The user's point table, compiled once per settings version
+        settings = scoring_rules_for(current_user)
 
         # Get game stats from the form
         points = int(request.form.get("points", 0))
@@ -347,143 +283,175 @@ def input_stats():
         mvp = "mvp" in request.form
         champion = "champion" in request.form
 
-        # Calculate development and badge points
-        devpoints_earned = 0
-        badgepoints_earned = 0
-
-        # Initialize a list to track stats for double doubles and triple doubles
-        double_double_stats = [
-            points >= 10,
-            rebounds >= 10,
-            assists >= 10,
-            steals >= 10,
-            blocks >= 10,
-        ]
-
         #track money earned
         money_input = request.form.get("money")
         if money_input is not None:
             player.money = int(money_input)
-    
-        # Rebounds and assists points
-        if sum(double_double_stats) <= 1:
-            if rebounds >= 10 and rebounds < 20:
-                devpoints_earned += settings.rebounds_10
-            if assists >= 10 and assists < 20:
-                devpoints_earned += settings.assists_10
-            if points >= 10 and points < 20:
-                devpoints_earned += settings.points_10
-
-        # Scoring points
-        if points >= 70:
-            devpoints_earned += settings.points_70
-        elif points >= 60:
-            devpoints_earned += settings.points_60
-        elif points >= 50:
-            devpoints_earned += settings.points_50
-        elif points >= 40:
-            devpoints_earned += settings.points_40
-        elif points >= 30:
-            devpoints_earned += settings.points_30
-        elif points >= 20:
-            devpoints_earned += settings.points_20
-
-        if assists >= 20:
-            devpoints_earned += settings.assists_20
-
-        if rebounds >= 20:
-            devpoints_earned += settings.rebounds_20
-
-        # double double and triple double points
-        double_double_count = sum(double_double_stats)
-        if double_double_count == 2:
-            devpoints_earned += settings.double_double_2
-        elif double_double_count == 3:
-            devpoints_earned += settings.double_double_3
-        elif double_double_count == 4:
-            devpoints_earned += settings.double_double_4
-        elif double_double_count == 5:
-            devpoints_earned += settings.double_double_5
-
-        # Steals and blocks points
-        if steals >= 10:
-            devpoints_earned += settings.steals_10
-        elif steals >= 6:
-            devpoints_earned += settings.steals_6
-        elif steals >= 3:
-            devpoints_earned += settings.steals_3
-        if blocks >= 10:
-            devpoints_earned += settings.blocks_10
-        elif blocks >= 6:
-            devpoints_earned += settings.blocks_6
-        elif blocks >= 3:
-            devpoints_earned += settings.blocks_3
-
-        # Player of the game/week/month points
-        devpoints_earned += int(player_of_the_game) * settings.player_of_the_game
-        devpoints_earned += int(player_of_the_week) * settings.player_of_the_week
-        devpoints_earned += int(player_of_the_month) * settings.player_of_the_month
-
-        # ROTY, DPOY, MVP and Champion points and badges
-        if roty:
-            devpoints_earned += settings.roty_points
-            badgepoints_earned += settings.roty_badge
-        if dpoy:
-            devpoints_earned += settings.dpoy_points
-            badgepoints_earned += settings.dpoy_badge
-        if mvp:
-            devpoints_earned += settings.mvp_points
-            badgepoints_earned += settings.mvp_badge
-        if champion:
-            devpoints_earned += settings.champion_points
-            badgepoints_earned += settings.champion_badge
-
-        # Update player's points
-        if  manual_devpoints > 0 :
-                devpoints_earned += manual_devpoints
-        
+
+        stat_line = {
+            "points": points,
+            "rebounds": rebounds,
+            "assists": assists,
+            "steals": steals,
+            "blocks": blocks,
+            "player_of_the_game": player_of_the_game,
+            "player_of_the_week": player_of_the_week,
+            "player_of_the_month": player_of_the_month,
+            "roty": roty,
+            "dpoy": dpoy,
+            "mvp": mvp,
+            "champion": champion,
+            "manual_devpoints": manual_devpoints,
+        }
+
+        # Calculate development and badge points
+        devpoints_earned, badgepoints_earned = score_game(settings, **stat_line)
+
+        # Update player's points and keep the stat line
         player.devpoints += devpoints_earned 
         player.badgepoints += badgepoints_earned
-        player.money = int(money_input)
+        player.record_game(
+            devpoints_earned,
+            badgepoints_earned,
+            money=int(money_input) if money_input is not None else None,
+            **stat_line
+        )
         db.session.commit()
 
         flash(
             f"Success! {devpoints_earned} development points and {badgepoints_earned} badge points awarded and {money_input} earned.",
             "success"
         )
-        return redirect(url_for("input_stats"))
+        return redirect(url_for("main.input_stats"))
     # Render form if get request
-    players = Player.query.filter_by(user_id=current_user.id).all()
+    with replica_reads():
+        players = Player.roster_summary(current_user.id)
     return render_template("input_stats.html", players=players)
 
 
-@app.route("/upgrade_attribute", methods=["GET", "POST"])
+@main.route("/import_box_scores", methods=["POST"])
 @login_required
-def upgrade_attribute():
+def import_box_scores():
     """
-    The logic for upgrading the attributes.
+    Importing a whole batch of box scores in a single request and transaction.
+    Accepts a JSON body, an uploaded file or pasted CSV/JSON text.
+    """
+    wants_json = request.is_json
+    try:
+        if request.is_json:
+            rows = parse_box_scores(request.get_json(), fmt="json")
+        else:
+            upload = request.files.get("box_scores_file")
+            raw = upload.read().decode("utf-8-sig") if upload and upload.filename else request.form.get("box_scores", "")
+            fmt = request.form.get("format") or ("json" if raw.lstrip().startswith(("[", "{")) else "csv")
+            rows = parse_box_scores(raw, fmt=fmt)
+    except (BoxScoreError, UnicodeDecodeError) as err:
+        if wants_json:
+            return jsonify({"success": False, "error": str(err)}), 400
+        flash(str(err), "danger")
+        return redirect(url_for("main.input_stats"))
+
+    if not rows:
+        if wants_json:
+            return jsonify({"success": False, "error": "No games to import."}), 400
+        flash("No games to import.", "danger")
+        return redirect(url_for("main.input_stats"))
+
+    # Resolve every row against the user's own roster, locked until commit (in id order, so imports cannot deadlock)
+    players = Player.query.filter_by(user_id=current_user.id).order_by(Player.id).with_for_update().all()
+    players_by_id = {player.id: player for player in players}
+    players_by_name = {player.name.lower(): player for player in players}
+    row_players = []
+    unknown_rows = []
+    for row in rows:
+        player = players_by_id.get(row["player_id"]) if row["player_id"] is not None else None
+        if player is None and row["player"]:
+            player = players_by_name.get(str(row["player"]).lower())
+        if player is None:
+            unknown_rows.append(str(row["row"]))
+        row_players.append(player)
+
+    if unknown_rows:
+        error = f"Unknown player in rows: {', '.join(unknown_rows)}."
+        if wants_json:
+            return jsonify({"success": False, "error": error}), 400
+        flash(error, "danger")
+        return redirect(url_for("main.input_stats"))
+
+    devpoints, badgepoints = score_games(scoring_rules_for(current_user), rows_to_columns(rows))
+
+    summary = {}
+    for row, player, devpoints_earned, badgepoints_earned in zip(rows, row_players, devpoints, badgepoints):
+        player.devpoints += int(devpoints_earned)
+        player.badgepoints += int(badgepoints_earned)
+        if row["money"] is not None:
+            player.money = row["money"]
+        player.record_game(
+            int(devpoints_earned),
+            int(badgepoints_earned),
+            money=row["money"],
+            **{name: row[name] for name in GAME_LOG_FIELDS}
+        )
+        totals = summary.setdefault(player.id, {"player": player.name, "games": 0, "devpoints": 0, "badgepoints": 0})
+        totals["games"] += 1
+        totals["devpoints"] += int(devpoints_earned)
+        totals["badgepoints"] += int(badgepoints_earned)
+    db.session.commit()
+
+    if wants_json:
+        return jsonify({"success": True, "games": len(rows), "players": list(summary.values())})
+
+    flash(
+        f"Success! Imported {len(rows)} games: {int(devpoints.sum())} development points "
+        f"and {int(badgepoints.sum())} badge points awarded.",
+        "success"
+    )
+    return redirect(url_for("main.input_stats"))
+
+
+@main.route("/player_stats")
+@login_required
+@read_only_view
+def player_stats():
     """
+    Season totals, averages and career highs for the user's players.
+    Reads the running aggregates, so the cost does not grow with the game log.
+    """
+    rows = (
+        db.session.query(Player, PlayerStats)
+        .outerjoin(PlayerStats, PlayerStats.player_id == Player.id)
+        .filter(Player.user_id == current_user.id)
+        .order_by(Player.name)
+        .all()
+    )
+
+    selected_player = None
+    recent_games = []
+    player_id = request.args.get("player_id", type=int)
+    if player_id:
+        selected_player = next((player for player, _ in rows if player.id == player_id), None)
+        if selected_player:
+            recent_games = selected_player.game_logs.limit(10).all()
+
+    return render_template(
+        "player_stats.html",
+        rows=rows,
+        stat_names=PlayerStats.STAT_NAMES,
+        selected_player=selected_player,
+        recent_games=recent_games,
+    )
 
-    attribute_list = [
-        'agility', 'ball_handle', 'block', 'close_shot', 'defensive_consistency', 'defensive_rebound',
-        'draw_foul', 'driving_dunk', 'free_throw', 'hands', 'help_defense_iq', 'hustle', 'intangibles',
-        'interior_defense', 'layup', 'mid_range_shot', 'offensive_consistency',
-        'offensive_rebound', 'overall_durability', 'pass_accuracy', 'pass_iq', 'pass_perception', 'pass_vision',
-        'perimeter_defense', 'post_control', 'post_fade', 'post_hook', 'shot_iq', 'speed',
-        'speed_with_ball', 'stamina', 'standing_dunk', 'steal', 'strength', 'three_point_shot', 'vertical'
-    ]
 
-    badge_list = [
-        "aerial_wizard", "ankle_assassin", "bail_out", "boxout_beast", "break_starter", "brick_wall", "challenger", 
-        "deadeye", "dimer", "float_game", "glove", "handles_for_days", "high_flying_denier", "hook_specialist", 
-        "immovable_enforcer", "interceptor", "layup_mixmaster", "lightning_launch", "limitless_range", 
-        "mini_marksman", "off_ball_pest", "on_ball_menace", "paint_patroller", "paint_prodigy", "pick_dodger", 
-        "pogo_stick", "posterizer", "post_fade_phenom", "post_lockdown", "post_powerhouse", "post_up_poet", 
-        "physical_finisher", "rebound_chaser", "rise_up", "set_shot_specialist", "shifty_shooter", "slippery_off_ball", 
-        "strong_handle", "unpluckable", "versatile_visionary"
-    ]
+@main.route("/upgrade_attribute", methods=["GET", "POST"])
+@login_required
+def upgrade_attribute():
+    """
+    The logic for upgrading the attributes.
+    """
 
-    badge_levels = ["None", "Bronze", "Silver", "Gold", "Hall of Fame", "Legendary"]
+    attribute_list = ATTRIBUTE_NAMES
+    badge_list = BADGE_NAMES
+    badge_levels = BADGE_LEVELS
 
     player = None
     target_values = {}
@@ -494,7 +462,8 @@ def upgrade_attribute():
         player_id = request.form.get("player_id")
 
         if player_id:
-            player = Player.query.get(player_id)
+            # Locked until commit, so a double click cannot spend the same points twice.
+            player = Player.query.options(*RATINGS_LOADED).with_for_update().filter_by(id=player_id).first()
 
             if player:
                 targets = PlayerTargets.query.filter_by(player_id=player.id).first()
@@ -509,29 +478,28 @@ def upgrade_attribute():
             # Get the attribute to upgrade and its current value
             attribute = request.form.get("attribute")
             if attribute and player:
+                if attribute not in ATTRIBUTE_NAMES:
+                    flash(f"Unknown attribute '{attribute}'.", "danger")
+                    return redirect(url_for("main.upgrade_attribute", player_id=player_id))
                 current_value = getattr(player, attribute)
 
                 # Check if the attribute is at the maximum value
                 if current_value >= 99:
                     formatted_name = format_attribute_name(attribute)
                     flash(f"{formatted_name} is already at the maximum value!", "info")
-                    return redirect(url_for("upgrade_attribute", player_id=player_id))
+                    return redirect(url_for("main.upgrade_attribute", player_id=player_id))
 
                 # Define upgrade cost based on the current value
-                if current_value < 70:
-                    cost = 1
-                elif current_value < 80:
-                    cost = 2
-                elif current_value < 90:
-                    cost = 3
-                else:
-                    cost = 5
+                cost = attribute_step_cost(current_value)
 
                 # Check if player has enough development points
                 if player.devpoints >= cost:
                     # Deduct development points and increase the attribute
                     player.devpoints -= cost
                     setattr(player, attribute, current_value + 1)
+                    changes = [(attribute, "attribute", current_value, current_value + 1)]
+                    record_milestones(player, changes, targets)
+                    record_upgrade(player, changes, devpoints_spent=cost)
 
                     db.session.commit()
                     formatted_name = format_attribute_name(attribute)
@@ -545,31 +513,22 @@ def upgrade_attribute():
             # Handle badge upgrades with devpoints
             badge_devpoints = request.form.get("badge_devpoints")
             if badge_devpoints and player:
-                current_badge = getattr(player, badge_devpoints)
-
-                # Prevent upgrade if badge is at "Legendary"
-                if current_badge == "Legendary":
-                    flash(f"{badge_devpoints} is already at the maximum level.", "info")
-                    return redirect(url_for("upgrade_attribute", player_id=player_id))
-
-                badge_cost = 0
+                # Unknown badges, levels outside BADGE_LEVELS and Legendary badges are refused
+                try:
+                    current_badge, next_badge = next_badge_step(player, badge_devpoints)
+                except UpgradeError as err:
+                    flash(str(err), "danger")
+                    return redirect(url_for("main.upgrade_attribute", player_id=player_id))
 
                 # Define badge upgrade cost based on the current badge level
-                if current_badge == "None":
-                    badge_cost = 3
-                elif current_badge == "Bronze":
-                    badge_cost = 5
-                elif current_badge == "Silver":
-                    badge_cost = 7
-                elif current_badge == "Gold":
-                    badge_cost = 10
-                elif current_badge == "Hall of Fame":
-                    badge_cost = 20
+                badge_cost = badge_upgrade_cost(current_badge, next_badge)
 
                 if player.devpoints >= badge_cost:
                     player.devpoints -= badge_cost
-                    next_badge = get_next_badge_level(current_badge)
                     setattr(player, badge_devpoints, next_badge)
+                    changes = [(badge_devpoints, "badge", current_badge, next_badge)]
+                    record_milestones(player, changes, targets)
+                    record_upgrade(player, changes, devpoints_spent=badge_cost)
 
                     db.session.commit()
                     formatted_badge_name = format_attribute_name(badge_devpoints)
@@ -583,11 +542,18 @@ def upgrade_attribute():
             # Handle badge upgrades with badge points
             badge_badgepoints = request.form.get("badge_badgepoints")
             if badge_badgepoints and player:
-                if player.badgepoints > 0:
-                    current_badge = getattr(player, badge_badgepoints)
-                    next_badge = get_next_badge_level(current_badge)
+                try:
+                    current_badge, next_badge = next_badge_step(player, badge_badgepoints)
+                except UpgradeError as err:
+                    flash(str(err), "danger")
+                    return redirect(url_for("main.upgrade_attribute", player_id=player_id))
+
+                if player.badgepoints >= BADGEPOINT_COST:
                     setattr(player, badge_badgepoints, next_badge)
-                    player.badgepoints -= 1
+                    player.badgepoints -= BADGEPOINT_COST
+                    changes = [(badge_badgepoints, "badge", current_badge, next_badge)]
+                    record_milestones(player, changes, targets)
+                    record_upgrade(player, changes, badgepoints_spent=BADGEPOINT_COST)
                     db.session.commit()
                     formatted_badge_name = format_attribute_name(badge_badgepoints)
                     flash(
@@ -597,22 +563,23 @@ def upgrade_attribute():
                 else:
                     flash("Not enough points to upgrade this badge.", "danger")
 
-        return redirect(url_for("upgrade_attribute", player_id=player_id))
+        return redirect(url_for("main.upgrade_attribute", player_id=player_id))
 
     # Handle GET request: display the player and attributes
     player = None
     if "player_id" in request.args:
-        player_id = request.args.get("player_id")
-        player = Player.query.get(player_id)
+        # Only shown here, so the ratings come from the packed columns.
+        roster = Player.packed_roster(current_user.id, player_id=request.args.get("player_id"))
 
-        if player:
-            targets = PlayerTargets.query.filter_by(player_id=player_id).first()
+        if roster:
+            player, targets = roster[0]
             if targets:
                 target_values = {attr: getattr(targets, attr, 99) for attr in attribute_list}
                 target_badges = {badge: getattr(targets, badge, "Legendary") for badge in badge_list}
 
-    # Fetch only the players created by the logged-in user
-    players = Player.query.filter_by(user_id=current_user.id).all()
+    # Fetch only the players created by the logged-in user, for the dropdown
+    with replica_reads():
+        players = Player.roster_summary(current_user.id)
 
     return render_template(
         "upgrade_attribute.html", 
@@ -625,26 +592,276 @@ def upgrade_attribute():
         badge_levels=badge_levels,
     )
 
-# Helper function to determine next badge level
-def get_next_badge_level(current_badge):
+@main.route("/upgrade_batch", methods=["POST"])
+@login_required
+def upgrade_batch():
+    """
+    Applying a list of multi-step upgrades in one transaction.
+    Accepts JSON ({"player_id": 1, "upgrades": [...]}) or a form with one upgrade per line,
+    e.g. "three_point_shot 72→85" or "deadeye None→Gold with badgepoints".
+    """
+    wants_json = request.is_json
+    if wants_json:
+        payload = request.get_json(silent=True) or {}
+        player_id = payload.get("player_id")
+        raw_upgrades = payload.get("upgrades", [])
+    else:
+        player_id = request.form.get("player_id")
+        raw_upgrades = [line for line in request.form.get("upgrades", "").splitlines() if line.strip()]
+
+    player = (
+        Player.query.options(*RATINGS_LOADED).with_for_update().filter_by(id=player_id).first()
+        if player_id else None
+    )
+    if not player or player.user_id != current_user.id:
+        if wants_json:
+            return jsonify({"success": False, "error": "Player not found."}), 404
+        flash("Player not found.", "danger")
+        return redirect(url_for("main.upgrade_attribute"))
+
+    try:
+        if not isinstance(raw_upgrades, list) or not raw_upgrades:
+            raise UpgradeError("No upgrades given.")
+        upgrades = [parse_upgrade(spec) for spec in raw_upgrades]
+        steps, devpoints_spent, badgepoints_spent = apply_upgrades(player, upgrades)
+        changes = [(step["name"], step["kind"], step["start"], step["end"]) for step in steps]
+        record_milestones(player, changes)
+        record_upgrade(player, changes, devpoints_spent, badgepoints_spent)
+    except UpgradeError as err:
+        db.session.rollback()
+        if wants_json:
+            return jsonify({"success": False, "error": str(err)}), 400
+        flash(str(err), "danger")
+        return redirect(url_for("main.upgrade_attribute", player_id=player.id))
+
+    db.session.commit()
+
+    if wants_json:
+        return jsonify({
+            "success": True,
+            "upgrades": steps,
+            "devpoints_spent": devpoints_spent,
+            "badgepoints_spent": badgepoints_spent,
+            "devpoints": player.devpoints,
+            "badgepoints": player.badgepoints,
+        })
+
+    flash(
+        f"Success! {len(steps)} upgrades applied. {devpoints_spent} devpoints and "
+        f"{badgepoints_spent} badge points used.",
+        "success"
+    )
+    return redirect(url_for("main.upgrade_attribute", player_id=player.id))
+
+@main.route("/upgrades/<int:player_id>/undo", methods=["POST"])
+@login_required
+def undo_upgrade(player_id):
+    """
+    Undoing the player's last upgrades, newest first, and giving their points back.
+    Accepts JSON ({"steps": 2}) or a form; one step by default.
+    """
+    wants_json = request.is_json
+    payload = (request.get_json(silent=True) or {}) if wants_json else request.form
+    player = Player.query.options(*RATINGS_LOADED).with_for_update().filter_by(id=player_id).first()
+    if not player or player.user_id != current_user.id:
+        if wants_json:
+            return jsonify({"success": False, "error": "Player not found."}), 404
+        flash("Player not found.", "danger")
+        return redirect(url_for("main.upgrade_attribute"))
+
+    try:
+        steps = int(payload.get("steps", 1))
+        if not 1 <= steps <= MAX_UNDO_STEPS:
+            raise ValueError
+    except (TypeError, ValueError):
+        error = f"steps must be a whole number from 1 to {MAX_UNDO_STEPS}."
+        if wants_json:
+            return jsonify({"success": False, "error": error}), 400
+        flash(error, "danger")
+        return redirect(url_for("main.upgrade_attribute", player_id=player.id))
+
+    try:
+        undone = undo_upgrades(player, steps)
+    except UpgradeError as err:
+        db.session.rollback()
+        if wants_json:
+            return jsonify({"success": False, "error": str(err)}), 409
+        flash(str(err), "danger")
+        return redirect(url_for("main.upgrade_attribute", player_id=player.id))
+
+    db.session.commit()
+
+    if wants_json:
+        return jsonify({
+            "success": True,
+            "undone": [entry.seq for entry in undone],
+            "devpoints": player.devpoints,
+            "badgepoints": player.badgepoints,
+        })
+    flash(f"Undid {len(undone)} upgrade{'s' if len(undone) != 1 else ''}.", "success")
+    return redirect(url_for("main.upgrade_attribute", player_id=player.id))
+
+@main.route("/upgrades/<int:player_id>/history")
+@login_required
+@read_only_view
+def upgrade_history(player_id):
+    """
+    The player's upgrade ledger, newest first. Optional: ?limit= (up to 500).
+    """
+    player = Player.query.get_or_404(player_id)
+    if player.user_id != current_user.id:
+        return jsonify({"success": False, "error": "Player not found."}), 404
+    limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+    return jsonify({"success": True, "entries": recent_entries(player.id, limit)})
+
+@main.route("/upgrades/<int:player_id>/as_of")
+@login_required
+@read_only_view
+def player_as_of(player_id):
+    """
+    The player's ratings at a past moment, e.g. ?at=2025-01-31T20:00:00 (UTC unless an offset is given).
+    """
+    player = Player.query.get_or_404(player_id)
+    if player.user_id != current_user.id:
+        return jsonify({"success": False, "error": "Player not found."}), 404
+    try:
+        moment = datetime.fromisoformat(request.args.get("at", ""))
+    except ValueError:
+        return jsonify({"success": False, "error": "at must be an ISO 8601 date and time."}), 400
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    state = ratings_as_of(player, moment)
+    return jsonify({"success": True, "player_id": player.id, "at": moment.isoformat(), **state})
+
+@main.route("/progression/<int:player_id>")
+@login_required
+@read_only_view
+def player_progression(player_id):
+    """
+    The player's progression over time for charts, from the day and week rollups.
+    Optional: ?period=auto|day|week, ?points= (up to MAX_POINTS), ?from=&to= (dates),
+    ?ratings=all|none|agility,dimer,...
+    """
+    player = Player.query.get_or_404(player_id)
+    if player.user_id != current_user.id:
+        return jsonify({"success": False, "error": "Player not found."}), 404
+    try:
+        start, end = (
+            date.fromisoformat(request.args[name]) if request.args.get(name) else None
+            for name in ("from", "to")
+        )
+    except ValueError:
+        return jsonify({"success": False, "error": "from and to must be dates like 2025-01-31."}), 400
+    points = min(max(request.args.get("points", DEFAULT_POINTS, type=int), 2), MAX_POINTS)
+    ratings = request.args.get("ratings", "all")
+    if ratings == "all":
+        ratings = None
+    elif ratings == "none":
+        ratings = ()
+    else:
+        ratings = [name.strip() for name in ratings.split(",") if name.strip()]
+
+    try:
+        series = progression_series(player, request.args.get("period", "auto"), points, start, end, ratings)
+    except ProgressionError as err:
+        return jsonify({"success": False, "error": str(err)}), 400
+    return jsonify({"success": True, "player_id": player.id, **series})
+
+@main.route("/plan/<int:player_id>")
+@login_required
+@read_only_view
+def plan_player(player_id):
+    """
+    Ranked upgrade plan toward a player's targets. The budget defaults to the
+    player's current points and can be overridden with ?devpoints=&badgepoints=.
+    """
+    roster = Player.packed_roster(current_user.id, player_id=player_id)
+    if not roster:
+        return jsonify({"success": False, "error": "Player not found."}), 404
+    player, targets = roster[0]
+
+    plan = plan_upgrades(
+        player,
+        targets,
+        devpoints=request.args.get("devpoints", type=int),
+        badgepoints=request.args.get("badgepoints", type=int),
+    )
+    return jsonify({"success": True, "plan": plan})
+
+@main.route("/plan/<int:player_id>/projection")
+@login_required
+def project_player_targets(player_id):
+    """
+    Monte Carlo projection of when each target is reached, with percentile bands.
+    Optional: ?simulations=&seasons=&games_per_season=&seed=
+    """
+    with replica_reads():
+        roster = Player.packed_roster(current_user.id, player_id=player_id)
+    if not roster:
+        return jsonify({"success": False, "error": "Player not found."}), 404
+    player, targets = roster[0]
+
+    simulations = request.args.get("simulations", 10000, type=int)
+    seasons = request.args.get("seasons", 3, type=int)
+    games_per_season = request.args.get("games_per_season", 82, type=int)
+    if not (1 <= simulations <= 50000 and 1 <= seasons <= 10 and 1 <= games_per_season <= 82):
+        return jsonify({
+            "success": False,
+            "error": "Use 1-50000 simulations, 1-10 seasons and 1-82 games per season.",
+        }), 400
+
+    # The point table may have to be created, so it is read on the primary.
+    rules = scoring_rules_for(current_user)
+    try:
+        with replica_reads():
+            projection = project_player(
+                player,
+                targets,
+                rules,
+                simulations=simulations,
+                seasons=seasons,
+                games_per_season=games_per_season,
+                seed=request.args.get("seed", 0, type=int),
+            )
+    except ProjectionError as err:
+        return jsonify({"success": False, "error": str(err)}), 400
+    return jsonify({"success": True, "projection": projection})
+
+@main.route("/plan")
+@login_required
+@read_only_view
+def plan_roster():
+    """
+    Upgrade plans for the user's whole roster in one request.
+    Pass ?steps=0 to leave out the step-by-step lists.
     """
-    Helper function to determine next badge level.
+    include_steps = request.args.get("steps", "1") != "0"
+    plans = []
+    for player, targets in Player.packed_roster(current_user.id):
+        plan = plan_upgrades(player, targets)
+        if not include_steps:
+            plan.pop("steps")
+        plans.append(plan)
+    return jsonify({"success": True, "plans": plans})
+
+@main.route("/metrics/user_cache")
+@login_required
+def user_cache_metrics():
+    """
+    Hit rate and counters of this process's login identity cache, when EXPOSE_METRICS is set.
     """
-    badge_levels = ["None", "Bronze", "Silver", "Gold", "Hall of Fame", "Legendary"]
-    if current_badge in badge_levels:
-        next_level_index = badge_levels.index(current_badge) + 1
-        if next_level_index < len(badge_levels):
-            return badge_levels[next_level_index]
-    return current_badge
+    if not current_app.config["EXPOSE_METRICS"]:
+        return jsonify({"success": False, "error": "Not found."}), 404
+    return jsonify({"success": True, "user_cache": user_cache.stats()})
 
-@app.route("/")
+@main.route("/")
 def home():
     """
     This will render the home page when users go to the root URL.
     """
     return render_template("home.html")
 
-@app.route("/login/google")
+@main.route("/login/google")
 def google_login():
     """
     Initiates Google login. This route is for user authentication only.
@@ -652,16 +869,17 @@ def google_login():
     """
     nonce = "".join(random.choices(string.ascii_letters + string.digits, k=16))
     session["nonce"] = nonce
-    redirect_uri = app.config["LOGIN_REDIRECT_URI"]
-    return google.authorize_redirect(redirect_uri, nonce=nonce)
+    redirect_uri = current_app.config["LOGIN_REDIRECT_URI"]
+    return google_oauth().authorize_redirect(redirect_uri, nonce=nonce)
 
-@app.route("/login/callback")
+@main.route("/login/callback")
 def google_authorize():
     """
     Handling the Google authorisation callback for user login.
     Note: We do NOT request gmail.send scope or store token.json here.
     This is strictly for authenticating the user.
     """
+    google = google_oauth()
     token = google.authorize_access_token()
     nonce = session.get("nonce")
     user_info = google.parse_id_token(token, nonce=nonce)
@@ -684,9 +902,9 @@ def google_authorize():
 
     # Log the user in
     login_user(user)
-    return redirect(url_for("dashboard"))
+    return redirect(url_for("main.dashboard"))
 
-@app.route("/profile", methods=["GET", "POST"])
+@main.route("/profile", methods=["GET", "POST"])
 @login_required
 def profile():
     """
@@ -712,19 +930,19 @@ def profile():
                 "danger"
             )
 
-        return redirect(url_for("profile"))
+        return redirect(url_for("main.profile"))
 
     # Render the profile page
     return render_template("profile.html", user=current_user)
 
-@app.route("/confirm/<token>")
+@main.route("/confirm/<token>")
 def confirm_email(token):
     """Logic for confirming the e-mail address."""
     try:
         email = confirm_token(token)
     except:
         flash("The confirmation link is invalid or has expired.", "danger")
-        return redirect(url_for("login"))
+        return redirect(url_for("main.login"))
 
     user = User.query.filter_by(email=email).first_or_404()
 
@@ -735,9 +953,9 @@ def confirm_email(token):
         db.session.commit()
         flash("Your account has been confirmed!", "success")
 
-    return redirect(url_for("login"))
+    return redirect(url_for("main.login"))
 
-@app.route("/forgot_password", methods=["GET", "POST"])
+@main.route("/forgot_password", methods=["GET", "POST"])
 def forgot_password():
     """Resetting the user's password."""
     if request.method == "POST":
@@ -746,14 +964,14 @@ def forgot_password():
 
         if user:
             token = generate_confirmation_token(user.email)
-            reset_url = url_for("reset_password", token=token, _external=True)
+            reset_url = url_for("main.reset_password", token=token, _external=True)
 
-            send_email(
-                "me", 
-                user.email, 
-                "Reset Your Password", 
+            queue_email(
+                user.email,
+                "Reset Your Password",
                 f"Click the link to reset your password: {reset_url}"
             )
+            db.session.commit()
 
             flash("A password reset link has been sent to your e-mail.", "info")
         else:
@@ -761,14 +979,14 @@ def forgot_password():
 
     return render_template("forgot_password.html")
 
-@app.route("/reset_password/<token>", methods=["GET", "POST"])
+@main.route("/reset_password/<token>", methods=["GET", "POST"])
 def reset_password(token):
     """Resetting the user's password."""
     try:
         email = confirm_token(token)
     except:
         flash("The password reset link is invalid or has expired.", "danger")
-        return redirect(url_for("forgot_password"))
+        return redirect(url_for("main.forgot_password"))
 
     if request.method == "POST":
         password = request.form.get("password")
@@ -776,7 +994,7 @@ def reset_password(token):
 
         if password != confirm_password:
             flash("Passwords do not match.", "danger")
-            return redirect(url_for("reset_password", token=token))
+            return redirect(url_for("main.reset_password", token=token))
 
         # Hash the new password and update the user
         user = User.query.filter_by(email=email).first()
@@ -784,11 +1002,11 @@ def reset_password(token):
         db.session.commit()
 
         flash("Your password has been updated!", "success")
-        return redirect(url_for("login"))
+        return redirect(url_for("main.login"))
 
     return render_template("reset_password.html", token=token)
 
-@app.route("/delete_account", methods=["POST"])
+@main.route("/delete_account", methods=["POST"])
 @login_required
 def delete_account():
     """Deleting the customer's account."""
@@ -806,12 +1024,12 @@ def delete_account():
         logout_user()
 
         flash("Your account and all related date have been deleted.", "info")
-        return redirect(url_for("home"))
+        return redirect(url_for("main.home"))
     else:
         flash("Account not found.", "danger")
-        return redirect(url_for("profile"))
+        return redirect(url_for("main.profile"))
 
-@app.route("/delete_player/<int:player_id>", methods=["POST"])
+@main.route("/delete_player/<int:player_id>", methods=["POST"])
 @login_required
 def delete_player(player_id):
     """
@@ -822,15 +1040,15 @@ def delete_player(player_id):
     # Ensure that the logged-in user is the owner of the player
     if player.user_id != current_user.id:
         flash("You do not have permission to delete this player.", "danger")
-        return redirect(url_for("dashboard"))
+        return redirect(url_for("main.dashboard"))
 
     # Delete the player
     db.session.delete(player)
     db.session.commit()
     flash("Player has been deleted.", "success")
-    return redirect(url_for("dashboard"))
+    return redirect(url_for("main.dashboard"))
 
-@app.route("/logout", methods=["POST"])
+@main.route("/logout", methods=["POST"])
 @login_required
 def logout():
     """
@@ -838,9 +1056,9 @@ def logout():
     """
     logout_user()
     flash("You have been logged out.", "success")
-    return redirect(url_for("login"))
+    return redirect(url_for("main.login"))
 
-@app.route("/settings", methods=["GET", "POST"])
+@main.route("/settings", methods=["GET", "POST"])
 @login_required
 def settings():
     """
@@ -848,96 +1066,20 @@ def settings():
     """
     return render_template("settings.html")
 
-@app.route("/target_settings", methods=["GET", "POST"])
+@main.route("/target_settings", methods=["GET", "POST"])
 @login_required
 def target_settings():
     """
     Handle target value settings for players.
     """
-    players = Player.query.filter_by(user_id=current_user.id).all()
+    with replica_reads():
+        players = Player.roster_summary(current_user.id)
     selected_player = None
     target_values = {}
     target_badges = {}
-    attribute_list = [
-        'agility', 
-        'ball_handle', 
-        'block',
-        'close_shot',
-        'defensive_consistency', 
-        'defensive_rebound', 
-        'draw_foul', 
-        'driving_dunk', 
-        'free_throw', 
-        'hands', 
-        'help_defense_iq', 
-        'hustle', 
-        'intangibles', 
-        'interior_defense', 
-        'layup', 
-        'mid_range_shot', 
-        'offensive_consistency', 
-        'offensive_rebound', 
-        'overall_durability', 
-        'pass_accuracy', 
-        'pass_iq', 
-        'pass_perception', 
-        'pass_vision', 
-        'perimeter_defense', 
-        'post_control', 
-        'post_fade', 
-        'post_hook', 
-        'shot_iq', 
-        'standing_dunk', 
-        'speed', 
-        'speed_with_ball', 
-        'stamina', 
-        'steal', 
-        'strength', 
-        'three_point_shot', 
-        'vertical'
-        ]
-    badge_list = [
-        "aerial_wizard", 
-        "ankle_assassin", 
-        "bail_out", 
-        "boxout_beast", 
-        "break_starter", 
-        "brick_wall", 
-        "challenger", 
-        "deadeye", 
-        "dimer", 
-        "float_game", 
-        "glove", 
-        "handles_for_days", 
-        "high_flying_denier", 
-        "hook_specialist", 
-        "immovable_enforcer", 
-        "interceptor", 
-        "layup_mixmaster", 
-        "lightning_launch", 
-        "limitless_range", 
-        "mini_marksman", 
-        "off_ball_pest", 
-        "on_ball_menace", 
-        "paint_patroller", 
-        "paint_prodigy", 
-        "pick_dodger", 
-        "pogo_stick", 
-        "posterizer", 
-        "post_fade_phenom", 
-        "post_lockdown", 
-        "post_powerhouse", 
-        "post_up_poet", 
-        "physical_finisher", 
-        "rebound_chaser", 
-        "rise_up",
-        "set_shot_specialist", 
-        "shifty_shooter", 
-        "slippery_off_ball", 
-        "strong_handle", 
-        "unpluckable", 
-        "versatile_visionary"
-        ]
+    scrape_job = None
+    attribute_list = ATTRIBUTE_NAMES
+    badge_list = BADGE_NAMES
 
     if request.method == "POST":
         player_id = request.form.get("player_id")
@@ -956,26 +1098,43 @@ def target_settings():
             if "scrape_player" in request.form:
                 player_url_part = request.form.get("player_url_part")
                 if player_url_part:
-                    scraped_data = scrape_player_data(player_url_part)
-                    if "error" not in scraped_data:
-                        target_values.update(scraped_data.get("attributes", target_values))
-                        # target_badges.update(scraped_data.get("badges", target_badges))
-                        for badge in badge_list:
-                            target_badges[badge] = scraped_data.get("badges", {}).get(badge, "None")
-                        flash("Player data scraped successfully!", "success")
+                    try:
+                        job = submit_job(player_url_part.strip()[:200], current_user.id)
+                    except ScrapeQueueFull:
+                        flash(SCRAPE_BUSY_MESSAGE, "danger")
                     else:
-                        flash(scraped_data["error"], "danger")
+                        scraped = job_payload(job)
+                        if job.status == "done":
+                            scraped_data = scraped["player_data"]
+                            target_values.update(scraped_data.get("attributes", target_values))
+                            for badge in badge_list:
+                                target_badges[badge] = scraped_data.get("badges", {}).get(badge, "None")
+                            flash("Player data scraped successfully!", "success")
+                        elif job.status == "failed":
+                            flash(scraped["error"], "danger")
+                        else:
+                            # The page polls the job and fills in the form once it is done.
+                            scrape_job = dict(scraped, status_url=url_for("main.scrape_job_status", job_id=job.id))
+                            flash("Fetching player data in the background; the form fills in when it is ready.", "info")
             elif "save_targets" in request.form and selected_player:
                 targets = PlayerTargets.query.filter_by(player_id=selected_player.id).first()
 
                 if not targets:
                     targets = PlayerTargets(player_id=selected_player.id)
                     db.session.add(targets)
-                for attr in attribute_list:
-                    setattr(targets, attr, int(request.form.get(f"target_{attr}", 99)))
-
-                for badge in badge_list:
-                    setattr(targets, badge, request.form.get(f"target_{badge}", "Legendary"))
+                values, errors = parse_rating_form(
+                    request.form,
+                    prefix="target_",
+                    attribute_default=DEFAULT_ATTRIBUTE_TARGET,
+                    badge_default=DEFAULT_BADGE_TARGET,
+                )
+                if errors:
+                    db.session.rollback()
+                    for error in errors:
+                        flash(error["message"], "danger")
+                    return redirect(url_for('main.target_settings', player_id=selected_player.id))
+                for name, value in values.items():
+                    setattr(targets, name, value)
 
                 if not targets:
                     targets = PlayerTargets(player_id=player_id)
@@ -984,7 +1143,7 @@ def target_settings():
                 db.session.commit()
                 flash("Target values saved successfully!", "success")
 
-                return redirect(url_for('target_settings', player_id=selected_player.id))
+                return redirect(url_for('main.target_settings', player_id=selected_player.id))
 
     return render_template(
         "target_settings.html",
@@ -992,12 +1151,12 @@ def target_settings():
         selected_player=selected_player,
         target_values=target_values,
         target_badges=target_badges,
-        attribute_list=attribute_list,
-        badge_list=badge_list,
-        getattr=getattr
+        scrape_job=scrape_job,
+        getattr=getattr,
+        **rating_template_context()
     )
 
-@app.route("/point_system", methods=["GET", "POST"])
+@main.route("/point_system", methods=["GET", "POST"])
 @login_required
 def point_system():
     """
@@ -1007,9 +1166,26 @@ def point_system():
 
     if request.method == "POST":
         if "revert_default" in request.form:
+            current_user.settings_version += 1
             reset_to_defaults(user_settings)
             flash("Settings have been reverted to default.", "success")
         elif "save_points" in request.form:
+            # Points are never taken away: the projection relies on running totals that only grow.
+            invalid = []
+            for name in get_default_settings():
+                try:
+                    if int(request.form.get(name, "")) < 0:
+                        invalid.append(name)
+                except ValueError:
+                    invalid.append(name)
+            if invalid:
+                flash(
+                    "Point values must be whole numbers of 0 or more: "
+                    f"{', '.join(invalid)}.",
+                    "danger"
+                )
+                return redirect(url_for("main.point_system"))
+
             # Update the settings with form values
             user_settings.points_70 = request.form['points_70']
             user_settings.points_60 = request.form['points_60']
@@ -1051,6 +1227,7 @@ def point_system():
             user_settings.champion_points = request.form['champion_points']
             user_settings.champion_badge = request.form['champion_badge']
 
+            current_user.settings_version += 1
             db.session.commit()
             flash("Settings have been saved.", "success")
 
@@ -1201,21 +1378,21 @@ def get_default_settings():
         'champion_badge': 2,
     }
 
-@app.route("/about")
+@main.route("/about")
 def about():
     """
     Generating the about page.
     """
     return render_template("about.html")
 
-@app.route("/cookies")
+@main.route("/cookies")
 def cookies():
     """
     Generating the cookies page.
     """
     return render_template("cookies.html")
 
-@app.route("/contact", methods=["GET", "POST"])
+@main.route("/contact", methods=["GET", "POST"])
 def contact():
     """
     Creating the contact page.
@@ -1227,44 +1404,79 @@ def contact():
 
         if not name or not email or not message:
             flash("All fields are required.", "danger")
-            return redirect(url_for("about"))
+            return redirect(url_for("main.about"))
 
         # Create the e-mail content
         subject = f"Contact Form Submission from {name}"
         message_text = f"Message from {name} ({email}):\n\n{message}"
 
         try:
-            # Use the send_email function to send the message
-            send_email(user_id="me", recipient=app.config["MAIL_DEFAULT_RECIPIENT"], subject=subject, message_text=message_text)
+            # Queue the message; the outbox worker delivers it
+            queue_email(current_app.config["MAIL_DEFAULT_RECIPIENT"], subject, message_text)
+            db.session.commit()
             flash("Your message has been sent. We will get back to you shortly.", "success")
         except Exception as e:
+            db.session.rollback()
             flash(f"Failed to send message: {str(e)}", "danger")
 
-        return redirect(url_for("about"))
+        return redirect(url_for("main.about"))
 
     return render_template("about.html")
 
-@app.route("/scrape_player", methods=["POST"])
+def scrape_job_response(job):
+    """
+    JSON for a scrape job: 202 with the polling URL while it runs, 200 once it is done or failed.
+    """
+    payload = job_payload(job)
+    body = {
+        "success": payload["status"] != "failed",
+        "job": payload,
+        "status_url": url_for("main.scrape_job_status", job_id=job.id),
+    }
+    if "player_data" in payload:
+        body["player_data"] = payload["player_data"]
+    if "error" in payload:
+        body["error"] = payload["error"]
+    if job.status in PENDING_STATUSES:
+        return jsonify(body), 202, {"Location": body["status_url"]}
+    return jsonify(body)
+
+@main.route("/scrape_player", methods=["POST"])
 def scrape_player():
-    """Scraping the player data from 2kratings.com"""
-    try:
-        player_url_part = request.json.get("player_url_part")
-        if not player_url_part:
-            return jsonify({"success": False, "error": "Invalid player URL part."})
-
-        player_data = scrape_player_data(player_url_part)
+    """Submitting a 2Kratings lookup as a background job; the response says where to poll for it."""
+    player_url_part = ((request.get_json(silent=True) or {}).get("player_url_part") or "").strip()
+    if not player_url_part or len(player_url_part) > 200:
+        return jsonify({"success": False, "error": "Invalid player URL part."}), 400
 
-        if not player_data or "error" in player_data:
-            error_message = player_data.get("error", "Unable to retrieve player data. Please check the player URL part.")
-            return jsonify({"success": False, "error": error_message}), 404
-
-        return jsonify({"success": True, "player_data": player_data})
-    except requests.exceptions.RequestException as e:
-        return jsonify({"success": False, "error": "Network error occurred while fetching player data."}), 500
-    except Exception as e:
-        return jsonify({"success": False, "error": "An unexpected error occurred."}), 500
-
-@app.route("/manual")
+    user_id = current_user.id if current_user.is_authenticated else None
+    try:
+        job = submit_job(player_url_part, user_id)
+    except ScrapeQueueFull:
+        response = jsonify({"success": False, "error": SCRAPE_BUSY_MESSAGE})
+        return response, 503, {"Retry-After": "5"}
+    return scrape_job_response(job)
+
+@main.route("/scrape_player/<job_id>")
+def scrape_job_status(job_id):
+    """Polling a scrape job submitted by this user."""
+    user_id = current_user.id if current_user.is_authenticated else None
+    job = get_job(job_id, user_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Unknown lookup."}), 404
+    return scrape_job_response(job)
+
+@main.route("/ratings_search")
+@login_required
+def ratings_search():
+    """Searching the offline ratings snapshot by player name."""
+    query = request.args.get("q", "")
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return jsonify({"success": False, "error": "No ratings snapshot available."}), 404
+    results = [{"slug": slug, "name": name} for slug, name in snapshot.search(query)]
+    return jsonify({"success": True, "results": results})
+
+@main.route("/manual")
 def manual():
     """
     Render the manual page.
@@ -1272,5 +1484,5 @@ def manual():
     return render_template("manual.html")
 
 def format_attribute_name(attribute):
-    """Converts snake_case attribute names to Title Case with spaces."""
-    return attribute.replace('_', ' ').title()
+    """Display label of an attribute or badge, e.g. "Mid-Range Shot"."""
+    return rating_label(attribute)
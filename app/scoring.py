@@ -0,0 +1,310 @@
+"""
+This is the scoring engine that turns game statistics into development and badge points.
+"""
+
+import csv
+import io
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+STAT_COLUMNS = ("points", "rebounds", "assists", "steals", "blocks")
+
+AWARD_COLUMNS = (
+    "player_of_the_game",
+    "player_of_the_week",
+    "player_of_the_month",
+    "roty",
+    "dpoy",
+    "mvp",
+    "champion",
+)
+
+# Tiered rules, lowest threshold first. Only the highest reached tier pays out.
+POINTS_TIERS = (
+    (20, "points_20"),
+    (30, "points_30"),
+    (40, "points_40"),
+    (50, "points_50"),
+    (60, "points_60"),
+    (70, "points_70"),
+)
+STEALS_TIERS = ((3, "steals_3"), (6, "steals_6"), (10, "steals_10"))
+BLOCKS_TIERS = ((3, "blocks_3"), (6, "blocks_6"), (10, "blocks_10"))
+
+# Single stat lines between 10 and 19 only count when there is no double double.
+SINGLE_DIGIT_KEYS = (
+    ("points", "points_10"),
+    ("rebounds", "rebounds_10"),
+    ("assists", "assists_10"),
+)
+TWENTY_KEYS = (("rebounds", "rebounds_20"), ("assists", "assists_20"))
+
+DOUBLE_DOUBLE_KEYS = (
+    (2, "double_double_2"),
+    (3, "double_double_3"),
+    (4, "double_double_4"),
+    (5, "double_double_5"),
+)
+
+# Award flag -> (devpoints setting, badgepoints setting)
+AWARD_KEYS = {
+    "player_of_the_game": ("player_of_the_game", None),
+    "player_of_the_week": ("player_of_the_week", None),
+    "player_of_the_month": ("player_of_the_month", None),
+    "roty": ("roty_points", "roty_badge"),
+    "dpoy": ("dpoy_points", "dpoy_badge"),
+    "mvp": ("mvp_points", "mvp_badge"),
+    "champion": ("champion_points", "champion_badge"),
+}
+
+TRUTHY_VALUES = {"1", "true", "yes", "y", "x", "on"}
+
+
+class BoxScoreError(ValueError):
+    """
+    Raised when an imported box score cannot be parsed.
+    """
+
+
+def _setting(settings, key):
+    """
+    Read a point value from a UserSettings row or a plain dictionary.
+    Only used when compiling; scoring itself reads ScoringRules.
+    """
+    if isinstance(settings, dict):
+        return int(settings[key])
+    return int(getattr(settings, key))
+
+
+def _frozen(values):
+    array = np.array(values, dtype=np.int64)
+    array.flags.writeable = False
+    return array
+
+
+class ScoringRules:
+    """
+    A point table compiled into lookup arrays, so scoring reads no settings attributes.
+    Build it with compile_scoring_rules; it is never changed afterwards.
+    """
+    __slots__ = (
+        "points_thresholds", "points_awards",
+        "steals_thresholds", "steals_awards",
+        "blocks_thresholds", "blocks_awards",
+        "single_digit", "twenty", "double_double", "award_devpoints", "award_badgepoints",
+    )
+
+    def __init__(self, **tables):
+        for name in self.__slots__:
+            object.__setattr__(self, name, tables[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ScoringRules is read-only.")
+
+
+def _compile_tiers(tiers, settings):
+    # Index 0 pays nothing: the value is below the lowest threshold.
+    return _frozen([threshold for threshold, _ in tiers]), _frozen([0] + [_setting(settings, key) for _, key in tiers])
+
+
+def compile_scoring_rules(settings):
+    """
+    Compile a UserSettings row or a plain dictionary into ScoringRules.
+    """
+    points_thresholds, points_awards = _compile_tiers(POINTS_TIERS, settings)
+    steals_thresholds, steals_awards = _compile_tiers(STEALS_TIERS, settings)
+    blocks_thresholds, blocks_awards = _compile_tiers(BLOCKS_TIERS, settings)
+    # Points per number of double-digit stats, from 0 to all of STAT_COLUMNS.
+    double_double = [0] * (len(STAT_COLUMNS) + 1)
+    for count, key in DOUBLE_DOUBLE_KEYS:
+        double_double[count] = _setting(settings, key)
+    return ScoringRules(
+        points_thresholds=points_thresholds,
+        points_awards=points_awards,
+        steals_thresholds=steals_thresholds,
+        steals_awards=steals_awards,
+        blocks_thresholds=blocks_thresholds,
+        blocks_awards=blocks_awards,
+        single_digit=tuple((stat, _setting(settings, key)) for stat, key in SINGLE_DIGIT_KEYS),
+        twenty=tuple((stat, _setting(settings, key)) for stat, key in TWENTY_KEYS),
+        double_double=_frozen(double_double),
+        award_devpoints=_frozen([_setting(settings, AWARD_KEYS[award][0]) for award in AWARD_COLUMNS]),
+        award_badgepoints=_frozen([
+            _setting(settings, AWARD_KEYS[award][1]) if AWARD_KEYS[award][1] else 0 for award in AWARD_COLUMNS
+        ]),
+    )
+
+
+# Compiled rules per user, for the settings version they were compiled from.
+RULES_CACHE_SIZE = 4096
+_rules_cache = OrderedDict()
+_rules_lock = threading.Lock()
+
+
+def cached_scoring_rules(user_id, settings_version, load_settings):
+    """
+    The compiled rules for a user's current settings version.
+    `load_settings` is only called on a miss, i.e. once per process after every settings change.
+    """
+    with _rules_lock:
+        entry = _rules_cache.get(user_id)
+        if entry is not None and entry[0] == settings_version:
+            _rules_cache.move_to_end(user_id)
+            return entry[1]
+    rules = compile_scoring_rules(load_settings())
+    with _rules_lock:
+        _rules_cache[user_id] = (settings_version, rules)
+        _rules_cache.move_to_end(user_id)
+        while len(_rules_cache) > RULES_CACHE_SIZE:
+            _rules_cache.popitem(last=False)
+    return rules
+
+
+def score_games(settings, stats):
+    """
+    Score a batch of games at once.
+
+    `settings` is a ScoringRules, or a UserSettings row or dictionary that is
+    compiled on the spot. `stats` maps every name in STAT_COLUMNS and
+    AWARD_COLUMNS (plus an optional `manual_devpoints`) to an array-like with
+    one entry per game. Missing columns count as zero. Returns two integer
+    arrays: devpoints and badgepoints.
+    """
+    rules = settings if isinstance(settings, ScoringRules) else compile_scoring_rules(settings)
+    n_games = len(next(iter(stats.values()))) if stats else 0
+    columns = {
+        name: np.asarray(stats.get(name, np.zeros(n_games)), dtype=np.int64)
+        for name in STAT_COLUMNS
+    }
+    awards = np.column_stack([
+        np.asarray(stats.get(name, np.zeros(n_games)), dtype=bool) for name in AWARD_COLUMNS
+    ]).reshape(n_games, len(AWARD_COLUMNS))
+    manual = np.asarray(stats.get("manual_devpoints", np.zeros(n_games)), dtype=np.int64)
+
+    double_double_count = sum((columns[name] >= 10).astype(np.int64) for name in STAT_COLUMNS)
+
+    # Rebounds, assists and points between 10 and 19 without a double double
+    devpoints = np.zeros(n_games, dtype=np.int64)
+    no_double_double = double_double_count <= 1
+    for stat, value in rules.single_digit:
+        in_range = no_double_double & (columns[stat] >= 10) & (columns[stat] < 20)
+        devpoints += in_range * value
+
+    # Only the highest reached tier pays out
+    devpoints += rules.points_awards[np.searchsorted(rules.points_thresholds, columns["points"], side="right")]
+
+    for stat, value in rules.twenty:
+        devpoints += (columns[stat] >= 20) * value
+
+    # Double double, triple double and beyond
+    devpoints += rules.double_double[double_double_count]
+
+    devpoints += rules.steals_awards[np.searchsorted(rules.steals_thresholds, columns["steals"], side="right")]
+    devpoints += rules.blocks_awards[np.searchsorted(rules.blocks_thresholds, columns["blocks"], side="right")]
+
+    devpoints += awards @ rules.award_devpoints
+    badgepoints = awards @ rules.award_badgepoints
+
+    devpoints += np.where(manual > 0, manual, 0)
+
+    return devpoints, badgepoints
+
+
+def score_game(settings, **stat_line):
+    """
+    Score a single game. Returns a (devpoints, badgepoints) tuple of ints.
+    """
+    devpoints, badgepoints = score_games(
+        settings, {name: [value] for name, value in stat_line.items()}
+    )
+    return int(devpoints[0]), int(badgepoints[0])
+
+
+def _parse_flag(value):
+    """
+    Interpret a CSV/JSON cell as an award flag.
+    """
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    return str(value).strip().lower() in TRUTHY_VALUES
+
+
+def _parse_int(value, field, row_number, default=0):
+    """
+    Interpret a CSV/JSON cell as an integer.
+    JSON booleans and fractional numbers are refused rather than truncated.
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return default
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise BoxScoreError(f"Row {row_number}: {field} must be a whole number.")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise BoxScoreError(f"Row {row_number}: {field} must be a whole number.")
+
+
+def parse_box_scores(raw, fmt="csv"):
+    """
+    Parse pasted or uploaded box scores into a list of row dictionaries.
+
+    Every row needs a `player_id` or `player` (name) column; stats, award flags,
+    `manual_devpoints` and `money` are optional.
+    """
+    if fmt == "json":
+        try:
+            records = json.loads(raw) if isinstance(raw, str) else raw
+        except json.JSONDecodeError as err:
+            raise BoxScoreError(f"Invalid JSON: {err}")
+        if isinstance(records, dict):
+            records = records.get("games", [])
+        if not isinstance(records, list):
+            raise BoxScoreError("JSON box scores must be a list of games.")
+    elif fmt == "csv":
+        records = list(csv.DictReader(io.StringIO(raw.strip())))
+    else:
+        raise BoxScoreError(f"Unsupported format: {fmt}")
+
+    rows = []
+    for row_number, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            raise BoxScoreError(f"Row {row_number}: expected an object.")
+        record = {str(key).strip().lower(): value for key, value in record.items() if key}
+        player_id = record.get("player_id")
+        player_name = record.get("player") or record.get("name")
+        if not player_id and not player_name:
+            raise BoxScoreError(f"Row {row_number}: player_id or player is required.")
+
+        row = {
+            "row": row_number,
+            "player_id": _parse_int(player_id, "player_id", row_number, default=None),
+            "player": player_name.strip() if isinstance(player_name, str) else player_name,
+            "manual_devpoints": _parse_int(record.get("manual_devpoints"), "manual_devpoints", row_number),
+            "money": _parse_int(record.get("money"), "money", row_number, default=None),
+        }
+        for name in STAT_COLUMNS:
+            row[name] = _parse_int(record.get(name), name, row_number)
+            if row[name] < 0:
+                raise BoxScoreError(f"Row {row_number}: {name} cannot be negative.")
+        for name in AWARD_COLUMNS:
+            row[name] = _parse_flag(record.get(name))
+        rows.append(row)
+    return rows
+
+
+def rows_to_columns(rows):
+    """
+    Turn parsed rows into the column arrays expected by score_games.
+    """
+    columns = {
+        name: np.fromiter((row[name] for row in rows), dtype=np.int64, count=len(rows))
+        for name in STAT_COLUMNS + ("manual_devpoints",)
+    }
+    for name in AWARD_COLUMNS:
+        columns[name] = np.fromiter((row[name] for row in rows), dtype=bool, count=len(rows))
+    return columns
@@ -0,0 +1,195 @@
+"""
+This is the background executor for 2Kratings lookups.
+
+Fetching and parsing a player page can take seconds, which is far too long to
+hold a sync gunicorn worker. A lookup is stored as a ScrapeJob row and run on a
+small thread pool in the process that took the request. The browser then polls
+the job by id, and any worker can answer because the state is in the database.
+Players found in the offline snapshot are answered straight away without a thread.
+
+Every process runs at most SCRAPE_JOB_WORKERS lookups at a time and lets at most
+SCRAPE_JOB_QUEUE more wait. Beyond that, submissions are refused with
+ScrapeQueueFull, so a burst of scrapes never ties up every worker. A job left
+unfinished by a process that died is reported as failed after SCRAPE_JOB_TIMEOUT.
+"""
+
+import json
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.models import ScrapeJob
+from utils.rating_registry import validate_rating_vectors
+from utils.ratings_snapshot import get_snapshot
+
+PENDING_STATUSES = ("queued", "running")
+
+_executor = None
+_executor_pid = None
+_pending = 0
+_lock = threading.Lock()
+
+
+class ScrapeQueueFull(RuntimeError):
+    """
+    Raised when this process already has as many lookups running and waiting as it takes.
+    """
+
+
+def _validated(player_data):
+    # Ratings the page got wrong are left out and reported, so they never reach a form or model.
+    if "error" in player_data:
+        return player_data
+    values, errors = validate_rating_vectors([{**player_data.get("attributes", {}), **player_data.get("badges", {})}])
+    return dict(
+        player_data,
+        attributes={name: value for name, value in values[0].items() if name in player_data.get("attributes", {})},
+        badges={name: value for name, value in values[0].items() if name in player_data.get("badges", {})},
+        invalid=errors,
+    )
+
+
+def snapshot_ratings(player_url_part):
+    """
+    Ratings from the offline snapshot, or None when it does not have the player.
+    """
+    snapshot = get_snapshot()
+    player_data = snapshot.lookup(player_url_part) if snapshot is not None else None
+    return None if player_data is None else _validated(player_data)
+
+
+def lookup_player_ratings(player_url_part):
+    """
+    Ratings from the offline snapshot when it has the player, otherwise scraped live.
+    """
+    player_data = snapshot_ratings(player_url_part)
+    if player_data is None:
+        # The scraper pulls in lxml and cloudscraper, which most requests never need.
+        from utils.scrape_2kratings import scrape_player_data
+
+        player_data = _validated(scrape_player_data(player_url_part))
+    return player_data
+
+
+def _get_executor(workers):
+    """
+    The process's thread pool, created on first use and again in every forked gunicorn worker.
+    """
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scrape-job")
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _finish(job, player_data):
+    job.finished_at = datetime.utcnow()
+    if "error" in player_data:
+        job.status = "failed"
+        job.error = str(player_data["error"])[:255]
+    else:
+        job.status = "done"
+        job.result = json.dumps(player_data)
+
+
+def submit_job(player_url_part, user_id=None):
+    """
+    Store a lookup and start it in the background. Snapshot hits come back already done.
+    Raises ScrapeQueueFull when this process has no room for another lookup.
+    """
+    global _pending
+    job = ScrapeJob(id=secrets.token_urlsafe(16), user_id=user_id, player_url_part=player_url_part)
+    player_data = snapshot_ratings(player_url_part)
+    if player_data is not None:
+        _finish(job, player_data)
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    config = current_app.config
+    with _lock:
+        if _pending >= config["SCRAPE_JOB_WORKERS"] + config["SCRAPE_JOB_QUEUE"]:
+            raise ScrapeQueueFull("Too many player lookups are in progress.")
+        _pending += 1
+    try:
+        db.session.add(job)
+        db.session.commit()
+        with _lock:
+            executor = _get_executor(config["SCRAPE_JOB_WORKERS"])
+        executor.submit(_run_job, current_app._get_current_object(), job.id)
+    except Exception:
+        with _lock:
+            _pending -= 1
+        raise
+    return job
+
+
+def _run_job(app, job_id):
+    """
+    Run one lookup on a pool thread, with its own app context and session.
+    """
+    global _pending
+    from requests.exceptions import RequestException
+
+    try:
+        with app.app_context():
+            job = db.session.get(ScrapeJob, job_id)
+            if job is None:
+                return
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            db.session.commit()
+            try:
+                player_data = lookup_player_ratings(job.player_url_part)
+            except RequestException:
+                player_data = {"error": "Network error occurred while fetching player data."}
+            except Exception:
+                app.logger.exception("Scrape job %s failed", job_id)
+                player_data = {"error": "An unexpected error occurred."}
+            _finish(job, player_data)
+            db.session.commit()
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def get_job(job_id, user_id=None):
+    """
+    The job if it belongs to the user (None for anonymous jobs), marking it failed when it
+    has been pending for longer than SCRAPE_JOB_TIMEOUT.
+    """
+    job = db.session.get(ScrapeJob, job_id)
+    if job is None or job.user_id != user_id:
+        return None
+    timeout = timedelta(seconds=current_app.config["SCRAPE_JOB_TIMEOUT"])
+    if job.status in PENDING_STATUSES and job.created_at < datetime.utcnow() - timeout:
+        _finish(job, {"error": "The lookup did not finish in time. Please try again."})
+        db.session.commit()
+    return job
+
+
+def job_payload(job):
+    """
+    The JSON-ready state of a job; player_data is only there once it is done.
+    """
+    payload = {"id": job.id, "status": job.status, "player_url_part": job.player_url_part}
+    if job.status == "done":
+        payload["player_data"] = json.loads(job.result)
+    elif job.status == "failed":
+        payload["error"] = job.error
+    return payload
+
+
+def purge_jobs(older_than=timedelta(hours=1)):
+    """
+    Delete jobs nobody is going to poll any more.
+    """
+    cutoff = datetime.utcnow() - older_than
+    deleted = ScrapeJob.query.filter(ScrapeJob.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
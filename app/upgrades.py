@@ -0,0 +1,210 @@
+"""
+This is the logic for pricing and applying attribute and badge upgrades.
+"""
+
+import re
+
+from utils.rating_registry import ATTRIBUTE_NAMES, BADGE_NAMES, BADGE_LEVELS, MIN_ATTRIBUTE, MAX_ATTRIBUTE
+
+# (first value, last value exclusive, devpoints per +1)
+ATTRIBUTE_COST_TIERS = ((0, 70, 1), (70, 80, 2), (80, 90, 3), (90, MAX_ATTRIBUTE, 5))
+
+# Devpoints to go from BADGE_LEVELS[i] to BADGE_LEVELS[i + 1]
+BADGE_COST_LADDER = (3, 5, 7, 10, 20)
+
+# Badge points to go up a single badge tier
+BADGEPOINT_COST = 1
+
+UPGRADE_PATTERN = re.compile(
+    r"^\s*(?P<name>[a-z_]+)\s+(?P<start>.+?)\s*(?:→|->)\s*(?P<end>.+?)"
+    r"(?:\s+with\s+(?P<currency>devpoints|badgepoints))?\s*$",
+    re.IGNORECASE,
+)
+
+
+class UpgradeError(ValueError):
+    """
+    Raised when a requested upgrade is invalid or unaffordable.
+    """
+
+
+def attribute_step_cost(value):
+    """
+    Devpoints needed to raise an attribute from value to value + 1.
+    """
+    for start, end, cost in ATTRIBUTE_COST_TIERS:
+        if start <= value < end:
+            return cost
+    return None
+
+
+def attribute_upgrade_cost(start, end):
+    """
+    Devpoints needed to raise an attribute from start to end, in closed form.
+    """
+    if end <= start:
+        return 0
+    return sum(
+        cost * max(0, min(end, tier_end) - max(start, tier_start))
+        for tier_start, tier_end, cost in ATTRIBUTE_COST_TIERS
+    )
+
+
+# Cost of reaching each value from zero, so any jump is a single subtraction.
+CUMULATIVE_ATTRIBUTE_COST = tuple(attribute_upgrade_cost(0, value) for value in range(MAX_ATTRIBUTE + 1))
+
+CUMULATIVE_BADGE_COST = tuple(sum(BADGE_COST_LADDER[:level]) for level in range(len(BADGE_LEVELS)))
+
+
+def badge_upgrade_cost(start_level, end_level, currency="devpoints"):
+    """
+    Points needed to raise a badge between two levels.
+    Raises UpgradeError for a level that is not in BADGE_LEVELS, e.g. a stale stored value.
+    """
+    for level in (start_level, end_level):
+        if level not in BADGE_LEVELS:
+            raise UpgradeError(f"Unknown badge level '{level}'.")
+    start = BADGE_LEVELS.index(start_level)
+    end = BADGE_LEVELS.index(end_level)
+    if end <= start:
+        return 0
+    if currency == "badgepoints":
+        return (end - start) * BADGEPOINT_COST
+    return CUMULATIVE_BADGE_COST[end] - CUMULATIVE_BADGE_COST[start]
+
+
+def next_badge_step(player, name):
+    """
+    The current level of one of the player's badges and the level one tier up.
+    Raises UpgradeError for an unknown badge, a stored level outside BADGE_LEVELS
+    or a badge that is already at the top level.
+    """
+    if name not in BADGE_NAMES:
+        raise UpgradeError(f"Unknown badge '{name}'.")
+    current = getattr(player, name)
+    if current not in BADGE_LEVELS:
+        raise UpgradeError(f"{name} has an unknown level '{current}'.")
+    if current == BADGE_LEVELS[-1]:
+        raise UpgradeError(f"{name} is already at the maximum level.")
+    return current, BADGE_LEVELS[BADGE_LEVELS.index(current) + 1]
+
+
+def _normalise_badge_level(level):
+    """
+    Match a badge level case-insensitively, accepting HOF as Hall of Fame.
+    """
+    lookup = {badge_level.lower(): badge_level for badge_level in BADGE_LEVELS}
+    lookup["hof"] = "Hall of Fame"
+    return lookup.get(str(level).strip().lower())
+
+
+def parse_upgrade(spec):
+    """
+    Turn a request such as "three_point_shot 72→85" or {"name": "deadeye", "to": "Gold"}
+    into a dictionary with name, start, end and currency.
+    """
+    if isinstance(spec, str):
+        match = UPGRADE_PATTERN.match(spec)
+        if not match:
+            raise UpgradeError(f"Could not understand upgrade '{spec}'.")
+        spec = match.groupdict()
+    elif isinstance(spec, dict):
+        spec = {
+            "name": spec.get("name") or spec.get("attribute") or spec.get("badge"),
+            "start": spec.get("from"),
+            "end": spec.get("to"),
+            "currency": spec.get("currency"),
+        }
+    else:
+        raise UpgradeError("Every upgrade must be a string or an object.")
+
+    name = str(spec["name"] or "").strip().lower()
+    currency = (spec.get("currency") or "devpoints").lower()
+
+    if name in ATTRIBUTE_NAMES:
+        if currency != "devpoints":
+            raise UpgradeError(f"{name} can only be upgraded with devpoints.")
+        try:
+            start = int(spec["start"]) if spec["start"] is not None else None
+            end = int(spec["end"])
+        except (TypeError, ValueError):
+            raise UpgradeError(f"{name} needs whole-number values.")
+        if not MIN_ATTRIBUTE <= end <= MAX_ATTRIBUTE:
+            raise UpgradeError(f"{name} must be between {MIN_ATTRIBUTE} and {MAX_ATTRIBUTE}.")
+        return {"name": name, "kind": "attribute", "start": start, "end": end, "currency": currency}
+
+    if name in BADGE_NAMES:
+        if currency not in ("devpoints", "badgepoints"):
+            raise UpgradeError(f"Unknown currency '{currency}'.")
+        start = _normalise_badge_level(spec["start"]) if spec["start"] is not None else None
+        end = _normalise_badge_level(spec["end"])
+        if end is None or (spec["start"] is not None and start is None):
+            raise UpgradeError(f"{name} needs levels from: {', '.join(BADGE_LEVELS)}.")
+        return {"name": name, "kind": "badge", "start": start, "end": end, "currency": currency}
+
+    raise UpgradeError(f"Unknown attribute or badge '{name}'.")
+
+
+def price_upgrades(player, upgrades):
+    """
+    Validate a list of parsed upgrades against the player's current values.
+    Returns the priced steps and the total devpoints and badgepoints required.
+    """
+    steps = []
+    seen = set()
+    devpoints = 0
+    badgepoints = 0
+
+    for upgrade in upgrades:
+        name = upgrade["name"]
+        if name in seen:
+            raise UpgradeError(f"{name} is listed more than once.")
+        seen.add(name)
+
+        current = getattr(player, name)
+        if upgrade["start"] is not None and upgrade["start"] != current:
+            raise UpgradeError(f"{name} is currently {current}, not {upgrade['start']}.")
+
+        if upgrade["kind"] == "attribute":
+            if upgrade["end"] <= current:
+                raise UpgradeError(f"{name} is already at {current}.")
+            cost = CUMULATIVE_ATTRIBUTE_COST[upgrade["end"]] - CUMULATIVE_ATTRIBUTE_COST[current]
+        else:
+            if current not in BADGE_LEVELS:
+                raise UpgradeError(f"{name} has an unknown level '{current}'.")
+            if BADGE_LEVELS.index(upgrade["end"]) <= BADGE_LEVELS.index(current):
+                raise UpgradeError(f"{name} is already {current}.")
+            cost = badge_upgrade_cost(current, upgrade["end"], upgrade["currency"])
+
+        if upgrade["currency"] == "badgepoints":
+            badgepoints += cost
+        else:
+            devpoints += cost
+        steps.append(dict(upgrade, start=current, cost=cost))
+
+    return steps, devpoints, badgepoints
+
+
+def apply_upgrades(player, upgrades):
+    """
+    Price every upgrade, check both balances once and apply them all.
+    Nothing is changed if any upgrade is invalid or unaffordable.
+    The caller is responsible for committing the session.
+    """
+    steps, devpoints, badgepoints = price_upgrades(player, upgrades)
+
+    if devpoints > (player.devpoints or 0):
+        raise UpgradeError(
+            f"Not enough development points: {devpoints} needed, {player.devpoints or 0} available."
+        )
+    if badgepoints > (player.badgepoints or 0):
+        raise UpgradeError(
+            f"Not enough badge points: {badgepoints} needed, {player.badgepoints or 0} available."
+        )
+
+    player.devpoints -= devpoints
+    player.badgepoints -= badgepoints
+    for step in steps:
+        setattr(player, step["name"], step["end"])
+
+    return steps, devpoints, badgepoints
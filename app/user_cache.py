@@ -0,0 +1,162 @@
+"""
+This is the identity cache behind the Flask-Login user loader.
+
+Identifying the user of a request used to be a database round trip every
+time. The cache keeps the column values of recently seen users for a few
+seconds (USER_CACHE_TTL) and rebuilds the User from them, attached to the
+request's session without a query, so relationships still load and changes
+still save as usual.
+
+Entries are dropped whenever a user row is updated or deleted in this process
+(password changes, resets, confirmations, account deletion), once at flush and
+again after commit. Invalidation is per process only: a password change,
+deactivation or deletion made in another gunicorn worker or node is only seen
+here once this process's entry expires, up to USER_CACHE_TTL seconds later.
+That is why the TTL is kept short.
+
+settings_version is not cached at all: a stale one would score games with an
+old point table in every other process. A rebuilt User loads it on first
+access, and scoring reads it fresh (see app.routes.scoring_rules_for).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from app import db
+from app.models import User
+
+_PENDING_KEY = "user_cache_invalidate"
+
+
+class UserCache:
+    """
+    A size-bounded, time-limited cache of user column values, least recently used first out.
+    """
+
+    def __init__(self, ttl=30, max_size=1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.ttl = app.config["USER_CACHE_TTL"]
+        self.max_size = app.config["USER_CACHE_SIZE"]
+        self.clear()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, values = entry
+            if expires_at <= now:
+                del self._entries[user_id]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return values
+
+    def put(self, user_id, values):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def load(self, user_id):
+        """
+        The User for a request: from the session if already there, else rebuilt from
+        the cache, else loaded from the database and cached. None for unknown ids.
+        """
+        existing = db.session.identity_map.get(identity_key(User, user_id))
+        if existing is not None:
+            return existing
+
+        values = self.get(user_id)
+        if values is None:
+            user = db.session.get(User, user_id)
+            if user is not None:
+                self.put(user_id, _column_values(user))
+            return user
+
+        # Attach as if freshly loaded, so nothing is marked as changed.
+        user = User(**values)
+        make_transient_to_detached(user)
+        db.session.add(user)
+        return user
+
+
+_UNCACHED_KEYS = {"settings_version"}
+_COLUMN_KEYS = tuple(
+    column.key for column in User.__mapper__.column_attrs if column.key not in _UNCACHED_KEYS
+)
+
+
+def _column_values(user):
+    return {key: getattr(user, key) for key in _COLUMN_KEYS}
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_users(session):
+    # A request that loaded the old row between our flush and commit may have cached it again.
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_pending_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -1,5 +1,8 @@
 """baseline
 
+The tables as they were before migrations were introduced. Databases created
+back then by db.create_all() already have them and are stamped at this revision.
+
 Revision ID: 1a6762979b04
 Revises: 
 Create Date: 2024-12-20 20:27:30.976125
@@ -15,10 +18,94 @@ down_revision = None
 branch_labels = None
 depends_on = None
 
+# Frozen copies of the rating and settings columns of that time; the registry may change later.
+ATTRIBUTES = (
+    'agility', 'ball_handle', 'block', 'close_shot',
+    'defensive_consistency', 'defensive_rebound', 'draw_foul', 'driving_dunk',
+    'free_throw', 'hands', 'help_defense_iq', 'hustle',
+    'intangibles', 'interior_defense', 'layup', 'mid_range_shot',
+    'offensive_consistency', 'offensive_rebound', 'overall_durability', 'pass_accuracy',
+    'pass_iq', 'pass_perception', 'pass_vision', 'perimeter_defense',
+    'post_control', 'post_fade', 'post_hook', 'shot_iq',
+    'standing_dunk', 'speed', 'speed_with_ball', 'stamina',
+    'steal', 'strength', 'three_point_shot', 'vertical',
+)
+BADGES = (
+    'aerial_wizard', 'ankle_assassin', 'bail_out',
+    'boxout_beast', 'break_starter', 'brick_wall',
+    'challenger', 'deadeye', 'dimer',
+    'float_game', 'glove', 'handles_for_days',
+    'high_flying_denier', 'hook_specialist', 'immovable_enforcer',
+    'interceptor', 'layup_mixmaster', 'lightning_launch',
+    'limitless_range', 'mini_marksman', 'off_ball_pest',
+    'on_ball_menace', 'paint_patroller', 'paint_prodigy',
+    'pick_dodger', 'pogo_stick', 'posterizer',
+    'post_fade_phenom', 'post_lockdown', 'post_powerhouse',
+    'post_up_poet', 'physical_finisher', 'rebound_chaser',
+    'rise_up', 'set_shot_specialist', 'shifty_shooter',
+    'slippery_off_ball', 'strong_handle', 'unpluckable',
+    'versatile_visionary',
+)
+SETTINGS = (
+    'rebounds_points_10', 'assists_points_10', 'points_70', 'points_60',
+    'points_50', 'points_40', 'points_30', 'points_20',
+    'points_10', 'rebounds_20', 'rebounds_10', 'assists_20',
+    'assists_10', 'double_double_2', 'double_double_3', 'double_double_4',
+    'double_double_5', 'steals_10', 'steals_6', 'steals_3',
+    'blocks_10', 'blocks_6', 'blocks_3', 'player_of_the_game',
+    'player_of_the_week', 'player_of_the_month', 'roty_points', 'roty_badge',
+    'dpoy_points', 'dpoy_badge', 'mvp_points', 'mvp_badge',
+    'champion_points', 'champion_badge',
+)
+
+
+def rating_columns():
+    return [
+        *(sa.Column(name, sa.Integer(), nullable=True) for name in ATTRIBUTES),
+        *(sa.Column(name, sa.String(length=20), nullable=True) for name in BADGES),
+    ]
+
 
 def upgrade():
-    pass
+    op.create_table('user',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=150), nullable=False),
+    sa.Column('email', sa.String(length=150), nullable=False),
+    sa.Column('password', sa.String(length=150), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('username')
+    )
+    op.create_table('player',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('devpoints', sa.Integer(), nullable=True),
+    sa.Column('badgepoints', sa.Integer(), nullable=True),
+    sa.Column('money', sa.Integer(), nullable=True),
+    *rating_columns(),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], name='fk_user_player', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('user_settings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    *(sa.Column(name, sa.Integer(), nullable=True) for name in SETTINGS),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('player_targets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    *rating_columns(),
+    sa.ForeignKeyConstraint(['player_id'], ['player.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
 
 
 def downgrade():
-    pass
+    op.drop_table('player_targets')
+    op.drop_table('user_settings')
+    op.drop_table('player')
+    op.drop_table('user')
@@ -0,0 +1,73 @@
+"""game log and player stats
+
+Revision ID: 3c8e51d2a7f4
+Revises: 1a6762979b04
+Create Date: 2026-10-17 09:12:41.208311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8e51d2a7f4'
+down_revision = '1a6762979b04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('game_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('played_at', sa.DateTime(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('rebounds', sa.Integer(), nullable=False),
+    sa.Column('assists', sa.Integer(), nullable=False),
+    sa.Column('steals', sa.Integer(), nullable=False),
+    sa.Column('blocks', sa.Integer(), nullable=False),
+    sa.Column('player_of_the_game', sa.Boolean(), nullable=False),
+    sa.Column('player_of_the_week', sa.Boolean(), nullable=False),
+    sa.Column('player_of_the_month', sa.Boolean(), nullable=False),
+    sa.Column('roty', sa.Boolean(), nullable=False),
+    sa.Column('dpoy', sa.Boolean(), nullable=False),
+    sa.Column('mvp', sa.Boolean(), nullable=False),
+    sa.Column('champion', sa.Boolean(), nullable=False),
+    sa.Column('manual_devpoints', sa.Integer(), nullable=False),
+    sa.Column('money', sa.Integer(), nullable=True),
+    sa.Column('devpoints_earned', sa.Integer(), nullable=False),
+    sa.Column('badgepoints_earned', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['player_id'], ['player.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('game_log', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_game_log_player_id'), ['player_id'], unique=False)
+
+    op.create_table('player_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('games_played', sa.Integer(), nullable=False),
+    sa.Column('total_points', sa.Integer(), nullable=False),
+    sa.Column('total_rebounds', sa.Integer(), nullable=False),
+    sa.Column('total_assists', sa.Integer(), nullable=False),
+    sa.Column('total_steals', sa.Integer(), nullable=False),
+    sa.Column('total_blocks', sa.Integer(), nullable=False),
+    sa.Column('high_points', sa.Integer(), nullable=False),
+    sa.Column('high_rebounds', sa.Integer(), nullable=False),
+    sa.Column('high_assists', sa.Integer(), nullable=False),
+    sa.Column('high_steals', sa.Integer(), nullable=False),
+    sa.Column('high_blocks', sa.Integer(), nullable=False),
+    sa.Column('devpoints_earned', sa.Integer(), nullable=False),
+    sa.Column('badgepoints_earned', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['player_id'], ['player.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('player_id')
+    )
+
+
+def downgrade():
+    op.drop_table('player_stats')
+    with op.batch_alter_table('game_log', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_game_log_player_id'))
+
+    op.drop_table('game_log')
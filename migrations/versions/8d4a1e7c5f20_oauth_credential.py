@@ -0,0 +1,29 @@
+"""oauth credential
+
+Revision ID: 8d4a1e7c5f20
+Revises: 5b2f9c0e6d13
+Create Date: 2026-10-17 12:21:47.130984
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4a1e7c5f20'
+down_revision = '5b2f9c0e6d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('oauth_credential',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('token_json', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('oauth_credential')
@@ -0,0 +1,41 @@
+"""scrape job
+
+Revision ID: 9b1e4c7a2d58
+Revises: f7a2c8d4e519
+Create Date: 2026-10-17 23:20:11.403318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1e4c7a2d58'
+down_revision = 'f7a2c8d4e519'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scrape_job',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('player_url_part', sa.String(length=200), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('scrape_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_scrape_job_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('scrape_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_scrape_job_created_at'))
+
+    op.drop_table('scrape_job')
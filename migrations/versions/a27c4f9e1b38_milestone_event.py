@@ -0,0 +1,41 @@
+"""milestone event
+
+Revision ID: a27c4f9e1b38
+Revises: 8d4a1e7c5f20
+Create Date: 2026-10-17 13:05:12.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a27c4f9e1b38'
+down_revision = '8d4a1e7c5f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('milestone_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('digested_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['player_id'], ['player.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('milestone_event', schema=None) as batch_op:
+        batch_op.create_index('ix_milestone_event_pending', ['digested_at', 'user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('milestone_event', schema=None) as batch_op:
+        batch_op.drop_index('ix_milestone_event_pending')
+
+    op.drop_table('milestone_event')
@@ -0,0 +1,26 @@
+"""milestone digest claims
+
+Revision ID: b83e5f1a2c47
+Revises: a1d4e7c93b58
+Create Date: 2026-10-18 10:03:57.218640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83e5f1a2c47'
+down_revision = 'a1d4e7c93b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('milestone_event', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('digest_claim', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('milestone_event', schema=None) as batch_op:
+        batch_op.drop_column('digest_claim')
@@ -0,0 +1,100 @@
+"""packed ratings
+
+Revision ID: c41d7b2e9f65
+Revises: a27c4f9e1b38
+Create Date: 2026-10-17 14:02:37.551930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7b2e9f65'
+down_revision = 'a27c4f9e1b38'
+branch_labels = None
+depends_on = None
+
+TABLES = ('player', 'player_targets')
+
+# Frozen copies of the packed format of this revision (app.packing): one byte per
+# attribute and one BADGE_LEVELS index per badge, in this order. The app may change later.
+PACKED_ATTRIBUTES = (
+    'agility', 'ball_handle', 'block', 'close_shot', 'defensive_consistency', 'defensive_rebound',
+    'draw_foul', 'driving_dunk', 'free_throw', 'hands', 'help_defense_iq', 'hustle',
+    'intangibles', 'interior_defense', 'layup', 'mid_range_shot', 'offensive_consistency', 'offensive_rebound',
+    'overall_durability', 'pass_accuracy', 'pass_iq', 'pass_perception', 'pass_vision', 'perimeter_defense',
+    'post_control', 'post_fade', 'post_hook', 'shot_iq', 'speed', 'speed_with_ball',
+    'stamina', 'standing_dunk', 'steal', 'strength', 'three_point_shot', 'vertical',
+)
+PACKED_BADGES = (
+    'aerial_wizard', 'ankle_assassin', 'bail_out', 'boxout_beast', 'break_starter', 'brick_wall',
+    'challenger', 'deadeye', 'dimer', 'float_game', 'glove', 'handles_for_days',
+    'high_flying_denier', 'hook_specialist', 'immovable_enforcer', 'interceptor', 'layup_mixmaster',
+    'lightning_launch', 'limitless_range', 'mini_marksman', 'off_ball_pest', 'on_ball_menace',
+    'paint_patroller', 'paint_prodigy', 'pick_dodger', 'pogo_stick', 'posterizer', 'post_fade_phenom',
+    'post_lockdown', 'post_powerhouse', 'post_up_poet', 'physical_finisher', 'rebound_chaser', 'rise_up',
+    'set_shot_specialist', 'shifty_shooter', 'slippery_off_ball', 'strong_handle', 'unpluckable',
+    'versatile_visionary',
+)
+BADGE_LEVELS = ('None', 'Bronze', 'Silver', 'Gold', 'Hall of Fame', 'Legendary')
+MIN_ATTRIBUTE, MAX_ATTRIBUTE = 25, 99
+# Stored for a missing or invalid value.
+UNSET_ATTRIBUTE, UNSET_BADGE = 0, 255
+
+
+def _pack_attribute(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return UNSET_ATTRIBUTE
+    return value if MIN_ATTRIBUTE <= value <= MAX_ATTRIBUTE else UNSET_ATTRIBUTE
+
+
+def _pack_badge(value):
+    return BADGE_LEVELS.index(value) if value in BADGE_LEVELS else UNSET_BADGE
+
+
+def pack_row(row):
+    return (
+        bytes(_pack_attribute(row[name]) for name in PACKED_ATTRIBUTES),
+        bytes(_pack_badge(row[name]) for name in PACKED_BADGES),
+    )
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('attributes_packed', sa.LargeBinary(length=len(PACKED_ATTRIBUTES)), nullable=True))
+            batch_op.add_column(sa.Column('badges_packed', sa.LargeBinary(length=len(PACKED_BADGES)), nullable=True))
+
+    # Pack the ratings of every existing row.
+    connection = op.get_bind()
+    for table_name in TABLES:
+        table = sa.table(
+            table_name,
+            sa.column('id', sa.Integer),
+            sa.column('attributes_packed', sa.LargeBinary),
+            sa.column('badges_packed', sa.LargeBinary),
+            *(sa.column(name, sa.Integer) for name in PACKED_ATTRIBUTES),
+            *(sa.column(name, sa.String) for name in PACKED_BADGES),
+        )
+        rows = connection.execute(
+            sa.select(table.c.id, *(table.c[name] for name in PACKED_ATTRIBUTES + PACKED_BADGES))
+        ).all()
+        if rows:
+            packed = [pack_row(row._mapping) for row in rows]
+            connection.execute(
+                table.update().where(table.c.id == sa.bindparam('row_id')),
+                [
+                    {'row_id': row.id, 'attributes_packed': attributes_packed, 'badges_packed': badges_packed}
+                    for row, (attributes_packed, badges_packed) in zip(rows, packed)
+                ],
+            )
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('badges_packed')
+            batch_op.drop_column('attributes_packed')
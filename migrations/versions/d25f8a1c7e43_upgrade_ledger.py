@@ -0,0 +1,51 @@
+"""upgrade ledger
+
+Revision ID: d25f8a1c7e43
+Revises: 9b1e4c7a2d58
+Create Date: 2026-10-17 23:48:52.730114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd25f8a1c7e43'
+down_revision = '9b1e4c7a2d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upgrade_ledger',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('changes', sa.Text(), nullable=False),
+    sa.Column('devpoints_spent', sa.Integer(), nullable=False),
+    sa.Column('badgepoints_spent', sa.Integer(), nullable=False),
+    sa.Column('parent_seq', sa.Integer(), nullable=True),
+    sa.Column('undoes_seq', sa.Integer(), nullable=True),
+    sa.Column('top_seq', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['player_id'], ['player.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('player_id', 'seq', name='uq_upgrade_ledger_player_seq')
+    )
+    op.create_table('player_checkpoint',
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('attributes_packed', sa.LargeBinary(length=36), nullable=False),
+    sa.Column('badges_packed', sa.LargeBinary(length=40), nullable=False),
+    sa.Column('devpoints_spent', sa.Integer(), nullable=False),
+    sa.Column('badgepoints_spent', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['player_id'], ['player.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('player_id', 'seq')
+    )
+
+
+def downgrade():
+    op.drop_table('player_checkpoint')
+    op.drop_table('upgrade_ledger')
@@ -0,0 +1,66 @@
+"""player position and overall
+
+Revision ID: e3b9d6f21a47
+Revises: c41d7b2e9f65
+Create Date: 2026-10-17 16:48:12.204318
+
+"""
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b9d6f21a47'
+down_revision = 'c41d7b2e9f65'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of the overall of this revision (app.overall) for players without a
+# position: the packed attributes, clipped to 25-99, times the average of the five
+# position weights. AVERAGE_WEIGHTS holds each attribute's sum of those weights; the
+# arithmetic follows app.overall so rounding at .5 comes out the same.
+MIN_ATTRIBUTE, MAX_ATTRIBUTE = 25, 99
+AVERAGE_WEIGHTS = (
+    8, 10, 9, 10, 5, 10, 5, 8, 6, 6, 8, 5,
+    5, 10, 8, 10, 6, 8, 5, 8, 7, 5, 7, 10,
+    9, 6, 8, 8, 8, 8, 5, 10, 8, 11, 12, 8,
+)
+
+
+def overalls(packed_rows):
+    weights = np.array(AVERAGE_WEIGHTS, dtype=np.float64) / 5
+    weights = weights / weights.sum()
+    attributes = np.frombuffer(b"".join(packed_rows), dtype=np.uint8).reshape(len(packed_rows), len(AVERAGE_WEIGHTS))
+    attributes = np.clip(attributes.astype(np.float64), MIN_ATTRIBUTE, MAX_ATTRIBUTE)
+    return np.clip(np.rint(attributes @ weights), MIN_ATTRIBUTE, MAX_ATTRIBUTE).astype(int).tolist()
+
+
+def upgrade():
+    with op.batch_alter_table('player', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('position', sa.String(length=2), nullable=True))
+        batch_op.add_column(sa.Column('ovr', sa.SmallInteger(), nullable=True))
+
+    # Compute the overall of every existing player from the packed attributes.
+    connection = op.get_bind()
+    player = sa.table(
+        'player',
+        sa.column('id', sa.Integer),
+        sa.column('attributes_packed', sa.LargeBinary),
+        sa.column('ovr', sa.SmallInteger),
+    )
+    rows = connection.execute(
+        sa.select(player.c.id, player.c.attributes_packed).where(player.c.attributes_packed.isnot(None))
+    ).all()
+    if rows:
+        values = overalls([row.attributes_packed for row in rows])
+        connection.execute(
+            player.update().where(player.c.id == sa.bindparam('row_id')),
+            [{'row_id': row.id, 'ovr': ovr} for row, ovr in zip(rows, values)],
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('player', schema=None) as batch_op:
+        batch_op.drop_column('ovr')
+        batch_op.drop_column('position')
@@ -0,0 +1,39 @@
+"""progression rollups
+
+Revision ID: f16b31d6e7bc
+Revises: d25f8a1c7e43
+Create Date: 2026-10-18 00:31:17.204583
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f16b31d6e7bc'
+down_revision = 'd25f8a1c7e43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('progression_rollup',
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=4), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('games', sa.Integer(), nullable=False),
+    sa.Column('devpoints_earned', sa.Integer(), nullable=False),
+    sa.Column('badgepoints_earned', sa.Integer(), nullable=False),
+    sa.Column('devpoints_spent', sa.Integer(), nullable=False),
+    sa.Column('badgepoints_spent', sa.Integer(), nullable=False),
+    sa.Column('devpoints', sa.Integer(), nullable=True),
+    sa.Column('badgepoints', sa.Integer(), nullable=True),
+    sa.Column('attributes_packed', sa.LargeBinary(length=36), nullable=True),
+    sa.Column('badges_packed', sa.LargeBinary(length=40), nullable=True),
+    sa.ForeignKeyConstraint(['player_id'], ['player.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('player_id', 'period', 'period_start')
+    )
+
+
+def downgrade():
+    op.drop_table('progression_rollup')
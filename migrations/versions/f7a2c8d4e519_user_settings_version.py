@@ -0,0 +1,26 @@
+"""user settings version
+
+Revision ID: f7a2c8d4e519
+Revises: e3b9d6f21a47
+Create Date: 2026-10-17 18:21:40.117052
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7a2c8d4e519'
+down_revision = 'e3b9d6f21a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('settings_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('settings_version')
@@ -0,0 +1,154 @@
+"""
+This is the benchmark for the 2Kratings page parser.
+
+Every saved page in utils/fixtures/2kratings is first parsed and compared with
+its expected .json result, so a faster parser that gets a page wrong fails
+instead of looking good. The pages are then parsed repeatedly and the
+throughput is reported in pages per second.
+
+Pages named <player>.html are saved from the live site with --capture, which
+writes their .json with the pre-lxml parser in utils.scrape_2kratings_reference.
+The synthetic-*.html pages are hand-written markup samples with made-up
+ratings. They cover rating-change spans, label variants and non-attribute list
+items, and their .json also comes from the reference parser, but they only show
+that both parsers agree on that markup, not that it matches the site.
+--reference re-checks every .json against the reference parser.
+
+Usage:
+    python -m utils.bench_parser
+    python -m utils.bench_parser --seconds 5
+    python -m utils.bench_parser --capture lebron-james stephen-curry    # needs requirements-dev.txt
+    python -m utils.bench_parser --reference                           # needs requirements-dev.txt
+
+Until at least one page has been captured the benchmark warns that it has only
+checked synthetic markup.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from utils.scrape_2kratings import fetch_player_page, parse_player_page
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "2kratings")
+SYNTHETIC_PREFIX = "synthetic-"
+
+
+def load_fixtures(fixture_dir=FIXTURE_DIR):
+    """
+    Return (name, raw_html, expected) for every saved page.
+    """
+    fixtures = []
+    for page_path in sorted(glob.glob(os.path.join(fixture_dir, "*.html"))):
+        with open(page_path, "rb") as page_file:
+            raw_html = page_file.read()
+        with open(page_path[:-len(".html")] + ".json", encoding="utf-8") as expected_file:
+            expected = json.load(expected_file)
+        fixtures.append((os.path.basename(page_path), raw_html, expected))
+    return fixtures
+
+
+def check_fixtures(fixtures):
+    """
+    Parse each page once and list the pages whose result differs from the expected one.
+    """
+    failures = []
+    for name, raw_html, expected in fixtures:
+        parsed = parse_player_page(raw_html)
+        if parsed != expected:
+            failures.append(name)
+    return failures
+
+
+def check_reference(fixtures):
+    """
+    List the pages whose expected result is not what the reference parser makes of them.
+    """
+    from utils import scrape_2kratings_reference
+
+    return [name for name, raw_html, expected in fixtures if scrape_2kratings_reference.parse_player_page(raw_html) != expected]
+
+
+def capture(slugs, fixture_dir=FIXTURE_DIR):
+    """
+    Save the live page of every slug with its expected result from the reference parser.
+    Returns the slugs that could not be fetched or parsed.
+    """
+    from utils import scrape_2kratings_reference
+
+    failed = []
+    for slug in slugs:
+        raw_html = fetch_player_page(slug)
+        expected = raw_html if isinstance(raw_html, dict) else scrape_2kratings_reference.parse_player_page(raw_html)
+        if "error" in expected:
+            print(f"{slug}: {expected['error']}", file=sys.stderr)
+            failed.append(slug)
+            continue
+        with open(os.path.join(fixture_dir, f"{slug}.html"), "wb") as page_file:
+            page_file.write(raw_html)
+        with open(os.path.join(fixture_dir, f"{slug}.json"), "w", encoding="utf-8") as expected_file:
+            json.dump(expected, expected_file, indent=2)
+            expected_file.write("\n")
+    return failed
+
+
+def benchmark(fixtures, seconds=2.0):
+    """
+    Parse the pages round-robin for about `seconds` and return pages per second.
+    """
+    pages = [raw_html for _, raw_html, _ in fixtures]
+    parsed = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for raw_html in pages:
+            parse_player_page(raw_html)
+        parsed += len(pages)
+    return parsed / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check and time the 2Kratings parser on saved pages.")
+    parser.add_argument("--seconds", type=float, default=2.0, help="how long to run the timing loop")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="directory with .html pages and .json results")
+    parser.add_argument("--capture", nargs="+", metavar="SLUG", help="save live pages as fixtures and exit")
+    parser.add_argument("--reference", action="store_true", help="also check the .json files against the reference parser")
+    args = parser.parse_args(argv)
+
+    if args.capture:
+        return 1 if capture(args.capture, args.fixtures) else 0
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"No fixtures found in {args.fixtures}.", file=sys.stderr)
+        return 1
+
+    if args.reference:
+        stale = check_reference(fixtures)
+        if stale:
+            print(f"Expected results differ from the reference parser for: {', '.join(stale)}", file=sys.stderr)
+            return 1
+
+    if all(name.startswith(SYNTHETIC_PREFIX) for name, _, _ in fixtures):
+        print(
+            "Only synthetic fixtures: the parser is not checked against any real 2Kratings page. "
+            "Save some with --capture.",
+            file=sys.stderr,
+        )
+
+    failures = check_fixtures(fixtures)
+    if failures:
+        print(f"Parser output differs from the expected result for: {', '.join(failures)}", file=sys.stderr)
+        return 1
+
+    pages_per_second = benchmark(fixtures, args.seconds)
+    average_size = sum(len(raw_html) for _, raw_html, _ in fixtures) / len(fixtures)
+    print(f"{len(fixtures)} fixtures correct, {pages_per_second:,.0f} pages/s (average page {average_size / 1024:.1f} KiB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
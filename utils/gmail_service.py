@@ -1,11 +1,9 @@
 import os
 import base64
+import fcntl
 import json
+import threading
 
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from email.mime.text import MIMEText
 from itsdangerous import URLSafeTimedSerializer
 from flask import url_for
@@ -15,41 +13,126 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+# The Google client libraries are slow to import and only the outbox worker sends
+# mail, so they are imported inside the functions that use them.
+
 SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
 email_client_id = os.environ.get("EMAIL_CLIENT_ID")
+TOKEN_PATH = os.environ.get("GMAIL_TOKEN_PATH", "token.json")
 
-def get_gmail_service():
+class FileCredentialStore:
     """
-    Authenticate and return Gmail API service using tokens from token.json.
-    This assumes that token.json has already been created via an offline 
-    authorization process (InstalledAppFlow) on another machine.
-    """
-    creds = None
-    print("Using Gmail Project A client_id:", email_client_id)
-    # Check if token.json exists
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-    else:
-        print("No token.json found. Please place a valid token.json with gmail.send credentials.")
+    Keeps the authorized-user JSON in a local token.json.
+    Refreshes are serialised between processes on this machine with a lock file.
+    """
+
+    def __init__(self, path=TOKEN_PATH):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as token_file:
+            return token_file.read()
+
+    def locked_update(self, update):
+        """
+        Run update(current_json) under the lock and store its result if it returns one.
+        Returns the JSON that is stored afterwards.
+        """
+        with open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                current = self.load()
+                new = update(current)
+                if new is None:
+                    return current
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, "w") as token_file:
+                    token_file.write(new)
+                os.replace(temp_path, self.path)
+                return new
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+_credential_store = FileCredentialStore()
+_credentials = None
+_credentials_lock = threading.Lock()
+_local = threading.local()
+
+def set_credential_store(store):
+    """
+    Use another credential store, e.g. one shared by every node through the database.
+    """
+    global _credential_store, _credentials
+    with _credentials_lock:
+        _credential_store = store
+        _credentials = None
+        _local.__dict__.clear()
+
+def _refresh_if_expired(current_json):
+    """
+    Refresh the stored credentials unless another worker already did.
+    """
+    if not current_json:
+        raise ValueError("No stored Gmail credentials.")
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
+    creds = Credentials.from_authorized_user_info(json.loads(current_json), SCOPES)
+    if creds.valid:
         return None
-    
-    # If creds don't exist or are invalid
+    if not creds.refresh_token:
+        raise ValueError("Stored Gmail credentials have no refresh token.")
+    creds.refresh(Request())
+    return creds.to_json()
+
+def get_credentials():
+    """
+    Process-wide Gmail credentials, loaded once from the credential store.
+    Expired tokens are refreshed under the store's lock so only one worker refreshes at a time;
+    the others pick up the new token from the store.
+    """
+    global _credentials
+    from google.oauth2.credentials import Credentials
+
+    with _credentials_lock:
+        if _credentials is None:
+            info = _credential_store.load()
+            if not info:
+                print("No stored Gmail credentials. Please store a valid token with gmail.send credentials.")
+                return None
+            print("Using Gmail Project A client_id:", email_client_id)
+            _credentials = Credentials.from_authorized_user_info(json.loads(info), SCOPES)
+
+        if not _credentials.valid:
+            try:
+                info = _credential_store.locked_update(_refresh_if_expired)
+            except Exception as e:
+                print(f"Failed to refresh token: {e}")
+                return None
+            fresh = Credentials.from_authorized_user_info(json.loads(info), SCOPES)
+            # Update in place so services already built with these credentials keep working.
+            _credentials.token = fresh.token
+            _credentials.expiry = fresh.expiry
+        return _credentials
+
+def get_gmail_service():
+    """
+    Return the cached Gmail API service.
+    The discovery client is built once per process (per thread, since its HTTP
+    connection is not thread-safe) and shares the process-wide credentials.
+    """
+    creds = get_credentials()
     if not creds:
-        print("Invalid credentials found in token.json. Please re-authorize offline and update token.json.")
         return None
-    
-    # Refresh the token if it is expired and refresh_token is unavailable
-    if creds.expired and creds.refresh_token:
-        try:
-            creds.refresh(Request())
-            #Update token.json with the new refreshed token
-            with open("token.json", "w") as token_file:
-                token_file.write(creds.to_json())
-        except Exception as e:
-            print(f"Failed to refresh token: {e}")
-            return None
-        
-    service = build("gmail", "v1", credentials=creds)
+
+    service = getattr(_local, "service", None)
+    if service is None:
+        from googleapiclient.discovery import build
+
+        service = build("gmail", "v1", credentials=creds, cache_discovery=False)
+        _local.service = service
     return service
 
 def send_email(user_id, recipient, subject, message_text):
@@ -60,7 +143,9 @@ def send_email(user_id, recipient, subject, message_text):
     if not service:
         print("Gmail service not available. Check token.json and ensure valid credentials exist.")
         return None
-    
+
+    from googleapiclient.errors import HttpError
+
     try:
         message = create_message(user_id, recipient, subject, message_text)
         message = service.users().messages().send(userId=user_id, body=message).execute()
@@ -0,0 +1,95 @@
+"""
+This is the import-time report for the app's cold start.
+
+It builds the app in a fresh interpreter under `python -X importtime`, the way
+a gunicorn master or a new autoscaled instance does, and sums the import time
+per top-level package. It also lists the rarely used I/O libraries that are
+supposed to load lazily, so a stray top-level import shows up at once.
+
+Usage:
+    python -m utils.import_report
+    python -m utils.import_report --top 20 --repeat 5
+    python -m utils.import_report --check    # exit 1 when a lazy library was imported
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+DEFAULT_STATEMENT = "from app import create_app; create_app()"
+
+# Only needed by Google logins, Gmail delivery and live scraping.
+LAZY_MODULES = ("authlib", "google", "googleapiclient", "cloudscraper", "bs4", "lxml", "requests")
+
+
+def measure(statement=DEFAULT_STATEMENT):
+    """
+    Run the statement in a new interpreter. Returns (wall seconds, [(module, self us, cumulative us, depth)]).
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return wall, imports
+
+
+def by_package(imports):
+    """
+    Self time per top-level package in microseconds; the values add up to the whole import time.
+    """
+    totals = defaultdict(int)
+    for name, self_us, _, _ in imports:
+        totals[name.split(".")[0]] += self_us
+    return dict(totals)
+
+
+def lazy_modules_loaded(imports):
+    roots = {name.split(".")[0] for name, _, _, _ in imports}
+    return [name for name in LAZY_MODULES if name in roots]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report where the app's import time goes.")
+    parser.add_argument("--statement", default=DEFAULT_STATEMENT, help="Python code to time.")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs; the fastest one is reported.")
+    parser.add_argument("--check", action="store_true", help="Fail when a lazily loaded library was imported.")
+    args = parser.parse_args(argv)
+
+    # The first run also warms the bytecode caches, like an instance that has started before.
+    wall, imports = min((measure(args.statement) for _ in range(max(args.repeat, 1))), key=lambda run: run[0])
+    packages = by_package(imports)
+    total_us = sum(packages.values())
+
+    print(f"{args.statement}")
+    print(f"wall clock {wall * 1000:.0f} ms, imports {total_us / 1000:.0f} ms, {len(imports)} modules")
+    print()
+    print(f"{'package':<28}{'ms':>9}{'share':>8}")
+    for name, micros in sorted(packages.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"{name:<28}{micros / 1000:>9.1f}{micros / total_us:>8.1%}")
+
+    loaded = lazy_modules_loaded(imports)
+    print()
+    print(f"lazy libraries imported: {', '.join(loaded) if loaded else 'none'}")
+    return 1 if args.check and loaded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
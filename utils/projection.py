@@ -0,0 +1,176 @@
+"""
+This is the Monte Carlo kernel behind the progression projection.
+
+Every simulation replays a player's future by drawing games, with replacement,
+from the scored game history and adding up the points they earn. A goal is
+reached in the first game where the running devpoint total covers what the
+goal still costs. All simulations of a chunk are drawn and searched at once
+with NumPy. With workers > 1 the chunks are spread over a process pool; the web
+app runs them in-process by default (PROJECTION_WORKERS), since a pool per web
+worker oversubscribes the CPU and a cold pool costs more than it saves.
+Running totals are searched with searchsorted, so per-game devpoints must not
+be negative.
+
+It only needs NumPy, so the pool workers import it without creating the Flask app.
+"""
+
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+# Simulations per pool task. Fixed, so a seed gives the same result whatever the number of workers.
+CHUNK_SIMULATIONS = 1000
+PERCENTILES = (10, 50, 90)
+
+_pool = None
+_pool_workers = 0
+
+
+def simulate_chunk(seed, simulations, horizon, season_length, devpoints, badgepoints, thresholds):
+    """
+    Run one chunk of simulations of `horizon` future games.
+
+    `devpoints` and `badgepoints` are the points of every historical game, and
+    `thresholds` the devpoints still needed for each goal (0 or less when it is
+    already reached). Returns (counts, season_devpoints, season_badgepoints):
+    counts[goal, games] is how many simulations needed that many games, with the
+    last column for "not within the horizon"; the season arrays hold each
+    simulation's running totals at the end of every season.
+    """
+    rng = np.random.default_rng(seed)
+    draws = rng.integers(0, len(devpoints), size=(simulations, horizon))
+    earned = np.cumsum(devpoints[draws], axis=1)
+    badge_earned = badgepoints[draws]
+
+    # The running totals only grow, so after shifting every row above the one
+    # before it, one sorted search over the flattened matrix finds the first
+    # game reaching each threshold in every simulation.
+    thresholds = np.asarray(thresholds, dtype=np.int64)
+    span = max(int(earned[:, -1].max()), int(thresholds.max(initial=0))) + 1
+    offsets = np.arange(simulations, dtype=np.int64) * span
+    found = np.searchsorted((earned + offsets[:, None]).ravel(), thresholds[None, :] + offsets[:, None])
+    games = found - (np.arange(simulations) * horizon)[:, None] + 1
+    games[:, thresholds <= 0] = 0
+
+    # horizon + 1 games means not reached; tally per goal so only counts go back to the parent.
+    bins = horizon + 2
+    counts = np.bincount(
+        (np.arange(len(thresholds)) * bins + games).ravel(), minlength=len(thresholds) * bins
+    ).reshape(len(thresholds), bins)
+
+    seasons = horizon // season_length
+    season_devpoints = earned[:, season_length - 1 :: season_length][:, :seasons]
+    season_badgepoints = (
+        badge_earned[:, : seasons * season_length].reshape(simulations, seasons, season_length).sum(axis=2).cumsum(axis=1)
+    )
+    return counts, season_devpoints, season_badgepoints
+
+
+def _pool_for(workers):
+    """
+    The shared process pool, created on first use and replaced when the worker count changes.
+    Workers are started fresh rather than forked from a process that holds database connections.
+    """
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        _pool_workers = workers
+    return _pool
+
+
+def _discard_pool():
+    """
+    Forget a pool that lost a worker; a broken executor refuses every later task.
+    """
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+    _pool_workers = 0
+
+
+def _run_chunks(arguments, workers):
+    """
+    Run the chunks on the pool. A pool whose worker died (e.g. killed for memory) is
+    replaced and the chunks are tried once more, then run in this process.
+    """
+    for _ in range(2):
+        try:
+            return list(_pool_for(workers).map(simulate_chunk, *zip(*arguments)))
+        except BrokenProcessPool:
+            _discard_pool()
+    return [simulate_chunk(*chunk) for chunk in arguments]
+
+
+def _percentiles_from_counts(counts, horizon):
+    """
+    Nearest-rank percentiles of the games needed per goal; None where the horizon is not enough.
+    """
+    totals = np.cumsum(counts, axis=1)
+    simulations = totals[:, -1:]
+    bands = {}
+    for percentile in PERCENTILES:
+        rank = np.maximum(np.ceil(simulations * percentile / 100), 1)
+        games = (totals < rank).sum(axis=1)
+        bands[percentile] = [None if value > horizon else int(value) for value in games]
+    return bands
+
+
+def run_projection(devpoints, badgepoints, thresholds, simulations, seasons, season_length, seed=0, workers=1):
+    """
+    Simulate `simulations` futures of `seasons` seasons each and summarise them.
+
+    Returns {"goals": [...], "seasons": [...]}: for every threshold the 10th,
+    50th and 90th percentile of games needed and the share of simulations that
+    reach it, and per season the percentile bands of points earned so far.
+    The same seed and arguments always give the same result.
+    """
+    devpoints = np.asarray(devpoints, dtype=np.int64)
+    badgepoints = np.asarray(badgepoints, dtype=np.int64)
+    thresholds = np.asarray(thresholds, dtype=np.int64)
+    horizon = seasons * season_length
+
+    chunks = math.ceil(simulations / CHUNK_SIMULATIONS)
+    sizes = [CHUNK_SIMULATIONS] * (chunks - 1) + [simulations - CHUNK_SIMULATIONS * (chunks - 1)]
+    seeds = np.random.SeedSequence(seed).spawn(chunks)
+    arguments = [
+        (chunk_seed, size, horizon, season_length, devpoints, badgepoints, thresholds)
+        for chunk_seed, size in zip(seeds, sizes)
+    ]
+    if workers > 1 and chunks > 1:
+        results = _run_chunks(arguments, workers)
+    else:
+        results = [simulate_chunk(*chunk) for chunk in arguments]
+
+    counts = sum(result[0] for result in results)
+    season_devpoints = np.concatenate([result[1] for result in results])
+    season_badgepoints = np.concatenate([result[2] for result in results])
+
+    bands = _percentiles_from_counts(counts, horizon)
+    reached = counts[:, : horizon + 1].sum(axis=1) / simulations
+    goals = [
+        {
+            "games": {f"p{percentile}": bands[percentile][goal] for percentile in PERCENTILES},
+            "probability": round(float(reached[goal]), 4),
+        }
+        for goal in range(len(thresholds))
+    ]
+
+    devpoint_bands = np.percentile(season_devpoints, PERCENTILES, axis=0, method="nearest")
+    badgepoint_bands = np.percentile(season_badgepoints, PERCENTILES, axis=0, method="nearest")
+    season_summary = [
+        {
+            "season": season + 1,
+            "devpoints": {f"p{p}": int(devpoint_bands[i, season]) for i, p in enumerate(PERCENTILES)},
+            "badgepoints": {f"p{p}": int(badgepoint_bands[i, season]) for i, p in enumerate(PERCENTILES)},
+        }
+        for season in range(seasons)
+    ]
+    return {"goals": goals, "seasons": season_summary}
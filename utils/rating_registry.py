@@ -0,0 +1,252 @@
+"""
+This is the single definition of every player attribute and badge.
+
+Names, display labels, value ranges and badge levels are declared once here and
+turned into frozen lookup tables at import. The models, form parsing,
+validation, templates and the 2Kratings tools all derive from these tables,
+so adding or renaming a rating is a one-line change.
+
+It lives in utils rather than app so the scraper tools can use it without
+creating the Flask app.
+"""
+
+from types import MappingProxyType
+
+import numpy as np
+
+MIN_ATTRIBUTE = 25
+MAX_ATTRIBUTE = 99
+DEFAULT_ATTRIBUTE = MIN_ATTRIBUTE
+DEFAULT_ATTRIBUTE_TARGET = MAX_ATTRIBUTE
+
+BADGE_LEVELS = ("None", "Bronze", "Silver", "Gold", "Hall of Fame", "Legendary")
+DEFAULT_BADGE = "None"
+DEFAULT_BADGE_TARGET = "Legendary"
+
+# (column name, display label), in the order they are shown. New entries go at the end:
+# the order is also the layout of the packed rating columns (app.packing).
+_ATTRIBUTES = (
+    ("agility", "Agility"),
+    ("ball_handle", "Ball Handle"),
+    ("block", "Block"),
+    ("close_shot", "Close Shot"),
+    ("defensive_consistency", "Defensive Consistency"),
+    ("defensive_rebound", "Defensive Rebound"),
+    ("draw_foul", "Draw Foul"),
+    ("driving_dunk", "Driving Dunk"),
+    ("free_throw", "Free Throw"),
+    ("hands", "Hands"),
+    ("help_defense_iq", "Help Defense IQ"),
+    ("hustle", "Hustle"),
+    ("intangibles", "Intangibles"),
+    ("interior_defense", "Interior Defense"),
+    ("layup", "Layup"),
+    ("mid_range_shot", "Mid-Range Shot"),
+    ("offensive_consistency", "Offensive Consistency"),
+    ("offensive_rebound", "Offensive Rebound"),
+    ("overall_durability", "Overall Durability"),
+    ("pass_accuracy", "Pass Accuracy"),
+    ("pass_iq", "Pass IQ"),
+    ("pass_perception", "Pass Perception"),
+    ("pass_vision", "Pass Vision"),
+    ("perimeter_defense", "Perimeter Defense"),
+    ("post_control", "Post Control"),
+    ("post_fade", "Post Fade"),
+    ("post_hook", "Post Hook"),
+    ("shot_iq", "Shot IQ"),
+    ("speed", "Speed"),
+    ("speed_with_ball", "Speed with Ball"),
+    ("stamina", "Stamina"),
+    ("standing_dunk", "Standing Dunk"),
+    ("steal", "Steal"),
+    ("strength", "Strength"),
+    ("three_point_shot", "Three-Point Shot"),
+    ("vertical", "Vertical"),
+)
+
+_BADGES = (
+    ("aerial_wizard", "Aerial Wizard"),
+    ("ankle_assassin", "Ankle Assassin"),
+    ("bail_out", "Bail Out"),
+    ("boxout_beast", "Boxout Beast"),
+    ("break_starter", "Break Starter"),
+    ("brick_wall", "Brick Wall"),
+    ("challenger", "Challenger"),
+    ("deadeye", "Deadeye"),
+    ("dimer", "Dimer"),
+    ("float_game", "Float Game"),
+    ("glove", "Glove"),
+    ("handles_for_days", "Handles for Days"),
+    ("high_flying_denier", "High-Flying Denier"),
+    ("hook_specialist", "Hook Specialist"),
+    ("immovable_enforcer", "Immovable Enforcer"),
+    ("interceptor", "Interceptor"),
+    ("layup_mixmaster", "Layup Mixmaster"),
+    ("lightning_launch", "Lightning Launch"),
+    ("limitless_range", "Limitless Range"),
+    ("mini_marksman", "Mini Marksman"),
+    ("off_ball_pest", "Off-Ball Pest"),
+    ("on_ball_menace", "On-Ball Menace"),
+    ("paint_patroller", "Paint Patroller"),
+    ("paint_prodigy", "Paint Prodigy"),
+    ("pick_dodger", "Pick Dodger"),
+    ("pogo_stick", "Pogo Stick"),
+    ("posterizer", "Posterizer"),
+    ("post_fade_phenom", "Post Fade Phenom"),
+    ("post_lockdown", "Post Lockdown"),
+    ("post_powerhouse", "Post Powerhouse"),
+    ("post_up_poet", "Post-Up Poet"),
+    ("physical_finisher", "Physical Finisher"),
+    ("rebound_chaser", "Rebound Chaser"),
+    ("rise_up", "Rise Up"),
+    ("set_shot_specialist", "Set Shot Specialist"),
+    ("shifty_shooter", "Shifty Shooter"),
+    ("slippery_off_ball", "Slippery Off-Ball"),
+    ("strong_handle", "Strong Handle"),
+    ("unpluckable", "Unpluckable"),
+    ("versatile_visionary", "Versatile Visionary"),
+)
+
+ATTRIBUTE_NAMES = tuple(name for name, _ in _ATTRIBUTES)
+BADGE_NAMES = tuple(name for name, _ in _BADGES)
+RATING_NAMES = ATTRIBUTE_NAMES + BADGE_NAMES
+
+LABELS = MappingProxyType(dict(_ATTRIBUTES + _BADGES))
+KINDS = MappingProxyType({
+    **{name: "attribute" for name in ATTRIBUTE_NAMES},
+    **{name: "badge" for name in BADGE_NAMES},
+})
+RATING_DEFAULTS = MappingProxyType({
+    **{name: DEFAULT_ATTRIBUTE for name in ATTRIBUTE_NAMES},
+    **{name: DEFAULT_BADGE for name in BADGE_NAMES},
+})
+ATTRIBUTE_INDEX = MappingProxyType({name: index for index, name in enumerate(ATTRIBUTE_NAMES)})
+BADGE_INDEX = MappingProxyType({name: index for index, name in enumerate(BADGE_NAMES)})
+RATING_INDEX = MappingProxyType({name: index for index, name in enumerate(RATING_NAMES)})
+BADGE_LEVEL_INDEX = MappingProxyType({level: index for index, level in enumerate(BADGE_LEVELS)})
+
+# Placeholders in the matrices returned by rating_matrices.
+MISSING = -1
+INVALID = -2
+_BADGE_CODES = {**BADGE_LEVEL_INDEX, None: MISSING}
+
+
+def rating_label(name):
+    """
+    Display label of an attribute or badge, e.g. "Mid-Range Shot".
+    """
+    return LABELS.get(name) or name.replace("_", " ").title()
+
+
+class RatingValidationError(ValueError):
+    """
+    Raised when rating values fail validation; `errors` holds the structured per-field errors.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(error["message"] for error in errors))
+
+
+def _rating_error(row, name, value, message):
+    return {"row": row, "field": name, "label": rating_label(name), "value": value, "message": message}
+
+
+def _parse_attribute_matrix(values):
+    """
+    Whole numbers for an object matrix of attribute values, plus a mask of the ones that are not numbers.
+    Everything is converted in one pass; values are only looked at one by one when that pass fails.
+    """
+    try:
+        return values.astype(np.int64), np.zeros(values.shape, dtype=bool)
+    except (TypeError, ValueError):
+        pass
+    numbers = np.zeros(values.shape, dtype=np.int64)
+    not_numbers = np.zeros(values.shape, dtype=bool)
+    for index, value in np.ndenumerate(values):
+        try:
+            numbers[index] = int(value)
+        except (TypeError, ValueError):
+            not_numbers[index] = True
+    return numbers, not_numbers
+
+
+def _badge_code(value):
+    try:
+        return _BADGE_CODES.get(value, INVALID)
+    except TypeError:
+        return INVALID
+
+
+def rating_matrices(records):
+    """
+    Validate a batch of rating dictionaries ({name: value}) in one vectorized pass.
+    Only names that are present and not None are checked; other keys are ignored.
+    Returns (attributes, badges, errors): a (records, attributes) matrix of values and a
+    (records, badges) matrix of BADGE_LEVELS indexes, both holding MISSING or INVALID where
+    there is no valid value, and a list of {"row", "field", "label", "value", "message"}
+    errors in row and registry order.
+    """
+    records = list(records)
+    attributes = np.array(
+        [list(map(record.get, ATTRIBUTE_NAMES)) for record in records], dtype=object
+    ).reshape(len(records), len(ATTRIBUTE_NAMES))
+    badges = np.array(
+        [[_badge_code(record.get(name)) for name in BADGE_NAMES] for record in records], dtype=np.int64
+    ).reshape(len(records), len(BADGE_NAMES))
+
+    attributes_given = np.not_equal(attributes, None)
+    numbers, not_numbers = _parse_attribute_matrix(np.where(attributes_given, attributes, DEFAULT_ATTRIBUTE))
+    not_numbers &= attributes_given
+    out_of_range = attributes_given & ~not_numbers & ((numbers < MIN_ATTRIBUTE) | (numbers > MAX_ATTRIBUTE))
+
+    errors = []
+    for row, column in zip(*np.nonzero(not_numbers | out_of_range)):
+        name = ATTRIBUTE_NAMES[column]
+        message = (
+            f"{rating_label(name)} must be a whole number." if not_numbers[row, column]
+            else f"{rating_label(name)} must be between {MIN_ATTRIBUTE} and {MAX_ATTRIBUTE}."
+        )
+        errors.append(_rating_error(int(row), name, attributes[row, column], message))
+    for row, column in zip(*np.nonzero(badges == INVALID)):
+        name = BADGE_NAMES[column]
+        message = f"{rating_label(name)} must be one of: {', '.join(BADGE_LEVELS)}."
+        errors.append(_rating_error(int(row), name, records[row].get(name), message))
+    errors.sort(key=lambda error: (error["row"], RATING_INDEX[error["field"]]))
+
+    numbers[~attributes_given] = MISSING
+    numbers[not_numbers | out_of_range] = INVALID
+    return numbers, badges, errors
+
+
+def validate_rating_vectors(records):
+    """
+    Validate a batch of rating dictionaries like rating_matrices does.
+    Returns (values, errors): a cleaned dictionary per record with only its valid ratings, and the errors.
+    """
+    attributes, badges, errors = rating_matrices(records)
+    values = []
+    # Back to plain Python values once for the whole batch rather than per element.
+    for row_attributes, row_badges in zip(attributes.tolist(), badges.tolist()):
+        cleaned = {name: value for name, value in zip(ATTRIBUTE_NAMES, row_attributes) if value >= 0}
+        cleaned.update(
+            (name, BADGE_LEVELS[level]) for name, level in zip(BADGE_NAMES, row_badges) if level >= 0
+        )
+        values.append(cleaned)
+    return values, errors
+
+
+def parse_rating_form(form, prefix="", attribute_default=DEFAULT_ATTRIBUTE, badge_default=DEFAULT_BADGE):
+    """
+    Read every attribute and badge from a submitted form and validate them together.
+    Fields are looked up as prefix + name; missing or empty fields get the defaults.
+    Returns (values, errors) as from validate_rating_vectors.
+    """
+    record = {}
+    for name in RATING_NAMES:
+        raw = form.get(prefix + name)
+        if raw is None or raw == "":
+            raw = attribute_default if KINDS[name] == "attribute" else badge_default
+        record[name] = raw
+    values, errors = validate_rating_vectors([record])
+    return values[0], errors
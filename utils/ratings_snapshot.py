@@ -0,0 +1,261 @@
+"""
+This is an offline snapshot of the 2Kratings database in a compact binary file.
+
+The file is a small header, a JSON schema (attribute and badge names) and then
+fixed-width records sorted by URL part:
+
+    slug (48 bytes) | name (48 bytes) | search key (48 bytes) | 36 x uint8 | 40 x uint8
+
+Attributes are stored as their rating (0 when the page did not list one) and
+badges as an index into BADGE_LEVELS. Readers memory-map the file read-only and
+view the records as a NumPy structured array. Every gunicorn worker shares the
+same page-cache copy, and lookups never touch the network.
+
+The snapshot is rebuilt from an NDJSON scrape dump, as written by
+utils.scrape_roster:
+
+    python -m utils.scrape_roster --file slugs.txt --output ratings.ndjson
+    python -m utils.ratings_snapshot build ratings.ndjson
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+
+import numpy as np
+from dotenv import load_dotenv
+
+from utils.rating_registry import (
+    ATTRIBUTE_INDEX,
+    ATTRIBUTE_NAMES,
+    BADGE_INDEX,
+    BADGE_NAMES,
+    BADGE_LEVELS,
+    rating_matrices,
+)
+
+# Load environment variables from .env file
+load_dotenv()
+
+DEFAULT_PATH = os.environ.get("RATINGS_SNAPSHOT_PATH", "ratings_snapshot.bin")
+
+MAGIC = b"2KRS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHHII")  # magic, version, attributes, badges, records, schema bytes
+TEXT_WIDTH = 48
+
+# Re-check the file on disk at most this often, so rebuilt snapshots are picked up.
+RELOAD_INTERVAL = 30
+
+
+def record_dtype(n_attributes, n_badges):
+    return np.dtype([
+        ("slug", f"S{TEXT_WIDTH}"),
+        ("name", f"S{TEXT_WIDTH}"),
+        ("key", f"S{TEXT_WIDTH}"),
+        ("attributes", np.uint8, (n_attributes,)),
+        ("badges", np.uint8, (n_badges,)),
+    ])
+
+
+def search_key(text):
+    """
+    Lower-case ASCII form of a name, so "Jokić" is found by "jokic".
+    """
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(folded.lower().split())
+
+
+def _fixed(text, width=TEXT_WIDTH):
+    """
+    Encode text into at most `width` bytes without cutting a UTF-8 character in half.
+    """
+    return text.encode("utf-8")[:width].decode("utf-8", "ignore").encode("utf-8")
+
+
+def build_snapshot(records, path=DEFAULT_PATH, attribute_names=ATTRIBUTE_NAMES, badge_names=BADGE_NAMES):
+    """
+    Write scraped player dictionaries ({"slug", "player_name", "attributes", "badges"})
+    to a new snapshot file. The file is swapped in atomically, so readers never see
+    a half-written snapshot. Returns the number of players written.
+    """
+    by_slug = {}
+    for record in records:
+        if "error" in record or not record.get("slug"):
+            continue
+        by_slug[record["slug"].strip("/").lower()] = record
+
+    slugs = sorted(by_slug)
+    dtype = record_dtype(len(attribute_names), len(badge_names))
+    table = np.zeros(len(by_slug), dtype=dtype)
+    for row, slug in enumerate(slugs):
+        name = by_slug[slug].get("player_name", "")
+        table["slug"][row] = _fixed(slug)
+        table["name"][row] = _fixed(name)
+        table["key"][row] = _fixed(search_key(name))
+
+    # Validate every player's ratings in one pass; invalid and missing values are stored as 0 ("None" for badges).
+    attributes, badges, _ = rating_matrices(
+        {**by_slug[slug].get("attributes", {}), **by_slug[slug].get("badges", {})} for slug in slugs
+    )
+    table["attributes"] = np.maximum(attributes[:, [ATTRIBUTE_INDEX[attr] for attr in attribute_names]], 0)
+    table["badges"] = np.maximum(badges[:, [BADGE_INDEX[badge] for badge in badge_names]], 0)
+
+    schema = json.dumps({"attributes": list(attribute_names), "badges": list(badge_names)}).encode()
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(attribute_names), len(badge_names), len(table), len(schema))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix=".ratings_snapshot.")
+    try:
+        with os.fdopen(handle, "wb") as snapshot_file:
+            snapshot_file.write(header)
+            snapshot_file.write(schema)
+            snapshot_file.write(table.tobytes())
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+    return len(table)
+
+
+class RatingsSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_attributes, n_badges, count, schema_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} ratings snapshot.")
+        schema = json.loads(self._mmap[HEADER.size:HEADER.size + schema_size])
+        self.attribute_names = tuple(schema["attributes"])
+        self.badge_names = tuple(schema["badges"])
+        self.records = np.frombuffer(
+            self._mmap, dtype=record_dtype(n_attributes, n_badges), count=count,
+            offset=HEADER.size + schema_size,
+        )
+        stat = os.stat(path)
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+
+    def __len__(self):
+        return len(self.records)
+
+    def _to_player_data(self, record):
+        return {
+            "slug": record["slug"].decode("utf-8"),
+            "player_name": record["name"].decode("utf-8"),
+            "attributes": {
+                name: int(value)
+                for name, value in zip(self.attribute_names, record["attributes"])
+                if value
+            },
+            "badges": {
+                name: BADGE_LEVELS[value]
+                for name, value in zip(self.badge_names, record["badges"])
+            },
+        }
+
+    def lookup(self, player_url_part):
+        """
+        Player data in the same shape as scrape_player_data, or None.
+        """
+        slug = player_url_part.strip().strip("/").lower().encode("utf-8")[:TEXT_WIDTH]
+        slugs = self.records["slug"]
+        index = int(np.searchsorted(slugs, slug))
+        if index < len(slugs) and slugs[index] == slug:
+            return self._to_player_data(self.records[index])
+        return None
+
+    def search(self, query, limit=10):
+        """
+        Players whose name contains the query, as (slug, name) pairs; prefix matches come first.
+        """
+        needle = search_key(query).encode("ascii")
+        if not needle:
+            return []
+        positions = np.char.find(self.records["key"], needle)
+        matches = np.flatnonzero(positions >= 0)
+        matches = matches[np.argsort(positions[matches] > 0, kind="stable")][:limit]
+        return [
+            (self.records[index]["slug"].decode("utf-8"), self.records[index]["name"].decode("utf-8"))
+            for index in matches
+        ]
+
+    def close(self):
+        self.records = None
+        self._mmap.close()
+
+
+_snapshot = None
+_checked_at = 0.0
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot(path=DEFAULT_PATH):
+    """
+    The process-wide snapshot, or None when no snapshot file exists.
+    The file is re-opened when a rebuild has replaced it.
+    """
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    if _snapshot is not None and now - _checked_at < RELOAD_INTERVAL:
+        return _snapshot
+
+    with _snapshot_lock:
+        _checked_at = now
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            _snapshot = None
+            return None
+        if _snapshot is None or _snapshot.identity != (stat.st_ino, stat.st_mtime_ns):
+            # The old mapping is left to the garbage collector, since other
+            # threads may still hold records from it.
+            _snapshot = RatingsSnapshot(path)
+        return _snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the offline 2Kratings snapshot.")
+    parser.add_argument("--path", default=DEFAULT_PATH, help="snapshot file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build the snapshot from an NDJSON scrape dump")
+    build.add_argument("dump")
+    lookup = commands.add_parser("lookup", help="print one player")
+    lookup.add_argument("slug")
+    search = commands.add_parser("search", help="search players by name")
+    search.add_argument("query")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        with open(args.dump, encoding="utf-8") as dump:
+            count = build_snapshot((json.loads(line) for line in dump if line.strip()), args.path)
+        print(f"Wrote {count} players to {args.path} in {time.perf_counter() - started:.2f}s.")
+        return 0
+
+    snapshot = RatingsSnapshot(args.path)
+    if args.command == "lookup":
+        player_data = snapshot.lookup(args.slug)
+        if player_data is None:
+            print(f"{args.slug} is not in the snapshot.", file=sys.stderr)
+            return 1
+        print(json.dumps(player_data, indent=2, ensure_ascii=False))
+    else:
+        for slug, name in snapshot.search(args.query):
+            print(f"{slug}\t{name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
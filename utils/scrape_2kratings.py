@@ -2,22 +2,61 @@
 This is the logic for scraping player data from 2Kratings.com.
 """
 
-import cloudscraper
-from lxml import html
-from bs4 import BeautifulSoup
+from functools import lru_cache
+
+from lxml import etree, html
 from requests.exceptions import HTTPError
 
-def scrape_player_data(player_url_part):
+from utils.rating_registry import ATTRIBUTE_NAMES
+from utils.scrape_cache import get_cache
+from utils.scraper_pool import get_pool
+
+BASE_URL = "https://www.2kratings.com/"
+
+# Bump whenever parse_player_page changes its output, so cached pages are parsed again.
+PARSER_VERSION = 2
+
+def scrape_player_data(player_url_part, use_cache=True, rate_limiter=None):
     """
     Function to scrape data for a specific player.
+    Pages and parsed results are served from the local cache while they are fresh;
+    the optional rate limiter only applies when the page has to be fetched.
+    """
+    cache = get_cache() if use_cache else None
+    raw_html = None
+
+    if cache:
+        player_data, raw_html = cache.get(player_url_part, PARSER_VERSION)
+        if player_data is not None:
+            return player_data
+
+    if raw_html is None:
+        raw_html = fetch_player_page(player_url_part, rate_limiter)
+        if isinstance(raw_html, dict):
+            return raw_html
+        player_data = parse_player_page(raw_html)
+        if cache and "error" not in player_data:
+            cache.set(player_url_part, raw_html, player_data, PARSER_VERSION)
+    else:
+        # Cached page from an older parser: parse it again instead of fetching.
+        player_data = parse_player_page(raw_html)
+        if cache and "error" not in player_data:
+            cache.update_parsed(player_url_part, player_data, PARSER_VERSION)
+
+    return player_data
+
+def fetch_player_page(player_url_part, rate_limiter=None):
+    """
+    Download the raw HTML for a player, or return an error dictionary.
     """
-    BASE_URL = "https://www.2kratings.com/"
     URL = f"{BASE_URL}{player_url_part}"
 
-    scraper = cloudscraper.create_scraper()
+    if rate_limiter:
+        rate_limiter.wait()
 
     try:
-        response = scraper.get(URL)
+        with get_pool().session() as scraper:
+            response = scraper.get(URL)
         response.raise_for_status()
     except HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
@@ -26,83 +65,104 @@ def scrape_player_data(player_url_part):
         print(f"An unexpected error occurred: {err}")
         return {"error": "An unexpected error occurred while trying to scrape player data."}
 
-    # Parse the HTML content with BeautifulSoup
-    soup = BeautifulSoup(response.content, "html.parser")
-    tree = html.fromstring(response.content)
+    return response.content
+
+def _class_token(name):
+    """
+    XPath test for an element carrying a class among others.
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# Compiled once at import; each page is parsed a single time into one lxml tree.
+PLAYER_NAME_XPATH = etree.XPath("//h1[@class='header-title pt-2 mb-0'][1]")
+ATTRIBUTE_ITEMS_XPATH = etree.XPath(f"//li[{_class_token('mb-1')}]")
+ATTRIBUTE_VALUE_XPATH = etree.XPath(f".//span[{_class_token('attribute-box')}][1]")
+INTANGIBLES_XPATH = etree.XPath(
+    "(//h4[contains(., 'Intangibles')])[1]/following::span[@class='attribute-box medium'][1]"
+)
+BADGE_CARDS_XPATH = etree.XPath(
+    "(//div[@class='tab-pane fade show active rounded-bottom rounded-right bg-white px-3 pt-1 btl-0'])[1]"
+    "//div[@class='row no-gutters badge-card']"
+)
+BADGE_IMAGE_XPATH = etree.XPath(".//img[1]")
+BADGE_NAME_XPATH = etree.XPath(".//h4[@class='text-white'][1]")
+
+# Page labels ("Mid-Range Shot", "Help Defense IQ") keyed by their lower-case words.
+ATTRIBUTE_LABELS = {tuple(name.split("_")): name for name in ATTRIBUTE_NAMES}
+
+BADGE_LEVELS_BY_SLUG = {
+    "legendary": "Legendary",
+    "hof": "Hall of Fame",
+    "gold": "Gold",
+    "silver": "Silver",
+    "bronze": "Bronze",
+}
+
+# Lines repeat across pages ("88 Mid-Range Shot"); a few thousand cover every label at every value.
+@lru_cache(maxsize=4096)
+def normalise_attribute_label(first_line):
+    """
+    Turn the first line of an attribute item ("88 +1 Mid-Range Shot") into a column name.
+    """
+    # Drop the rating itself and any "+1"-style change before the label.
+    words = first_line.replace("-", " ").lower().split()[1:]
+    while words and any(char.isdigit() for char in words[0]):
+        words = words[1:]
+    name = ATTRIBUTE_LABELS.get(tuple(words))
+    if name is None:
+        name = "_".join(words)
+        if name.startswith("interior_defense"):
+            name = "interior_defense"
+    return name
+
+def normalise_badge_label(label):
+    """
+    Turn a badge heading ("Post-Up Poet") into a column name.
+    """
+    return label.strip().replace(" ", "_").replace("-", "_").lower()
 
+def parse_player_page(content):
+    """
+    Extract the player name, attributes and badges from a player page.
+    """
     try:
-        player_name_tag = soup.find("h1", class_="header-title pt-2 mb-0")
-        if player_name_tag:
-            player_name = player_name_tag.text.strip()
+        tree = html.fromstring(content)
+
+        player_name_tags = PLAYER_NAME_XPATH(tree)
+        if player_name_tags:
+            player_name = player_name_tags[0].text_content().strip()
         else:
             raise ValueError("Player name not found on the page.")
 
         attributes = {}
-        attribute_elements = soup.find_all("li", class_="mb-1")
-
-        for attr in attribute_elements:
-            raw_attribute_text = attr.text.strip()
-            raw_attribute_name = "_".join(raw_attribute_text.split("\n")[0].split(" ")[1:]).lower()
-            
-            # Check if the attribute name contains a number at the start
-            if any(char.isdigit() for char in raw_attribute_name):
-                parts = raw_attribute_name.split("_", 1)
-                if len(parts) > 1:
-                    clean_attribute_name = parts[1]
-                else:
-                    clean_attribute_name = raw_attribute_name
-            else:
-                clean_attribute_name = raw_attribute_name
-
-            clean_attribute_name = clean_attribute_name.replace("-", "_")
-
-            try:
-                attribute_value = int(attr.find("span", class_="attribute-box").text.strip())
-            except AttributeError:
+        for item in ATTRIBUTE_ITEMS_XPATH(tree):
+            value_tags = ATTRIBUTE_VALUE_XPATH(item)
+            if not value_tags:
                 continue
+            first_line = item.text_content().strip().split("\n")[0]
+            attributes[normalise_attribute_label(first_line)] = int(value_tags[0].text_content().strip())
 
-            if clean_attribute_name.startswith("interior_defense"):
-                clean_attribute_name = "interior_defense"
-
-            attributes[clean_attribute_name] = attribute_value
-
-        try:
-            intangibles_label = soup.find(lambda tag: tag.name == "h4" and "Intangibles" in tag.text)
-            if intangibles_label:
-                intangibles_value = int(intangibles_label.find_next("span", class_="attribute-box medium").text.strip())
-                attributes["intangibles"] = intangibles_value
-            else:
-                print("Intangibles label not found.")
-        except Exception as e:
-            print(f"Error extracting intangibles: {e}")
+        intangibles_tags = INTANGIBLES_XPATH(tree)
+        if intangibles_tags:
+            try:
+                attributes["intangibles"] = int(intangibles_tags[0].text_content().strip())
+            except ValueError as e:
+                print(f"Error extracting intangibles: {e}")
+        else:
+            print("Intangibles label not found.")
 
         # Extract badges
         badges = {}
-        badges_section = soup.find("div", class_="tab-pane fade show active rounded-bottom rounded-right bg-white px-3 pt-1 btl-0")
-        if badges_section:
-            badge_containers = badges_section.find_all("div", class_="row no-gutters badge-card")
-            for badge_container in badge_containers:
-                badge_img = badge_container.find("img")
-                if badge_img:
-                    badge_src = badge_img.get("data-src")
-                    badge_name = badge_container.find("h4", class_="text-white").text.strip().replace(" ", "_").replace("-", "_").lower()
-                    badge_string = badge_src.split("-")[-2]
-                    if badge_string == "legendary":
-                        badge_level = "Legendary"
-                    elif badge_string == "hof":
-                        badge_level = "Hall of Fame"
-                    elif badge_string == "gold":
-                        badge_level = "Gold"
-                    elif badge_string == "silver":
-                        badge_level = "Silver"
-                    elif badge_string == "bronze":
-                        badge_level = "Bronze"
-                    else:
-                        badge_level = "None"
-
-                    badges[badge_name] = badge_level
-                else:
-                    print(f"Badge image not found for {badge_container}")
+        for badge_card in BADGE_CARDS_XPATH(tree):
+            badge_images = BADGE_IMAGE_XPATH(badge_card)
+            if not badge_images:
+                print("Badge image not found for a badge card.")
+                continue
+            badge_src = badge_images[0].get("data-src") or ""
+            badge_name = normalise_badge_label(BADGE_NAME_XPATH(badge_card)[0].text_content())
+            badge_parts = badge_src.split("-")
+            badge_string = badge_parts[-2] if len(badge_parts) > 1 else ""
+            badges[badge_name] = BADGE_LEVELS_BY_SLUG.get(badge_string, "None")
     except ValueError as parse_err:
         print(f"Data parsing error: {parse_err}")
         return {"error": f"Failed to parse player data: {parse_err}"}
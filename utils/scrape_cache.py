@@ -0,0 +1,212 @@
+"""
+This is a small on-disk cache for pages scraped from 2Kratings.com.
+
+Entries are kept in SQLite, keyed by the player URL part, and hold both the raw
+HTML and the parsed result. Entries expire after a TTL and the least recently
+used ones are evicted once the cache grows past its size limit.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+DEFAULT_PATH = os.environ.get("SCRAPE_CACHE_PATH", "scrape_cache.sqlite3")
+DEFAULT_TTL = int(os.environ.get("SCRAPE_CACHE_TTL", 7 * 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("SCRAPE_CACHE_MAX_ENTRIES", 2000))
+
+# Only write a new access time when the stored one is older than this, so that
+# hot entries are served without a write.
+TOUCH_INTERVAL = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scrape_cache (
+    url_part TEXT PRIMARY KEY,
+    raw_html BLOB,
+    parsed TEXT,
+    parser_version INTEGER NOT NULL DEFAULT 0,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_scrape_cache_accessed_at ON scrape_cache (accessed_at);
+"""
+
+
+def normalise_key(player_url_part):
+    """
+    Use one cache key for "LeBron-James", "/lebron-james/" and so on.
+    """
+    return player_url_part.strip().strip("/").lower()
+
+
+class ScrapeCache:
+    """
+    SQLite-backed cache with a TTL, a size-bounded LRU and hit/miss counters.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "stale_parses": 0, "evictions": 0, "writes": 0}
+
+    def _connection(self):
+        """
+        One connection per thread; SQLite connections cannot be shared between threads.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def get(self, player_url_part, parser_version=0):
+        """
+        Return a (parsed, raw_html) tuple for a fresh entry, or (None, None).
+        parsed is None when the stored result came from an older parser, in
+        which case the raw HTML can be parsed again without a new fetch.
+        """
+        key = normalise_key(player_url_part)
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT raw_html, parsed, parser_version, fetched_at, accessed_at FROM scrape_cache WHERE url_part = ?",
+            (key,),
+        ).fetchone()
+
+        if row is None:
+            self._count("misses")
+            return None, None
+
+        raw_html, parsed, stored_version, fetched_at, accessed_at = row
+        if self.ttl and now - fetched_at > self.ttl:
+            self._count("expired")
+            self._count("misses")
+            self.delete(key)
+            return None, None
+
+        if now - accessed_at > TOUCH_INTERVAL:
+            self._connection().execute(
+                "UPDATE scrape_cache SET accessed_at = ? WHERE url_part = ?", (now, key)
+            )
+
+        if parsed is None or stored_version != parser_version:
+            self._count("stale_parses")
+            return None, raw_html
+
+        self._count("hits")
+        return json.loads(parsed), raw_html
+
+    def set(self, player_url_part, raw_html, parsed, parser_version=0):
+        """
+        Store a page and its parsed result, evicting the least recently used entries if needed.
+        """
+        key = normalise_key(player_url_part)
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO scrape_cache (url_part, raw_html, parsed, parser_version, fetched_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, raw_html, json.dumps(parsed) if parsed is not None else None, parser_version, now, now),
+        )
+        self._count("writes")
+        self._evict(connection)
+
+    def update_parsed(self, player_url_part, parsed, parser_version=0):
+        """
+        Replace the parsed result of an entry without touching its fetch time.
+        """
+        self._connection().execute(
+            "UPDATE scrape_cache SET parsed = ?, parser_version = ? WHERE url_part = ?",
+            (json.dumps(parsed), parser_version, normalise_key(player_url_part)),
+        )
+
+    def delete(self, player_url_part):
+        """
+        Remove a single entry.
+        """
+        self._connection().execute(
+            "DELETE FROM scrape_cache WHERE url_part = ?", (normalise_key(player_url_part),)
+        )
+
+    def clear(self):
+        """
+        Remove every entry and reset the counters.
+        """
+        self._connection().execute("DELETE FROM scrape_cache")
+        with self._lock:
+            for counter in self._counters:
+                self._counters[counter] = 0
+
+    def _evict(self, connection):
+        if not self.max_entries:
+            return
+        (count,) = connection.execute("SELECT COUNT(*) FROM scrape_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            connection.execute(
+                "DELETE FROM scrape_cache WHERE url_part IN "
+                "(SELECT url_part FROM scrape_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self._count("evictions", overflow)
+
+    def stats(self):
+        """
+        Hit/miss counters for this process plus the size of the cache on disk.
+        """
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(raw_html)), 0) FROM scrape_cache"
+        ).fetchone()
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"] + counters["stale_parses"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 3) if lookups else 0.0
+        counters["entries"] = entries
+        counters["raw_bytes"] = size
+        counters["max_entries"] = self.max_entries
+        counters["ttl"] = self.ttl
+        return counters
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    The process-wide cache configured from the environment.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ScrapeCache()
+    return _default_cache
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the 2Kratings scrape cache.")
+    parser.add_argument("--clear", action="store_true", help="remove every cached page")
+    args = parser.parse_args()
+
+    cache = get_cache()
+    if args.clear:
+        cache.clear()
+    print(json.dumps(cache.stats(), indent=2))
@@ -0,0 +1,157 @@
+"""
+This is the batch scraper for refreshing many players from 2Kratings.com at once.
+
+Players are scraped concurrently on a thread pool. One rate limiter is shared by
+every thread so the site sees a polite, steady request rate however many
+workers run. Cached pages do not count against the limit. Results are written
+as NDJSON, one player per line.
+
+Usage:
+    python -m utils.scrape_roster lebron-james stephen-curry
+    python -m utils.scrape_roster --file slugs.txt --output ratings.ndjson
+    python -m utils.scrape_roster --team los-angeles-lakers --workers 4 --rate 0.5
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+from lxml import html
+
+from utils.scrape_2kratings import BASE_URL, scrape_player_data
+from utils.scraper_pool import get_pool
+
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 1.0  # outbound requests per second, across all workers
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls at least 1 / rate seconds apart.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        """
+        Block until this caller's slot comes up.
+        """
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def team_player_slugs(team_slug, rate_limiter=None):
+    """
+    Read the player URL parts from a 2Kratings team page.
+    """
+    if rate_limiter:
+        rate_limiter.wait()
+    with get_pool().session() as scraper:
+        response = scraper.get(f"{BASE_URL}teams/{team_slug.strip('/')}")
+    response.raise_for_status()
+
+    tree = html.fromstring(response.content)
+    slugs = []
+    for href in tree.xpath("//table//tbody//td//a/@href"):
+        path = urlparse(href).path.strip("/")
+        # Player pages sit directly under the site root.
+        if path and "/" not in path and path not in slugs:
+            slugs.append(path)
+    return slugs
+
+
+def scrape_players(slugs, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, use_cache=True, progress=None, rate_limiter=None):
+    """
+    Scrape every slug concurrently and yield (slug, player_data) as each finishes.
+    `progress`, if given, is called with (done, total, slug, player_data).
+    Pass `rate_limiter` to share one limit with other requests, e.g. team pages; otherwise one is made from `rate`.
+    """
+    slugs = list(dict.fromkeys(slug.strip() for slug in slugs if slug.strip()))
+    rate_limiter = rate_limiter or RateLimiter(rate)
+    total = len(slugs)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(scrape_player_data, slug, use_cache, rate_limiter): slug
+            for slug in slugs
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            slug = futures[future]
+            try:
+                player_data = future.result()
+            except Exception as err:
+                player_data = {"error": f"Unexpected error: {err}"}
+            if progress:
+                progress(done, total, slug, player_data)
+            yield slug, player_data
+
+
+def _print_progress(done, total, slug, player_data):
+    status = "error: " + player_data["error"] if "error" in player_data else "ok"
+    print(f"[{done}/{total}] {slug} {status}", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape many 2Kratings players concurrently.")
+    parser.add_argument("slugs", nargs="*", help="player URL parts, e.g. lebron-james")
+    parser.add_argument("--file", help="read player URL parts from a file, one per line")
+    parser.add_argument("--team", action="append", default=[], help="scrape every player on a team page")
+    parser.add_argument("--output", help="write NDJSON here instead of stdout")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="max outbound requests per second")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch fresh pages")
+    parser.add_argument("--quiet", action="store_true", help="do not report progress")
+    args = parser.parse_args(argv)
+
+    # One limiter for team pages and player pages alike.
+    rate_limiter = RateLimiter(args.rate)
+    slugs = list(args.slugs)
+    if args.file:
+        with open(args.file) as slug_file:
+            slugs.extend(line.strip() for line in slug_file if line.strip() and not line.startswith("#"))
+    for team in args.team:
+        slugs.extend(team_player_slugs(team, rate_limiter))
+
+    if not slugs:
+        parser.error("no players given")
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    failures = 0
+    started = time.monotonic()
+    try:
+        for slug, player_data in scrape_players(
+            slugs,
+            workers=args.workers,
+            rate_limiter=rate_limiter,
+            use_cache=not args.no_cache,
+            progress=None if args.quiet else _print_progress,
+        ):
+            failures += "error" in player_data
+            output.write(json.dumps({"slug": slug, **player_data}) + "\n")
+            output.flush()
+    finally:
+        if args.output:
+            output.close()
+
+    if not args.quiet:
+        elapsed = time.monotonic() - started
+        print(f"Scraped {len(set(slugs))} players in {elapsed:.1f}s, {failures} failed.", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+This is a thread-safe pool of long-lived cloudscraper sessions.
+
+Creating a scraper per lookup throws away keep-alive connections and any solved
+anti-bot challenge, so sessions are kept and reused. A session is recycled once
+it gets old or has served many requests, and dropped as soon as it looks
+unhealthy (a connection error or a block/challenge status code).
+"""
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import cloudscraper
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+DEFAULT_POOL_SIZE = int(os.environ.get("SCRAPER_POOL_SIZE", 4))
+DEFAULT_MAX_AGE = int(os.environ.get("SCRAPER_MAX_AGE", 30 * 60))
+DEFAULT_MAX_USES = int(os.environ.get("SCRAPER_MAX_USES", 200))
+DEFAULT_TIMEOUT = float(os.environ.get("SCRAPER_REQUEST_TIMEOUT", 20))
+
+# Responses that mean the session was blocked or challenged again.
+UNHEALTHY_STATUS_CODES = {403, 429, 503}
+
+
+class PooledScraper:
+    """
+    A cloudscraper session together with its age and usage bookkeeping.
+    """
+
+    def __init__(self):
+        self.scraper = cloudscraper.create_scraper()
+        self.created_at = time.monotonic()
+        self.uses = 0
+        self.healthy = True
+
+    def get(self, url, **kwargs):
+        """
+        Issue a GET through the session and record whether it still looks healthy.
+        """
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        self.uses += 1
+        try:
+            response = self.scraper.get(url, **kwargs)
+        except Exception:
+            self.healthy = False
+            raise
+        if response.status_code in UNHEALTHY_STATUS_CODES:
+            self.healthy = False
+        return response
+
+    def close(self):
+        try:
+            self.scraper.close()
+        except Exception:
+            pass
+
+
+class ScraperPool:
+    """
+    Hands out at most `size` sessions at a time and keeps idle ones warm.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_age=DEFAULT_MAX_AGE, max_uses=DEFAULT_MAX_USES):
+        self.size = size
+        self.max_age = max_age
+        self.max_uses = max_uses
+        # LIFO so the most recently used, warmest session goes out first.
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._counters = {"created": 0, "reused": 0, "recycled": 0, "discarded": 0}
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _is_stale(self, entry):
+        return (
+            not entry.healthy
+            or time.monotonic() - entry.created_at > self.max_age
+            or entry.uses >= self.max_uses
+        )
+
+    def _checkout(self, timeout):
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No scraper session became available in time.")
+        try:
+            while True:
+                try:
+                    entry = self._idle.get_nowait()
+                except queue.Empty:
+                    self._count("created")
+                    return PooledScraper()
+                if self._is_stale(entry):
+                    entry.close()
+                    self._count("recycled")
+                    continue
+                self._count("reused")
+                return entry
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, entry):
+        try:
+            if entry.healthy:
+                self._idle.put(entry)
+            else:
+                entry.close()
+                self._count("discarded")
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def session(self, timeout=None):
+        """
+        Borrow a session for the duration of a with block.
+        """
+        entry = self._checkout(timeout)
+        try:
+            yield entry
+        finally:
+            self._checkin(entry)
+
+    def close(self):
+        """
+        Close every idle session.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        counters["idle"] = self._idle.qsize()
+        counters["size"] = self.size
+        return counters
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    The process-wide pool shared by the web routes and any batch tooling.
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = ScraperPool()
+    return _default_pool